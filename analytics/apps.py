@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class AnalyticsConfig(AppConfig):
+    name = 'analytics'
+
+    def ready(self):
+        from . import receivers  # noqa: F401
@@ -0,0 +1,352 @@
+import threading
+from functools import lru_cache
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Max
+from django.utils.module_loading import import_string
+from attempts.models import Attempt
+
+GLOBAL_BOARD = 'global'
+
+
+def quiz_board(quiz_id):
+    return f'quiz:{quiz_id}'
+
+
+class LeaderboardBackend:
+    """
+    Ranked boards of user scores: one per quiz holding each user's best
+    score, and a global board holding the sum of those bests.
+
+    Ranks are competition ranks: one more than the number of users with a
+    strictly higher score, so tied users share a rank.
+    """
+    def is_loaded(self):
+        raise NotImplementedError
+
+    def load(self, bests):
+        """
+        Replace every board from ``(quiz_id, user_id, best_score)`` rows.
+        """
+        raise NotImplementedError
+
+    def record_best(self, quiz_id, user_id, score):
+        """
+        Raise the user's best for the quiz to ``score`` if it is higher,
+        moving their global total by the same amount.
+        """
+        raise NotImplementedError
+
+    def set_best(self, quiz_id, user_id, score):
+        """
+        Set the user's best for the quiz even if it is lower (after a
+        regrade); ``None`` removes them from the quiz board.
+        """
+        raise NotImplementedError
+
+    def top(self, board, limit):
+        """
+        Return ``[(user_id, score)]`` for the ``limit`` highest scores.
+        """
+        raise NotImplementedError
+
+    def rank(self, board, user_id):
+        """
+        Return ``(rank, score)`` for the user, or None if they are not on
+        the board.
+        """
+        raise NotImplementedError
+
+
+class RankedBoard:
+    """
+    Users' scores next to a Fenwick tree counting the users at each score.
+
+    Scores are non-negative integers (attempt scores and their sums). For
+    scores below ``size`` the tree counts the users at or under a score in
+    O(log size), so updates and rank lookups stay logarithmic however many
+    users the board holds; it doubles when a higher score arrives. top()
+    steps down the distinct scores held, one tree search each, ordering
+    tied users by id.
+    """
+    __slots__ = ('scores', 'users', 'counts', 'size')
+
+    def __init__(self):
+        self.scores = {}
+        self.users = {}
+        self.size = 64
+        self.counts = [0] * (self.size + 1)
+
+    def set(self, user_id, score):
+        old = self.scores.pop(user_id, None)
+        if old is not None:
+            tied = self.users[old]
+            tied.discard(user_id)
+            if not tied:
+                del self.users[old]
+            self.add(old, -1)
+        if score is None:
+            return
+        if score >= self.size:
+            self.grow(score)
+        self.scores[user_id] = score
+        self.users.setdefault(score, set()).add(user_id)
+        self.add(score, 1)
+
+    def add(self, score, delta):
+        index = score + 1
+        counts = self.counts
+        while index <= self.size:
+            counts[index] += delta
+            index += index & -index
+
+    def grow(self, score):
+        while score >= self.size:
+            self.size *= 2
+        self.counts = counts = [0] * (self.size + 1)
+        for held, tied in self.users.items():
+            counts[held + 1] = len(tied)
+        for index in range(1, self.size + 1):
+            parent = index + (index & -index)
+            if parent <= self.size:
+                counts[parent] += counts[index]
+
+    def at_most(self, score):
+        """
+        The number of users scoring ``score`` or less.
+        """
+        index = score + 1
+        total = 0
+        while index:
+            total += self.counts[index]
+            index -= index & -index
+        return total
+
+    def find(self, count):
+        """
+        The lowest score that at least ``count`` users score at or under.
+        """
+        position = 0
+        step = self.size
+        while step:
+            following = position + step
+            if following <= self.size and self.counts[following] < count:
+                position = following
+                count -= self.counts[following]
+            step >>= 1
+        return position
+
+    def top(self, limit):
+        entries = []
+        remaining = len(self.scores)
+        while remaining and len(entries) < limit:
+            score = self.find(remaining)
+            tied = self.users[score]
+            entries.extend((user_id, score) for user_id in sorted(tied)[:limit - len(entries)])
+            remaining -= len(tied)
+        return entries
+
+    def rank(self, user_id):
+        score = self.scores.get(user_id)
+        if score is None:
+            return None
+        return len(self.scores) - self.at_most(score) + 1, score
+
+
+class LocalLeaderboard(LeaderboardBackend):
+    """
+    Boards held in this process. Each worker keeps its own copy, so this is
+    meant for development, tests and single-process deployments.
+    """
+    def __init__(self):
+        self.boards = {}
+        self.loaded = False
+        self.lock = threading.Lock()
+
+    def is_loaded(self):
+        return self.loaded
+
+    def load(self, bests):
+        boards = {GLOBAL_BOARD: RankedBoard()}
+        totals = {}
+        for quiz_id, user_id, score in bests:
+            boards.setdefault(quiz_board(quiz_id), RankedBoard()).set(user_id, score)
+            totals[user_id] = totals.get(user_id, 0) + score
+        for user_id, total in totals.items():
+            boards[GLOBAL_BOARD].set(user_id, total)
+
+        with self.lock:
+            self.boards = boards
+            self.loaded = True
+
+    def change_best(self, quiz_id, user_id, score, only_higher):
+        with self.lock:
+            board = self.boards.setdefault(quiz_board(quiz_id), RankedBoard())
+            old = board.scores.get(user_id)
+            if only_higher and old is not None and old >= score:
+                return
+            board.set(user_id, score)
+
+            totals = self.boards.setdefault(GLOBAL_BOARD, RankedBoard())
+            total = totals.scores.get(user_id, 0) + (score or 0) - (old or 0)
+            totals.set(user_id, total)
+
+    def record_best(self, quiz_id, user_id, score):
+        self.change_best(quiz_id, user_id, score, only_higher=True)
+
+    def set_best(self, quiz_id, user_id, score):
+        self.change_best(quiz_id, user_id, score, only_higher=False)
+
+    def top(self, board, limit):
+        with self.lock:
+            ranked = self.boards.get(board)
+            return ranked.top(limit) if ranked else []
+
+    def rank(self, board, user_id):
+        with self.lock:
+            ranked = self.boards.get(board)
+            return ranked.rank(user_id) if ranked else None
+
+
+class RedisLeaderboard(LeaderboardBackend):
+    """
+    Boards stored as Redis sorted sets shared by every worker, using
+    LEADERBOARD_REDIS_URL. Requires the ``redis`` package.
+    """
+    PREFIX = 'leaderboard:'
+
+    # Sets the quiz best (only upwards when ARGV[3] is '1', removing the
+    # member when ARGV[2] is empty) and moves the global total by the
+    # difference, atomically.
+    CHANGE_BEST = """
+    local had = redis.call('ZSCORE', KEYS[1], ARGV[1])
+    local old = tonumber(had or '0')
+    local new = tonumber(ARGV[2])
+    if ARGV[3] == '1' and had and old >= new then return 0 end
+    if new then
+        redis.call('ZADD', KEYS[1], new, ARGV[1])
+    else
+        new = 0
+        redis.call('ZREM', KEYS[1], ARGV[1])
+    end
+    redis.call('ZINCRBY', KEYS[2], new - old, ARGV[1])
+    return new - old
+    """
+
+    def __init__(self):
+        import redis
+
+        self.client = redis.Redis.from_url(settings.LEADERBOARD_REDIS_URL)
+        self.change_best = self.client.register_script(self.CHANGE_BEST)
+
+    def key(self, board):
+        return self.PREFIX + board
+
+    def is_loaded(self):
+        return bool(self.client.exists(self.key('loaded')))
+
+    def load(self, bests):
+        boards = {}
+        for quiz_id, user_id, score in bests:
+            boards.setdefault(self.key(quiz_board(quiz_id)), {})[user_id] = score
+            totals = boards.setdefault(self.key(GLOBAL_BOARD), {})
+            totals[user_id] = totals.get(user_id, 0) + score
+
+        # Fill fresh keys, then swap them in together.
+        pipeline = self.client.pipeline(transaction=True)
+        for key, scores in boards.items():
+            pipeline.delete(key + ':new')
+            pipeline.zadd(key + ':new', scores)
+        pipeline.execute()
+
+        keep = {key.encode() for key in boards} | {self.key('loaded').encode()}
+        stale = [
+            key for key in self.client.scan_iter(self.PREFIX + '*')
+            if key not in keep and not key.endswith(b':new')
+        ]
+        pipeline = self.client.pipeline(transaction=True)
+        if stale:
+            pipeline.delete(*stale)
+        for key in boards:
+            pipeline.rename(key + ':new', key)
+        pipeline.set(self.key('loaded'), 1)
+        pipeline.execute()
+
+    def record_best(self, quiz_id, user_id, score):
+        self.change_best(
+            keys=[self.key(quiz_board(quiz_id)), self.key(GLOBAL_BOARD)], args=[user_id, score, '1']
+        )
+
+    def set_best(self, quiz_id, user_id, score):
+        self.change_best(
+            keys=[self.key(quiz_board(quiz_id)), self.key(GLOBAL_BOARD)],
+            args=[user_id, '' if score is None else score, '0']
+        )
+
+    def top(self, board, limit):
+        return [
+            (int(user_id), int(score))
+            for user_id, score in self.client.zrevrange(self.key(board), 0, limit - 1, withscores=True)
+        ]
+
+    def rank(self, board, user_id):
+        score = self.client.zscore(self.key(board), user_id)
+        if score is None:
+            return None
+        return self.client.zcount(self.key(board), f'({score}', '+inf') + 1, int(score)
+
+
+@lru_cache(maxsize=None)
+def leaderboard_backend():
+    return import_string(getattr(settings, 'LEADERBOARD_BACKEND', 'analytics.leaderboards.LocalLeaderboard'))()
+
+
+def rebuild_leaderboards(backend=None):
+    """
+    Reload every board from the best submitted score of each user on each
+    quiz, in one grouped query.
+    """
+    backend = backend or leaderboard_backend()
+    backend.load(
+        Attempt.objects
+        .filter(status='submitted', score__isnull=False)
+        .order_by()
+        .values_list('quiz_id', 'user_id')
+        .annotate(best=Max('score'))
+        .iterator()
+    )
+    return backend
+
+
+def loaded_leaderboard():
+    """
+    The backend, loading it from the Attempt table the first time it is
+    read in a process (or ever, for a shared backend).
+    """
+    backend = leaderboard_backend()
+    if not backend.is_loaded():
+        rebuild_leaderboards(backend)
+    return backend
+
+
+def leaderboard(board, user, limit=10):
+    """
+    The top ``limit`` entries of a board with usernames, and the
+    requesting user's own rank and score.
+    """
+    backend = loaded_leaderboard()
+    top = backend.top(board, limit)
+    usernames = dict(
+        get_user_model().objects.filter(id__in=[user_id for user_id, _ in top]).values_list('id', 'username')
+    )
+
+    entries = []
+    for position, (user_id, score) in enumerate(top, start=1):
+        rank = entries[-1]['rank'] if entries and entries[-1]['score'] == score else position
+        entries.append({'rank': rank, 'user_id': user_id, 'username': usernames.get(user_id), 'score': score})
+
+    me = backend.rank(board, user.id) if user.is_authenticated else None
+    return {
+        'top': entries,
+        'me': {'rank': me[0], 'score': me[1]} if me else None,
+    }
@@ -0,0 +1,77 @@
+import random
+import statistics
+import time
+from collections import OrderedDict
+from django.core.management.base import BaseCommand
+from analytics.practice import PracticeSession, QuizDifficulty
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure adaptive practice selection on synthetic data held in memory: "
+        "students with a partial answer history each practise a random quiz, drawing "
+        "questions and recording answers. Reports session build, draw and update "
+        "latency. No database access."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questions', type=int, default=50_000)
+        parser.add_argument('--quizzes', type=int, default=100,
+                            help="Quizzes the questions are split between.")
+        parser.add_argument('--users', type=int, default=100_000)
+        parser.add_argument('--draws', type=int, default=10,
+                            help="Questions drawn and answered per student.")
+        parser.add_argument('--history', type=int, default=20,
+                            help="Questions each student has answered before.")
+        parser.add_argument('--sessions', type=int, default=10_000,
+                            help="Sessions kept, as PRACTICE_SESSION_CACHE_SIZE.")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        per_quiz = max(options['questions'] // options['quizzes'], 1)
+        quizzes = []
+        for number in range(options['quizzes']):
+            question_ids = range(number * per_quiz, (number + 1) * per_quiz)
+            stats = {question_id: (100, rng.randint(0, 100)) for question_id in question_ids}
+            quizzes.append(QuizDifficulty(None, question_ids, stats))
+
+        sessions = OrderedDict()
+        builds, draws, updates = [], [], []
+        for user_id in range(options['users']):
+            quiz_id = rng.randrange(len(quizzes))
+            quiz = quizzes[quiz_id]
+            session = sessions.get((user_id, quiz_id))
+            if session is None:
+                history = {
+                    question_id: rng.random()
+                    for question_id in rng.sample(quiz.question_ids, min(options['history'], per_quiz))
+                }
+                started = time.perf_counter()
+                session = PracticeSession(user_id, quiz_id, quiz, history)
+                builds.append(time.perf_counter() - started)
+                sessions[user_id, quiz_id] = session
+                if len(sessions) > options['sessions']:
+                    sessions.popitem(last=False)
+
+            for _ in range(options['draws']):
+                started = time.perf_counter()
+                question_id = session.draw(rng)
+                draws.append(time.perf_counter() - started)
+
+                credit = float(rng.random() < 0.6)
+                started = time.perf_counter()
+                session.record(question_id, credit)
+                updates.append(time.perf_counter() - started)
+
+        self.stdout.write(
+            f"{options['users']:,} students, {len(quizzes)} quizzes of {per_quiz} questions, "
+            f"{len(draws):,} draws."
+        )
+        self.stdout.write(f"{'operation':>10} {'count':>9} {'p50 us':>8} {'p95 us':>8} {'p99 us':>8}")
+        for name, latencies in (('build', builds), ('draw', draws), ('update', updates)):
+            percentiles = statistics.quantiles(latencies, n=100)
+            self.stdout.write(
+                f"{name:>10} {len(latencies):>9,} {statistics.median(latencies) * 1e6:>8.1f} "
+                f"{percentiles[94] * 1e6:>8.1f} {percentiles[98] * 1e6:>8.1f}"
+            )
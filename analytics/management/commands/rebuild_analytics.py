@@ -0,0 +1,33 @@
+import time
+from django.core.management.base import BaseCommand
+from analytics.progress import rebuild_progress
+from analytics.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the analytics rollups and user progress from scratch in chunks. "
+        "Run while submissions are paused."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        applied = 0
+        for applied in rebuild(options['chunk_size']):
+            if options['verbosity'] > 1:
+                self.stdout.write(f"{applied} attempts applied.")
+
+        elapsed = max(time.monotonic() - started, 1e-9)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt rollups from {applied} submitted attempts in {elapsed:.1f}s "
+            f"({applied / elapsed:,.0f} attempts/s)."
+        ))
+
+        users = 0
+        for users in rebuild_progress(options['chunk_size']):
+            if options['verbosity'] > 1:
+                self.stdout.write(f"{users} users refreshed.")
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt progress for {users} users."))
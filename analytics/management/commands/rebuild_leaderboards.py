@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from analytics.leaderboards import rebuild_leaderboards
+
+
+class Command(BaseCommand):
+    help = (
+        "Reload the leaderboards from the Attempt table. Only useful with a "
+        "shared backend; local boards load themselves in each process."
+    )
+
+    def handle(self, *args, **options):
+        rebuild_leaderboards()
+        self.stdout.write(self.style.SUCCESS("Leaderboards rebuilt."))
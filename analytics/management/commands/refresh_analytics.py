@@ -0,0 +1,24 @@
+import time
+from django.core.management.base import BaseCommand
+from analytics.rollups import refresh_pending
+
+
+class Command(BaseCommand):
+    help = "Fold attempts queued while ANALYTICS_DEFERRED is on into the rollup tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--interval', type=float,
+                            help="Keep running, draining the queue every INTERVAL seconds.")
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            applied = refresh_pending(options['batch_size'])
+            elapsed = max(time.monotonic() - started, 1e-9)
+            if applied or not options['interval']:
+                self.stdout.write(f"Applied {applied} attempts ({applied / elapsed:,.0f} attempts/s).")
+
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
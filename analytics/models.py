@@ -0,0 +1,86 @@
+from django.conf import settings
+from django.db import models
+from quizzes.models import Quiz, Question, Option
+from attempts.models import Attempt
+
+
+class QuizStats(models.Model):
+    """
+    Running totals for a quiz, maintained incrementally as attempts start
+    and are submitted.
+    """
+    quiz = models.OneToOneField(Quiz, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    attempts_started = models.PositiveIntegerField(default=0)
+    attempts_submitted = models.PositiveIntegerField(default=0)
+    total_score = models.BigIntegerField(default=0)
+
+
+class QuestionStats(models.Model):
+    """
+    Running answer counts for a question across submitted attempts.
+    """
+    question = models.OneToOneField(Question, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='question_stats')
+    answered_count = models.PositiveIntegerField(default=0)
+    correct_count = models.PositiveIntegerField(default=0)
+
+
+class OptionStats(models.Model):
+    """
+    Running selection count for an option across submitted attempts.
+    """
+    option = models.OneToOneField(Option, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='option_stats')
+    selected_count = models.PositiveIntegerField(default=0)
+
+
+class PendingAttempt(models.Model):
+    """
+    Submitted attempt waiting to be folded into the rollups when
+    ANALYTICS_DEFERRED is on.
+    """
+    attempt = models.OneToOneField(Attempt, on_delete=models.CASCADE, primary_key=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+
+class UserQuizProgress(models.Model):
+    """
+    A student's running summary for one quiz, maintained as their attempts
+    start and are submitted.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='quiz_progress')
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='user_progress')
+    attempts_started = models.PositiveIntegerField(default=0)
+    attempts_submitted = models.PositiveIntegerField(default=0)
+    best_score = models.IntegerField(null=True, blank=True)
+    answered_count = models.PositiveIntegerField(default=0)
+    correct_count = models.PositiveIntegerField(default=0)
+    last_attempt = models.ForeignKey(Attempt, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    last_started_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'quiz'], name='unique_progress_per_user_quiz'),
+        ]
+
+
+class PracticeMastery(models.Model):
+    """
+    A student's mastery of each question of a quiz in practice mode, as
+    last written back by the practice engine (see practice.py).
+
+    Fields:
+        - question_ids: Packed question ids (see attempts.models.pack_question_order).
+        - mastery: Packed little-endian float32 estimates, in [0, 1], of the
+          chance of answering each question in question_ids correctly.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='practice_mastery')
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='+')
+    question_ids = models.BinaryField(default=bytes)
+    mastery = models.BinaryField(default=bytes)
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'quiz'], name='unique_mastery_per_user_quiz'),
+        ]
@@ -0,0 +1,376 @@
+"""
+Adaptive practice: serve each student the questions of a quiz they are
+weakest on.
+
+A student's mastery of a quiz is a float array with one estimate per
+question of the chance they answer it correctly, and a quiz's difficulty
+is a float array of the share of correct answers to each question across
+everyone (from QuestionStats, as in the item analysis report). Both are
+aligned with the quiz snapshot's question order. Questions are drawn with
+probability proportional to question_weight() through a Fenwick tree of
+the weights, so a draw and the update after an answer each cost
+O(log questions) and no query.
+
+Sessions (a student's mastery and weight tree for one quiz) live in an
+in-process LRU; changed mastery is written to PracticeMastery in batches.
+Like LocalLeaderboard, each worker keeps its own sessions, so a student
+moving between workers picks up the mastery last written back.
+"""
+import random
+import struct
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from functools import lru_cache
+from django.conf import settings
+from django.db.models import Count, Q
+from django.http import Http404
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from attempts.grading import answer_credit, mcq_strategy, question_keys
+from attempts.models import AttemptAnswer, pack_question_order
+from quizzes.models import Quiz
+from quizzes.snapshots import get_snapshot
+from .models import PracticeMastery, QuestionStats
+
+# Weight kept by a fully mastered question, relative to an unknown one,
+# so mastered questions still come back now and then.
+MASTERED_WEIGHT = 0.05
+# How far one practice answer moves mastery towards the credit it earned.
+LEARNING_RATE = 0.3
+
+
+def question_weight(mastery, difficulty):
+    """
+    Draw weight of a question: mostly how far the student is from mastering
+    it, tilted towards questions few students get right.
+    """
+    return (MASTERED_WEIGHT + 1.0 - mastery) * (1.5 - difficulty)
+
+
+def smoothed_rate(answered, correct):
+    # Laplace smoothing: unanswered questions start at 0.5.
+    return (correct + 1) / (answered + 2)
+
+
+def pack_mastery(mastery):
+    return struct.pack(f'<{len(mastery)}f', *mastery)
+
+
+def unpack_mastery(data):
+    return struct.unpack(f'<{len(data) // 4}f', data)
+
+
+class WeightTree:
+    """
+    Fenwick tree over non-negative weights: point updates, the total and
+    weighted draws in O(log n).
+    """
+    __slots__ = ('size', 'tree', 'step')
+
+    def __init__(self, weights):
+        self.size = size = len(weights)
+        self.tree = tree = array('d', bytes(8 * (size + 1)))
+        for index, weight in enumerate(weights, 1):
+            tree[index] += weight
+            parent = index + (index & -index)
+            if parent <= size:
+                tree[parent] += tree[index]
+        self.step = 1 << (size.bit_length() - 1) if size else 0
+
+    def add(self, index, delta):
+        index += 1
+        tree = self.tree
+        while index <= self.size:
+            tree[index] += delta
+            index += index & -index
+
+    def total(self):
+        index = self.size
+        total = 0.0
+        while index:
+            total += self.tree[index]
+            index -= index & -index
+        return total
+
+    def find(self, target):
+        """
+        The first index whose running total of weights exceeds ``target``.
+        """
+        tree = self.tree
+        position = 0
+        step = self.step
+        while step:
+            following = position + step
+            if following <= self.size and tree[following] <= target:
+                position = following
+                target -= tree[following]
+            step >>= 1
+        return min(position, self.size - 1)
+
+    def draw(self, rng):
+        return self.find(rng.random() * self.total())
+
+
+class QuizDifficulty:
+    """
+    A quiz's questions in snapshot order with their difficulty.
+
+    Fields:
+        - snapshot: The QuizSnapshot the questions are served from.
+        - question_ids: Question ids in snapshot order.
+        - positions: Mapping of question id to its index in question_ids.
+        - difficulty: float32 array of smoothed shares of correct answers.
+        - loaded_at: time.monotonic() when it was read.
+    """
+    __slots__ = ('snapshot', 'question_ids', 'positions', 'difficulty', 'loaded_at')
+
+    def __init__(self, snapshot, question_ids, stats):
+        self.snapshot = snapshot
+        self.question_ids = tuple(question_ids)
+        self.positions = {question_id: index for index, question_id in enumerate(self.question_ids)}
+        self.difficulty = array('f', (
+            smoothed_rate(*stats.get(question_id, (0, 0))) for question_id in self.question_ids
+        ))
+        self.loaded_at = time.monotonic()
+
+    @classmethod
+    def load(cls, quiz_id):
+        """
+        Read the quiz's current snapshot and answer counts: a version lookup
+        and one QuestionStats query when the snapshot is cached.
+        """
+        try:
+            snapshot = get_snapshot(quiz_id)
+        except Quiz.DoesNotExist:
+            raise Http404
+        stats = {
+            question_id: (answered, correct)
+            for question_id, answered, correct in QuestionStats.objects.filter(quiz_id=quiz_id).values_list(
+                'question_id', 'answered_count', 'correct_count'
+            )
+        }
+        return cls(snapshot, snapshot.question_ids, stats)
+
+
+class PracticeSession:
+    """
+    One student's mastery of one quiz and the weight tree drawn from.
+    """
+    __slots__ = ('user_id', 'quiz_id', 'quiz', 'mastery', 'tree', 'last_question_id')
+
+    def __init__(self, user_id, quiz_id, quiz, mastery_by_question):
+        self.user_id = user_id
+        self.quiz_id = quiz_id
+        self.last_question_id = None
+        self.align(quiz, mastery_by_question)
+
+    def align(self, quiz, mastery_by_question):
+        self.quiz = quiz
+        self.mastery = array('f', (mastery_by_question.get(question_id, 0.5) for question_id in quiz.question_ids))
+        self.tree = WeightTree([
+            question_weight(mastery, difficulty) for mastery, difficulty in zip(self.mastery, quiz.difficulty)
+        ])
+
+    def realign(self, quiz):
+        """
+        Move to a newer QuizDifficulty, carrying mastery over by question id.
+        """
+        self.align(quiz, dict(zip(self.quiz.question_ids, self.mastery)))
+
+    def draw(self, rng):
+        """
+        Draw the next question id, avoiding the one just served when there
+        is another; None for a quiz without questions.
+        """
+        if not self.tree.size:
+            return None
+        for _ in range(3):
+            question_id = self.quiz.question_ids[self.tree.draw(rng)]
+            if question_id != self.last_question_id or self.tree.size == 1:
+                break
+        self.last_question_id = question_id
+        return question_id
+
+    def record(self, question_id, credit):
+        """
+        Move the question's mastery towards ``credit`` and return it.
+        """
+        index = self.quiz.positions[question_id]
+        old = self.mastery[index]
+        self.mastery[index] = old + LEARNING_RATE * (min(max(credit, 0.0), 1.0) - old)
+        difficulty = self.quiz.difficulty[index]
+        self.tree.add(index, question_weight(self.mastery[index], difficulty) - question_weight(old, difficulty))
+        return self.mastery[index]
+
+    def as_row(self):
+        return PracticeMastery(
+            user_id=self.user_id,
+            quiz_id=self.quiz_id,
+            question_ids=pack_question_order(self.quiz.question_ids),
+            mastery=pack_mastery(self.mastery),
+            updated_at=timezone.now(),
+        )
+
+
+def load_mastery(user_id, quiz_id):
+    """
+    ``{question_id: mastery}`` as last written back, or else estimated from
+    the student's graded attempt answers in one aggregate query.
+    """
+    row = PracticeMastery.objects.filter(user_id=user_id, quiz_id=quiz_id).only('question_ids', 'mastery').first()
+    if row is not None:
+        question_ids = struct.unpack(f'<{len(row.question_ids) // 8}q', row.question_ids)
+        return dict(zip(question_ids, unpack_mastery(row.mastery)))
+
+    history = (
+        AttemptAnswer.objects
+        .filter(attempt__user_id=user_id, attempt__quiz_id=quiz_id, is_correct__isnull=False)
+        .values('question_id')
+        .annotate(answered=Count('id'), correct=Count('id', filter=Q(is_correct=True)))
+        .values_list('question_id', 'answered', 'correct')
+    )
+    return {question_id: smoothed_rate(answered, correct) for question_id, answered, correct in history}
+
+
+class PracticeEngine:
+    """
+    Sessions and quiz difficulty held in this process.
+
+    max_sessions: Sessions kept in the LRU; changed ones are written back
+        before being evicted.
+    flush_size / flush_interval: Changed sessions are written back once
+        this many are waiting or this many seconds have passed.
+    difficulty_ttl: Seconds a quiz's difficulty (and snapshot) is reused
+        before being read again.
+    """
+    def __init__(self, max_sessions=10000, flush_size=200, flush_interval=30.0, difficulty_ttl=300.0):
+        self.max_sessions = max_sessions
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.difficulty_ttl = difficulty_ttl
+        self.sessions = OrderedDict()
+        self.quizzes = {}
+        self.dirty = {}
+        self.last_flush = time.monotonic()
+        self.rng = random.Random()
+        self.lock = threading.Lock()
+
+    def quiz(self, quiz_id):
+        with self.lock:
+            quiz = self.quizzes.get(quiz_id)
+        if quiz is None or time.monotonic() - quiz.loaded_at > self.difficulty_ttl:
+            # Loaded outside the lock; a fresher copy another thread
+            # stored meanwhile is kept.
+            loaded = QuizDifficulty.load(quiz_id)
+            with self.lock:
+                quiz = self.quizzes.get(quiz_id)
+                if quiz is None or quiz.loaded_at < loaded.loaded_at:
+                    quiz = self.quizzes[quiz_id] = loaded
+        return quiz
+
+    def session(self, user_id, quiz_id):
+        quiz = self.quiz(quiz_id)
+        key = (user_id, quiz_id)
+        with self.lock:
+            session = self.sessions.get(key)
+            if session is not None:
+                self.sessions.move_to_end(key)
+
+        if session is None:
+            session = PracticeSession(user_id, quiz_id, quiz, load_mastery(user_id, quiz_id))
+            evicted = {}
+            with self.lock:
+                session = self.sessions.setdefault(key, session)
+                while len(self.sessions) > self.max_sessions:
+                    old_key, _ = self.sessions.popitem(last=False)
+                    if old_key in self.dirty:
+                        evicted[old_key] = self.dirty.pop(old_key)
+                rows = [evicted_session.as_row() for evicted_session in evicted.values()]
+            self.write(rows, evicted)
+        elif session.quiz is not quiz:
+            with self.lock:
+                session.realign(quiz)
+        return session
+
+    def next_question(self, user_id, quiz_id):
+        """
+        Draw the student's next practice question: a snapshot question, or
+        None for a quiz without questions.
+        """
+        session = self.session(user_id, quiz_id)
+        with self.lock:
+            question_id = session.draw(self.rng)
+        return None if question_id is None else session.quiz.snapshot.questions[question_id]
+
+    def answer(self, user_id, quiz_id, question_id, option_ids):
+        """
+        Grade a practice answer and update the student's mastery.
+
+        Returns ``(credit, mastery)``.
+        """
+        session = self.session(user_id, quiz_id)
+        snapshot = session.quiz.snapshot
+        if question_id not in session.quiz.positions or not all(
+            snapshot.has_option(question_id, option_id) for option_id in option_ids
+        ):
+            raise Http404
+        key = question_keys(snapshot)[question_id]
+        if len(option_ids) > 1 and not key.multi_select:
+            raise ValidationError({'answer_ids': ['Only MCQ questions accept several options.']})
+
+        credit = round(answer_credit(key, option_ids, mcq_strategy()), 4)
+        with self.lock:
+            mastery = session.record(question_id, credit)
+            self.dirty[user_id, quiz_id] = session
+            due = (
+                len(self.dirty) >= self.flush_size
+                or time.monotonic() - self.last_flush >= self.flush_interval
+            )
+        if due:
+            self.flush()
+        return credit, round(mastery, 4)
+
+    def flush(self):
+        """
+        Write every changed session back to PracticeMastery. Returns the
+        number written.
+        """
+        with self.lock:
+            dirty, self.dirty = self.dirty, {}
+            rows = [session.as_row() for session in dirty.values()]
+            self.last_flush = time.monotonic()
+        self.write(rows, dirty)
+        return len(rows)
+
+    def write(self, rows, sessions):
+        """
+        Upsert ``rows``, the rows of ``sessions``. If that fails the
+        sessions are marked dirty again, so the next flush retries them.
+        """
+        if not rows:
+            return
+        try:
+            PracticeMastery.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=['user', 'quiz'],
+                update_fields=['question_ids', 'mastery', 'updated_at'],
+                batch_size=500,
+            )
+        except Exception:
+            with self.lock:
+                for key, session in sessions.items():
+                    self.dirty.setdefault(key, session)
+            raise
+
+
+@lru_cache(maxsize=None)
+def practice_engine():
+    return PracticeEngine(
+        max_sessions=getattr(settings, 'PRACTICE_SESSION_CACHE_SIZE', 10000),
+        flush_size=getattr(settings, 'PRACTICE_FLUSH_SIZE', 200),
+        flush_interval=getattr(settings, 'PRACTICE_FLUSH_INTERVAL', 30.0),
+        difficulty_ttl=getattr(settings, 'PRACTICE_DIFFICULTY_TTL', 300.0),
+    )
@@ -0,0 +1,163 @@
+from django.db import transaction
+from django.db.models import Count, F, Max, Q, Value
+from django.db.models.functions import Coalesce, Greatest
+from attempts.models import Attempt, AttemptAnswer
+from .models import UserQuizProgress
+
+
+def record_started(attempt):
+    """
+    Count a new attempt on the user's progress row, creating the row the
+    first time they start the quiz.
+    """
+    UserQuizProgress.objects.bulk_create(
+        [UserQuizProgress(user_id=attempt.user_id, quiz_id=attempt.quiz_id)],
+        ignore_conflicts=True
+    )
+    UserQuizProgress.objects.filter(user_id=attempt.user_id, quiz_id=attempt.quiz_id).update(
+        attempts_started=F('attempts_started') + 1,
+        last_attempt_id=attempt.id,
+        last_started_at=attempt.started_at
+    )
+
+
+def record_submission(attempt, answers):
+    """
+    Fold a submitted attempt into the user's progress row in one UPDATE.
+
+    Attempts started before progress was tracked have no row yet; those
+    are recomputed from the Attempt table instead.
+    """
+    score = attempt.score or 0
+    updated = UserQuizProgress.objects.filter(user_id=attempt.user_id, quiz_id=attempt.quiz_id).update(
+        attempts_submitted=F('attempts_submitted') + 1,
+        answered_count=F('answered_count') + len(answers),
+        correct_count=F('correct_count') + sum(1 for answer in answers if answer.is_correct),
+        best_score=Greatest(Coalesce('best_score', Value(score)), Value(score))
+    )
+    if not updated:
+        refresh_progress([attempt.user_id], [attempt.quiz_id])
+
+
+def progress_rows(attempts):
+    """
+    Build UserQuizProgress rows for every (user, quiz) pair in ``attempts``
+    with two grouped queries.
+    """
+    answers = {
+        (row['attempt__user_id'], row['attempt__quiz_id']): row
+        for row in AttemptAnswer.objects
+        .filter(attempt__in=attempts.filter(status='submitted'))
+        .order_by()
+        .values('attempt__user_id', 'attempt__quiz_id')
+        .annotate(answered=Count('id'), correct=Count('id', filter=Q(is_correct=True)))
+    }
+
+    rows = []
+    for row in (
+        attempts.order_by()
+        .values('user_id', 'quiz_id')
+        .annotate(
+            started=Count('id'),
+            submitted=Count('id', filter=Q(status='submitted')),
+            best_score=Max('score', filter=Q(status='submitted')),
+            last_attempt_id=Max('id'),
+            last_started_at=Max('started_at'),
+        )
+    ):
+        answered = answers.get((row['user_id'], row['quiz_id']), {})
+        rows.append(UserQuizProgress(
+            user_id=row['user_id'],
+            quiz_id=row['quiz_id'],
+            attempts_started=row['started'],
+            attempts_submitted=row['submitted'],
+            best_score=row['best_score'],
+            answered_count=answered.get('answered', 0),
+            correct_count=answered.get('correct', 0),
+            last_attempt_id=row['last_attempt_id'],
+            last_started_at=row['last_started_at'],
+        ))
+    return rows
+
+
+def refresh_progress(user_ids, quiz_ids=None):
+    """
+    Recompute the progress rows of ``user_ids`` (optionally limited to
+    ``quiz_ids``) from their attempts, replacing whatever was stored.
+    """
+    attempts = Attempt.objects.filter(user_id__in=user_ids)
+    existing = UserQuizProgress.objects.filter(user_id__in=user_ids)
+    if quiz_ids is not None:
+        attempts = attempts.filter(quiz_id__in=quiz_ids)
+        existing = existing.filter(quiz_id__in=quiz_ids)
+
+    with transaction.atomic():
+        existing.delete()
+        UserQuizProgress.objects.bulk_create(progress_rows(attempts))
+
+
+def rebuild_progress(chunk_size=1000):
+    """
+    Recompute every progress row from the Attempt table, ``chunk_size``
+    users at a time in user id order.
+
+    Yields the number of users refreshed after each chunk.
+    """
+    UserQuizProgress.objects.all().delete()
+
+    refreshed = 0
+    last_id = 0
+    while True:
+        user_ids = list(
+            Attempt.objects.filter(user_id__gt=last_id)
+            .order_by('user_id')
+            .values_list('user_id', flat=True)
+            .distinct()[:chunk_size]
+        )
+        if not user_ids:
+            return
+        last_id = user_ids[-1]
+
+        refresh_progress(user_ids)
+        refreshed += len(user_ids)
+        yield refreshed
+
+
+def user_progress(user):
+    """
+    A user's per-quiz summary and overall accuracy, read from their
+    progress rows in one query.
+    """
+    rows = list(
+        UserQuizProgress.objects
+        .filter(user=user)
+        .select_related('quiz')
+        .only(
+            'quiz_id', 'quiz__quiz_name', 'attempts_started', 'attempts_submitted', 'best_score',
+            'answered_count', 'correct_count', 'last_attempt_id', 'last_started_at'
+        )
+        .order_by('-last_started_at', 'quiz_id')
+    )
+
+    answered = sum(row.answered_count for row in rows)
+    correct = sum(row.correct_count for row in rows)
+    return {
+        'quizzes_attempted': len(rows),
+        'attempts_submitted': sum(row.attempts_submitted for row in rows),
+        'answered': answered,
+        'correct': correct,
+        'accuracy': round(correct / answered, 4) if answered else None,
+        'quizzes': [
+            {
+                'quiz_id': row.quiz_id,
+                'quiz_name': row.quiz.quiz_name,
+                'attempts_started': row.attempts_started,
+                'attempts_submitted': row.attempts_submitted,
+                'best_score': row.best_score,
+                'accuracy': round(row.correct_count / row.answered_count, 4) if row.answered_count else None,
+                'last_attempt_id': row.last_attempt_id,
+                'last_started_at': row.last_started_at,
+            }
+            for row in rows
+        ],
+    }
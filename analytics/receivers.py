@@ -0,0 +1,81 @@
+from django.db import transaction
+from django.dispatch import receiver
+from attempts.models import Attempt
+from attempts.signals import attempt_started, attempt_submitted, attempts_regraded
+from .leaderboards import leaderboard_backend
+from .models import PendingAttempt, UserQuizProgress
+from .progress import record_started, record_submission, refresh_progress
+from .rollups import RollupDelta, is_deferred
+
+
+@receiver(attempt_started, sender=Attempt)
+def count_started_attempt(sender, attempt, **kwargs):
+    delta = RollupDelta()
+    delta.add_started(attempt.quiz_id)
+    delta.apply()
+    record_started(attempt)
+
+
+@receiver(attempt_submitted, sender=Attempt)
+def count_submitted_attempt(sender, attempt, answers, snapshot, **kwargs):
+    # Progress is what the student sees next, so it is never deferred.
+    record_submission(attempt, answers)
+
+    if is_deferred():
+        PendingAttempt.objects.create(attempt_id=attempt.id)
+        return
+
+    delta = RollupDelta()
+    delta.add_submission(snapshot, attempt.score, answers)
+    delta.apply()
+
+
+@receiver(attempts_regraded, sender=Attempt)
+def apply_regrade(sender, answer_changes, score_changes, **kwargs):
+    # Attempts still queued are counted with their new grades when the
+    # queue is drained, so only already-counted attempts are adjusted here.
+    attempt_ids = {change[0] for change in answer_changes} | {change[0] for change in score_changes}
+    pending = set(
+        PendingAttempt.objects.filter(attempt_id__in=attempt_ids).values_list('attempt_id', flat=True)
+    )
+
+    delta = RollupDelta()
+    for attempt_id, quiz_id, question_id, was_correct, is_correct in answer_changes:
+        if attempt_id not in pending:
+            delta.add_correct(quiz_id, question_id, int(is_correct) - int(was_correct))
+    for attempt_id, quiz_id, old_score, new_score in score_changes:
+        if attempt_id not in pending:
+            delta.add_score(quiz_id, new_score - old_score)
+    delta.apply()
+
+    # Best scores can go down, so affected progress rows are recomputed.
+    if answer_changes or score_changes:
+        pairs = list(Attempt.objects.filter(id__in=attempt_ids).values_list('user_id', 'quiz_id').distinct())
+        user_ids = {user_id for user_id, _ in pairs}
+        quiz_ids = {quiz_id for _, quiz_id in pairs}
+        refresh_progress(user_ids, quiz_ids)
+        bests = list(
+            UserQuizProgress.objects.filter(user_id__in=user_ids, quiz_id__in=quiz_ids)
+            .values_list('quiz_id', 'user_id', 'best_score')
+        )
+        transaction.on_commit(lambda: set_leaderboard_bests(bests))
+
+
+@receiver(attempt_submitted, sender=Attempt)
+def update_leaderboards(sender, attempt, **kwargs):
+    # Boards live outside the database, so they only change once the
+    # submission commits. A backend not loaded yet picks the attempt up
+    # when it is first read.
+    def record():
+        backend = leaderboard_backend()
+        if backend.is_loaded():
+            backend.record_best(attempt.quiz_id, attempt.user_id, attempt.score or 0)
+
+    transaction.on_commit(record)
+
+
+def set_leaderboard_bests(bests):
+    backend = leaderboard_backend()
+    if backend.is_loaded():
+        for quiz_id, user_id, best_score in bests:
+            backend.set_best(quiz_id, user_id, best_score)
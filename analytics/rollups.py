@@ -0,0 +1,236 @@
+from collections import defaultdict
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, F, Value, When
+from attempts.models import Attempt, AttemptAnswer
+from quizzes.snapshots import get_snapshot
+from .models import QuizStats, QuestionStats, OptionStats, PendingAttempt
+
+# Keys updated per UPDATE ... CASE statement.
+INCREMENT_BATCH_SIZE = 500
+
+
+def is_deferred():
+    return getattr(settings, 'ANALYTICS_DEFERRED', False)
+
+
+def increment(model, key, deltas, defaults):
+    """
+    Add ``deltas[row_key][field]`` to each row of ``model``, creating
+    missing rows from ``defaults[row_key]`` first.
+
+    Costs one INSERT and one UPDATE per INCREMENT_BATCH_SIZE keys, however
+    many fields and keys change.
+    """
+    keys = list(deltas)
+    for start in range(0, len(keys), INCREMENT_BATCH_SIZE):
+        batch = keys[start:start + INCREMENT_BATCH_SIZE]
+        model.objects.bulk_create(
+            [model(**{key: row_key}, **defaults.get(row_key, {})) for row_key in batch],
+            ignore_conflicts=True
+        )
+
+        fields = {field for row_key in batch for field, delta in deltas[row_key].items() if delta}
+        updates = {
+            field: F(field) + Case(
+                *[
+                    When(**{key: row_key}, then=Value(deltas[row_key][field]))
+                    for row_key in batch if deltas[row_key].get(field)
+                ],
+                default=Value(0)
+            )
+            for field in fields
+        }
+        if updates:
+            model.objects.filter(**{f'{key}__in': batch}).update(**updates)
+
+
+class RollupDelta:
+    """
+    Accumulates changes to the rollup tables in memory so any number of
+    attempts can be applied with a fixed number of statements.
+    """
+    def __init__(self):
+        self.quizzes = defaultdict(lambda: defaultdict(int))
+        self.questions = defaultdict(lambda: defaultdict(int))
+        self.options = defaultdict(lambda: defaultdict(int))
+        self.question_quiz = {}
+        self.option_quiz = {}
+
+    def add_started(self, quiz_id, count=1):
+        self.quizzes[quiz_id]['attempts_started'] += count
+
+    def add_submission(self, snapshot, score, answers):
+        """
+        Count one submitted attempt. Options no longer in the quiz (replaced
+        since the answer was given) are left out of the selection counts.
+        """
+        quiz = self.quizzes[snapshot.quiz_id]
+        quiz['attempts_submitted'] += 1
+        quiz['total_score'] += score or 0
+
+        for answer in answers:
+            if answer.question_id not in snapshot.questions:
+                continue
+            question = self.questions[answer.question_id]
+            question['answered_count'] += 1
+            question['correct_count'] += bool(answer.is_correct)
+            self.question_quiz[answer.question_id] = snapshot.quiz_id
+
+            for option_id in answer.selected_option_ids:
+                if snapshot.option_questions.get(option_id) == answer.question_id:
+                    self.options[option_id]['selected_count'] += 1
+                    self.option_quiz[option_id] = snapshot.quiz_id
+
+    def add_correct(self, quiz_id, question_id, delta):
+        self.questions[question_id]['correct_count'] += delta
+        self.question_quiz[question_id] = quiz_id
+
+    def add_score(self, quiz_id, delta):
+        self.quizzes[quiz_id]['total_score'] += delta
+
+    def apply(self):
+        increment(QuizStats, 'quiz_id', self.quizzes, {})
+        increment(
+            QuestionStats, 'question_id', self.questions,
+            {question_id: {'quiz_id': quiz_id} for question_id, quiz_id in self.question_quiz.items()}
+        )
+        increment(
+            OptionStats, 'option_id', self.options,
+            {option_id: {'quiz_id': quiz_id} for option_id, quiz_id in self.option_quiz.items()}
+        )
+
+
+def load_submissions(attempts, delta):
+    """
+    Add ``attempts`` (with id, quiz_id and score loaded) to ``delta``,
+    reading all of their answers in one query.
+    """
+    answers_by_attempt = defaultdict(list)
+    for answer in AttemptAnswer.objects.filter(
+        attempt_id__in=[attempt.id for attempt in attempts]
+    ).only('attempt_id', 'question_id', 'option_id', 'option_ids', 'is_correct'):
+        answers_by_attempt[answer.attempt_id].append(answer)
+
+    snapshots = {}
+    for attempt in attempts:
+        if attempt.quiz_id not in snapshots:
+            snapshots[attempt.quiz_id] = get_snapshot(attempt.quiz_id)
+        delta.add_submission(snapshots[attempt.quiz_id], attempt.score, answers_by_attempt[attempt.id])
+
+
+def refresh_pending(batch_size=1000):
+    """
+    Fold queued attempts into the rollups, one transaction per batch.
+
+    Returns the number of attempts applied.
+    """
+    applied = 0
+    while True:
+        with transaction.atomic():
+            attempt_ids = list(
+                PendingAttempt.objects
+                .select_for_update(skip_locked=True)
+                .order_by('created_at', 'attempt_id')
+                .values_list('attempt_id', flat=True)[:batch_size]
+            )
+            if not attempt_ids:
+                return applied
+
+            delta = RollupDelta()
+            load_submissions(list(Attempt.objects.filter(id__in=attempt_ids).only('id', 'quiz_id', 'score')), delta)
+            delta.apply()
+            PendingAttempt.objects.filter(attempt_id__in=attempt_ids).delete()
+
+        applied += len(attempt_ids)
+
+
+def rebuild(chunk_size=1000):
+    """
+    Recompute every rollup from the Attempt and AttemptAnswer tables.
+
+    Submitted attempts are read in keyset-paginated chunks, each applied in
+    its own transaction. Run while submissions are paused: attempts
+    submitted during the rebuild may be counted twice.
+
+    Yields the number of attempts applied after each chunk.
+    """
+    with transaction.atomic():
+        OptionStats.objects.all().delete()
+        QuestionStats.objects.all().delete()
+        QuizStats.objects.all().delete()
+        PendingAttempt.objects.all().delete()
+
+        delta = RollupDelta()
+        for quiz_id, started in Attempt.objects.order_by().values_list('quiz_id').annotate(total=Count('id')):
+            delta.add_started(quiz_id, started)
+        delta.apply()
+
+    applied = 0
+    last_id = 0
+    while True:
+        chunk = list(
+            Attempt.objects.filter(status='submitted', id__gt=last_id)
+            .order_by('id')
+            .only('id', 'quiz_id', 'score')[:chunk_size]
+        )
+        if not chunk:
+            return
+        last_id = chunk[-1].id
+
+        with transaction.atomic():
+            delta = RollupDelta()
+            load_submissions(chunk, delta)
+            delta.apply()
+
+        applied += len(chunk)
+        yield applied
+
+
+def quiz_report(quiz_id):
+    """
+    Item analysis for a quiz read from the rollups, in three queries plus
+    the cached snapshot, independent of the number of attempts.
+    """
+    snapshot = get_snapshot(quiz_id)
+    stats = QuizStats.objects.filter(quiz_id=quiz_id).first() or QuizStats(quiz_id=quiz_id)
+    question_stats = {
+        row[0]: row[1:]
+        for row in QuestionStats.objects.filter(quiz_id=quiz_id).values_list(
+            'question_id', 'answered_count', 'correct_count'
+        )
+    }
+    option_stats = dict(
+        OptionStats.objects.filter(quiz_id=quiz_id).values_list('option_id', 'selected_count')
+    )
+
+    def rate(part, whole):
+        return round(part / whole, 4) if whole else None
+
+    questions = []
+    for question_id in snapshot.question_ids:
+        answered, correct = question_stats.get(question_id, (0, 0))
+        questions.append({
+            'question_id': question_id,
+            'answered': answered,
+            'correct': correct,
+            'difficulty': rate(correct, answered),
+            'options': [
+                {
+                    'option_id': option['id'],
+                    'is_correct': option['is_correct'],
+                    'selected': option_stats.get(option['id'], 0),
+                    'selection_rate': rate(option_stats.get(option['id'], 0), answered),
+                }
+                for option in snapshot.questions[question_id]['options']
+            ],
+        })
+
+    return {
+        'quiz_id': quiz_id,
+        'attempts_started': stats.attempts_started,
+        'attempts_submitted': stats.attempts_submitted,
+        'completion_rate': rate(stats.attempts_submitted, stats.attempts_started),
+        'average_score': rate(stats.total_score, stats.attempts_submitted),
+        'questions': questions,
+    }
@@ -0,0 +1,5 @@
+from rest_framework import serializers
+
+
+class LeaderboardParamsSerializer(serializers.Serializer):
+    limit = serializers.IntegerField(default=10, min_value=1, max_value=100)
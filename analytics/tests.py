@@ -0,0 +1,352 @@
+import random
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from quizzes.models import Quiz, Question, Option
+from quizzes.snapshots import snapshot_cache
+from attempts.scoring import regrade_attempts
+from .models import QuizStats, QuestionStats, OptionStats, PendingAttempt, PracticeMastery, UserQuizProgress
+from .leaderboards import RankedBoard, leaderboard_backend
+from .practice import WeightTree, practice_engine, unpack_mastery
+from .progress import rebuild_progress
+from .rollups import rebuild, refresh_pending
+
+
+class AnalyticsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        snapshot_cache.clear()
+        self.client = APIClient()
+        self.quiz = Quiz.objects.create(quiz_name='Clinical chemistry')
+        self.options = []
+        for number in range(2):
+            question = Question.objects.create(
+                quiz=self.quiz, question_type='OBJ', question_text=f'Question {number}'
+            )
+            self.options.append((
+                Option.objects.create(question=question, option_text='Right', is_correct=True),
+                Option.objects.create(question=question, option_text='Wrong'),
+            ))
+
+    def take_quiz(self, username, choices, submit=True):
+        user_model = get_user_model()
+        user = user_model.objects.filter(username=username).first() or user_model.objects.create_user(
+            username=username, email=f'{username}@example.com'
+        )
+        self.client.force_authenticate(user)
+        response = self.client.post(reverse('start-attempt'), {'quiz_id': self.quiz.id}, format='json')
+        attempt_id = response.json()['attempt_id']
+
+        for (right, wrong), choice in zip(self.options, choices):
+            option = right if choice else wrong
+            self.client.put(
+                reverse('attempt-answer', args=[attempt_id, option.question_id]),
+                {'answer_id': option.id},
+                format='json'
+            )
+        if submit:
+            self.client.post(reverse('attempt-submit', args=[attempt_id]))
+
+
+class QuizAnalyticsTests(AnalyticsTestCase):
+    def report(self):
+        return self.client.get(reverse('quiz-analytics', args=[self.quiz.id])).data
+
+    def test_submissions_update_rollups(self):
+        self.take_quiz('ada', [True, True])
+        self.take_quiz('bola', [True, False])
+        self.take_quiz('chidi', [False, False], submit=False)
+
+        report = self.report()
+
+        self.assertEqual(report['attempts_started'], 3)
+        self.assertEqual(report['attempts_submitted'], 2)
+        self.assertEqual(report['completion_rate'], 0.6667)
+        self.assertEqual(report['average_score'], 1.5)
+        first, second = report['questions']
+        self.assertEqual(first['difficulty'], 1.0)
+        self.assertEqual(second['difficulty'], 0.5)
+        self.assertEqual([option['selection_rate'] for option in second['options']], [0.5, 0.5])
+
+    def test_report_query_count_does_not_depend_on_attempts(self):
+        for number in range(5):
+            self.take_quiz(f'student{number}', [True, False])
+
+        # Quiz check, version lookup and the three rollup tables.
+        with self.assertNumQueries(5):
+            self.report()
+
+    @override_settings(ANALYTICS_DEFERRED=True)
+    def test_deferred_mode_queues_until_refresh(self):
+        self.take_quiz('ada', [True, True])
+
+        self.assertEqual(PendingAttempt.objects.count(), 1)
+        self.assertEqual(self.report()['attempts_submitted'], 0)
+
+        self.assertEqual(refresh_pending(), 1)
+        self.assertEqual(self.report()['attempts_submitted'], 1)
+        self.assertFalse(PendingAttempt.objects.exists())
+
+    def test_rebuild_matches_incremental_rollups(self):
+        self.take_quiz('ada', [True, True])
+        self.take_quiz('bola', [False, True])
+        before = self.report()
+
+        list(rebuild(chunk_size=1))
+
+        self.assertEqual(self.report(), before)
+        self.assertEqual(QuizStats.objects.count(), 1)
+        self.assertEqual(QuestionStats.objects.count(), 2)
+        self.assertEqual(OptionStats.objects.count(), 3)
+
+
+class ProgressTests(AnalyticsTestCase):
+    def progress(self, username):
+        self.client.force_authenticate(get_user_model().objects.get(username=username))
+        return self.client.get(reverse('my-progress')).data
+
+    def test_progress_tracks_best_score_and_accuracy(self):
+        self.take_quiz('ada', [True, False])
+        self.take_quiz('ada', [True, True])
+        self.take_quiz('ada', [False, False], submit=False)
+        self.take_quiz('bola', [False, False])
+
+        progress = self.progress('ada')
+
+        self.assertEqual(progress['quizzes_attempted'], 1)
+        self.assertEqual(progress['accuracy'], 0.75)
+        quiz = progress['quizzes'][0]
+        self.assertEqual(quiz['attempts_started'], 3)
+        self.assertEqual(quiz['attempts_submitted'], 2)
+        self.assertEqual(quiz['best_score'], 2)
+        self.assertEqual(quiz['last_attempt_id'], UserQuizProgress.objects.get(user__username='ada').last_attempt_id)
+
+    def test_progress_requires_a_login(self):
+        self.assertEqual(self.client.get(reverse('my-progress')).status_code, 401)
+
+    def test_progress_is_one_query(self):
+        self.take_quiz('ada', [True, False])
+        user = get_user_model().objects.get(username='ada')
+
+        with self.assertNumQueries(1):
+            self.client.force_authenticate(user)
+            self.client.get(reverse('my-progress'))
+
+    def test_regrade_recomputes_best_score(self):
+        self.take_quiz('ada', [True, True])
+        right, wrong = self.options[1]
+        Option.objects.filter(id=right.id).update(is_correct=False)
+        Option.objects.filter(id=wrong.id).update(is_correct=True)
+        self.quiz.bump_content_version()
+
+        list(regrade_attempts(quiz_ids=[self.quiz.id]))
+
+        quiz = self.progress('ada')['quizzes'][0]
+        self.assertEqual(quiz['best_score'], 1)
+        self.assertEqual(quiz['accuracy'], 0.5)
+
+    def test_rebuild_matches_incremental_progress(self):
+        self.take_quiz('ada', [True, False])
+        self.take_quiz('ada', [True, True], submit=False)
+        self.take_quiz('bola', [False, True])
+        before = [self.progress('ada'), self.progress('bola')]
+
+        list(rebuild_progress(chunk_size=1))
+
+        self.assertEqual([self.progress('ada'), self.progress('bola')], before)
+
+
+class LeaderboardTests(AnalyticsTestCase):
+    def setUp(self):
+        super().setUp()
+        leaderboard_backend.cache_clear()
+
+    def board(self, username=None, quiz=True, **params):
+        if username:
+            self.client.force_authenticate(get_user_model().objects.get(username=username))
+        url = reverse('quiz-leaderboard', args=[self.quiz.id]) if quiz else reverse('global-leaderboard')
+        return self.client.get(url, params).data
+
+    def test_ranks_best_score_per_user(self):
+        self.take_quiz('ada', [True, False])
+        self.take_quiz('bola', [True, True])
+        self.take_quiz('chidi', [True, False])
+        self.board()
+
+        # Later submissions update the loaded boards in place.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.take_quiz('ada', [False, False])
+            self.take_quiz('chidi', [True, True])
+
+        board = self.board('ada')
+        self.assertEqual(
+            [(entry['username'], entry['rank'], entry['score']) for entry in board['top']],
+            [('bola', 1, 2), ('chidi', 1, 2), ('ada', 3, 1)]
+        )
+        self.assertEqual(board['me'], {'rank': 3, 'score': 1})
+
+    def test_global_board_sums_quiz_bests(self):
+        self.board(quiz=False)
+        other = Quiz.objects.create(quiz_name='Haematology')
+        question = Question.objects.create(quiz=other, question_type='OBJ', question_text='Other question')
+        right = Option.objects.create(question=question, option_text='Right', is_correct=True)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.take_quiz('ada', [True, False])
+            self.take_quiz('bola', [True, True])
+            self.quiz = other
+            self.options = [(right, right)]
+            self.take_quiz('ada', [True])
+
+        board = self.board('bola', quiz=False, limit=1)
+        self.assertEqual([(entry['username'], entry['score']) for entry in board['top']], [('ada', 2)])
+        self.assertEqual(board['me'], {'rank': 1, 'score': 2})
+
+    def test_regrade_can_lower_a_best_score(self):
+        self.take_quiz('ada', [True, True])
+        self.board()
+        right, wrong = self.options[1]
+        Option.objects.filter(id=right.id).update(is_correct=False)
+        Option.objects.filter(id=wrong.id).update(is_correct=True)
+        self.quiz.bump_content_version()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            list(regrade_attempts(quiz_ids=[self.quiz.id]))
+
+        self.assertEqual(self.board('ada')['me'], {'rank': 1, 'score': 1})
+        self.assertEqual(self.board(quiz=False)['me'], {'rank': 1, 'score': 1})
+
+    def test_ranked_board_ranks_ties_together(self):
+        board = RankedBoard()
+        for user_id, score in [(1, 5), (2, 9), (3, 5), (4, 1)]:
+            board.set(user_id, score)
+        board.set(4, 7)
+
+        self.assertEqual(board.top(2), [(2, 9), (4, 7)])
+        self.assertEqual([board.rank(user_id) for user_id in (1, 3, 4)], [(3, 5), (3, 5), (2, 7)])
+        self.assertIsNone(board.rank(5))
+
+    def test_ranked_board_matches_a_sorted_list(self):
+        rng = random.Random(0)
+        board = RankedBoard()
+        scores = {}
+        for _ in range(2000):
+            user_id = rng.randrange(300)
+            # Scores past the tree's initial size make it grow.
+            score = None if rng.random() < 0.1 else rng.randrange(500)
+            board.set(user_id, score)
+            if score is None:
+                scores.pop(user_id, None)
+            else:
+                scores[user_id] = score
+
+        expected = sorted(scores.items(), key=lambda entry: (-entry[1], entry[0]))
+        self.assertEqual(board.top(50), expected[:50])
+        for user_id, score in scores.items():
+            self.assertEqual(board.rank(user_id), (sum(other > score for other in scores.values()) + 1, score))
+
+
+class PracticeTests(AnalyticsTestCase):
+    def setUp(self):
+        super().setUp()
+        practice_engine.cache_clear()
+        self.user = get_user_model().objects.create_user(username='ada', email='ada@example.com')
+
+    def practice(self):
+        self.client.force_authenticate(self.user)
+        return self.client.get(reverse('practice-next', args=[self.quiz.id]))
+
+    def answer(self, option):
+        self.client.force_authenticate(self.user)
+        return self.client.put(
+            reverse('practice-answer', args=[self.quiz.id, option.question_id]), {'answer_id': option.id}, format='json'
+        )
+
+    def test_weight_tree_draws_by_weight(self):
+        tree = WeightTree([1.0, 0.0, 3.0, 0.0, 2.0])
+
+        self.assertEqual(tree.total(), 6.0)
+        self.assertEqual([tree.find(target) for target in (0.0, 0.99, 1.0, 3.99, 4.0, 5.99)], [0, 0, 2, 2, 4, 4])
+        tree.add(2, -3.0)
+        tree.add(1, 1.0)
+        self.assertEqual([tree.find(target) for target in (0.5, 1.5, 2.5)], [0, 1, 4])
+
+    def test_mastery_starts_from_attempt_history(self):
+        # Ada knows the first question and misses the second.
+        self.take_quiz('ada', [True, False])
+        self.take_quiz('ada', [True, False])
+        engine = practice_engine()
+        engine.rng = random.Random(0)
+
+        session = engine.session(self.user.id, self.quiz.id)
+
+        self.assertAlmostEqual(session.mastery[0], 0.75)
+        self.assertAlmostEqual(session.mastery[1], 0.25)
+        drawn = [engine.next_question(self.user.id, self.quiz.id)['id'] for _ in range(200)]
+        self.assertGreater(drawn.count(self.options[1][0].question_id), drawn.count(self.options[0][0].question_id))
+
+    def test_draws_after_the_first_cost_no_queries(self):
+        self.assertEqual(self.practice().status_code, 200)
+
+        with self.assertNumQueries(0):
+            response = self.practice()
+
+        self.assertIn(response.data['id'], [right.question_id for right, _ in self.options])
+        self.assertNotIn('is_correct', response.data['options'][0])
+
+    @override_settings(PRACTICE_FLUSH_SIZE=2)
+    def test_answers_update_mastery_and_are_written_in_batches(self):
+        right, wrong = self.options[0]
+        response = self.answer(wrong)
+
+        self.assertEqual(response.data['credit'], 0.0)
+        self.assertAlmostEqual(response.data['mastery'], 0.35)
+        self.assertIsNotNone(response.data['next_question'])
+        self.assertFalse(PracticeMastery.objects.exists())
+
+        other = get_user_model().objects.create_user(username='bola', email='bola@example.com')
+        self.client.force_authenticate(other)
+        self.client.put(
+            reverse('practice-answer', args=[self.quiz.id, right.question_id]), {'answer_id': right.id}, format='json'
+        )
+
+        self.assertEqual(PracticeMastery.objects.count(), 2)
+        row = PracticeMastery.objects.get(user=self.user)
+        self.assertAlmostEqual(unpack_mastery(row.mastery)[0], 0.35, places=5)
+
+        # A fresh process picks the written mastery back up.
+        practice_engine.cache_clear()
+        self.assertAlmostEqual(practice_engine().session(self.user.id, self.quiz.id).mastery[0], 0.35, places=5)
+
+    def test_practice_requires_a_login(self):
+        self.assertEqual(self.client.get(reverse('practice-next', args=[self.quiz.id])).status_code, 401)
+
+    def test_failed_writes_are_retried(self):
+        right, _ = self.options[0]
+        engine = practice_engine()
+        engine.answer(self.user.id, self.quiz.id, right.question_id, [right.id])
+        # A row the upsert rejects fails the whole batch.
+        engine.answer(None, self.quiz.id, right.question_id, [right.id])
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            engine.flush()
+
+        self.assertIn((self.user.id, self.quiz.id), engine.dirty)
+        del engine.dirty[None, self.quiz.id]
+        self.assertEqual(engine.flush(), 1)
+        self.assertTrue(PracticeMastery.objects.filter(user=self.user).exists())
+
+    def test_unknown_quiz_and_foreign_options_are_rejected(self):
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get(reverse('practice-next', args=[0])).status_code, 404)
+
+        right, _ = self.options[0]
+        response = self.client.put(
+            reverse('practice-answer', args=[self.quiz.id, self.options[1][0].question_id]),
+            {'answer_id': right.id},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,15 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('progress/', views.ProgressView.as_view(), name='my-progress'),
+    path('quizzes/<int:quiz_id>/', views.QuizAnalyticsView.as_view(), name='quiz-analytics'),
+    path('leaderboards/', views.LeaderboardView.as_view(), name='global-leaderboard'),
+    path('leaderboards/quizzes/<int:quiz_id>/', views.LeaderboardView.as_view(), name='quiz-leaderboard'),
+    path('practice/quizzes/<int:quiz_id>/', views.PracticeView.as_view(), name='practice-next'),
+    path(
+        'practice/quizzes/<int:quiz_id>/answer/<int:question_id>/',
+        views.PracticeView.as_view(),
+        name='practice-answer'
+    ),
+]
@@ -0,0 +1,85 @@
+from django.shortcuts import get_object_or_404
+from quizzes.models import Quiz
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from attempts.serializers import AttemptAnswerSerializer, StudentQuestionSerializer
+from .leaderboards import GLOBAL_BOARD, leaderboard, quiz_board
+from .practice import practice_engine
+from .progress import user_progress
+from .serializers import LeaderboardParamsSerializer
+from .rollups import quiz_report
+
+
+class QuizAnalyticsView(APIView):
+    """
+    Item analysis for a quiz: per-question difficulty (share of correct
+    answers), per-option selection rates, completion rate and average
+    score. Served from the rollup tables.
+    """
+    def get(self, request, quiz_id):
+        get_object_or_404(Quiz.objects.only('id'), pk=quiz_id)
+        return Response(quiz_report(quiz_id))
+
+
+class ProgressView(APIView):
+    """
+    The requesting user's progress: attempts, best score, accuracy and last
+    attempt for each quiz they have started, plus overall accuracy.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response(user_progress(request.user))
+
+
+class LeaderboardView(APIView):
+    """
+    Top scorers and the requesting user's rank, for one quiz (best score
+    per user) or globally (sum of each user's best scores).
+    """
+    def get(self, request, quiz_id=None):
+        params = LeaderboardParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+
+        if quiz_id is None:
+            board = GLOBAL_BOARD
+        else:
+            get_object_or_404(Quiz.objects.only('id'), pk=quiz_id)
+            board = quiz_board(quiz_id)
+
+        return Response(leaderboard(board, request.user, params.validated_data['limit']))
+
+
+class PracticeView(APIView):
+    """
+    Adaptive practice on a quiz, outside of any attempt.
+
+    GET draws the next question, favouring those the student is weakest
+    on. PUT answers a question (``answer_id`` or ``answer_ids``, as for
+    attempts) and returns the credit earned, the student's updated mastery
+    of the question and the next question.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, quiz_id):
+        question = practice_engine().next_question(request.user.id, quiz_id)
+        if not question:
+            return Response({"detail": "Quiz has no questions."})
+        return Response(StudentQuestionSerializer(question).data)
+
+    def put(self, request, quiz_id, question_id):
+        serializer = AttemptAnswerSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        engine = practice_engine()
+        credit, mastery = engine.answer(
+            request.user.id, quiz_id, question_id, serializer.validated_data['option_ids']
+        )
+        question = engine.next_question(request.user.id, quiz_id)
+        return Response({
+            'credit': credit,
+            'is_correct': credit == 1.0,
+            'mastery': mastery,
+            'next_question': StudentQuestionSerializer(question).data if question else None,
+        })
@@ -0,0 +1,144 @@
+"""
+Async versions of the start, answer and submit endpoints for ASGI
+deployments. They return the same payloads as the views in views.py but
+await the database instead of tying up a thread per request.
+
+DRF's APIView only dispatches to sync handlers, so these are plain Django
+async views that authenticate, parse and report errors the way the API
+views do.
+"""
+import json
+from functools import wraps
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.http import Http404, HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.exceptions import APIException, AuthenticationFailed, NotAuthenticated, ParseError, ValidationError
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from quizzes.models import Quiz
+from quizzes.snapshots import aget_snapshot
+from .models import Attempt
+from .scoring import submit_attempt
+from .serializers import (
+    StartAttemptParamsSerializer, AttemptAnswerSerializer, AttemptResultSerializer, student_question_json
+)
+from .services import aanswer_and_advance, aload_attempt, anext_question, astart_attempt
+from .signals import attempt_started
+
+
+async def aauthenticate(request):
+    """
+    Return the user for a bearer token, or else for the session (with
+    DRF's CSRF check), or raise NotAuthenticated.
+    """
+    jwt = JWTAuthentication()
+    header = jwt.get_header(request)
+    raw_token = jwt.get_raw_token(header) if header is not None else None
+    if raw_token is not None:
+        token = jwt.get_validated_token(raw_token)
+        user = await get_user_model().objects.filter(
+            **{jwt_settings.USER_ID_FIELD: token[jwt_settings.USER_ID_CLAIM]}
+        ).afirst()
+        if user is None or not user.is_active:
+            raise AuthenticationFailed("User not found or inactive.")
+        return user
+
+    user = await request.auser()
+    if not user.is_authenticated:
+        raise NotAuthenticated()
+    SessionAuthentication().enforce_csrf(request)
+    return user
+
+
+def parse_json(request):
+    if not request.body:
+        return {}
+    try:
+        return json.loads(request.body)
+    except ValueError as exc:
+        raise ParseError(f'JSON parse error - {exc}')
+
+
+def async_api_view(*methods):
+    """
+    Wrap an async view: restrict its methods, authenticate the user into
+    ``request.user`` and render errors the way DRF's exception handler
+    does.
+    """
+    def decorator(view):
+        @csrf_exempt
+        @require_http_methods(methods)
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            try:
+                request.user = await aauthenticate(request)
+                return await view(request, *args, **kwargs)
+            except Http404:
+                return JsonResponse({'detail': 'Not found.'}, status=404)
+            except APIException as exc:
+                data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+                return JsonResponse(data, status=exc.status_code, safe=False)
+        return wrapper
+    return decorator
+
+
+@async_api_view('POST')
+async def start_attempt(request):
+    serializer = StartAttemptParamsSerializer(data=parse_json(request))
+    serializer.is_valid(raise_exception=True)
+
+    quiz_id = serializer.validated_data['quiz_id']
+    quiz = await Quiz.objects.only('id', 'content_version', 'time_limit').filter(pk=quiz_id).afirst()
+    if quiz is None:
+        raise ValidationError({'quiz_id': [f'Invalid pk "{quiz_id}" - object does not exist.']})
+
+    snapshot = await aget_snapshot(quiz.id, quiz.content_version)
+
+    attempt, created = await astart_attempt(request.user, quiz, snapshot, serializer.validated_data.get('seed'))
+    if created:
+        await attempt_started.asend(sender=Attempt, attempt=attempt)
+
+    question = await anext_question(attempt, snapshot)
+    if not question:
+        return JsonResponse({"detail": "Quiz completed", "attempt_id": attempt.id})
+
+    return HttpResponse(
+        student_question_json(snapshot, question['id'], attempt.id),
+        content_type='application/json',
+        status=201 if created else 200
+    )
+
+
+@async_api_view('PUT')
+async def answer_question(request, attempt_id, question_id):
+    serializer = AttemptAnswerSerializer(data=parse_json(request))
+    serializer.is_valid(raise_exception=True)
+
+    attempt, snapshot, question = await aanswer_and_advance(
+        request.user,
+        attempt_id,
+        question_id,
+        serializer.validated_data['option_ids']
+    )
+
+    if not question:
+        return JsonResponse({"detail": "Quiz completed"})
+
+    return HttpResponse(student_question_json(snapshot, question['id'], attempt.id), content_type='application/json')
+
+
+@async_api_view('POST')
+async def submit(request, attempt_id):
+    attempt = await aload_attempt(request.user, attempt_id, 'user_id', 'status', 'question_order')
+
+    if attempt.status != 'in_progress':
+        return JsonResponse({"detail": f"Attempt has already been {attempt.get_status_display().lower()}."}, status=403)
+
+    # Scoring is one transaction and its signal receivers are sync; Django
+    # does not run transactions in async code, so it runs in a thread.
+    await sync_to_async(submit_attempt)(attempt)
+
+    return JsonResponse(AttemptResultSerializer(attempt).data)
@@ -0,0 +1,78 @@
+from django.db.models import Prefetch
+from quizzes.exports import EXPORT_CHUNK_SIZE, csv_lines, jsonl_lines, export_response
+from .models import AttemptAnswer
+
+ATTEMPT_CSV_HEADER = [
+    'attempt_id', 'user_id', 'quiz_id', 'status', 'score', 'started_at', 'submitted_at',
+    'question_id', 'option_ids', 'is_correct', 'answered_at',
+]
+
+
+def iter_attempts(attempts):
+    """
+    Iterate attempts in id order with their answers prefetched one chunk
+    of attempts at a time.
+    """
+    answers = AttemptAnswer.objects.order_by('question_id').only(
+        'attempt_id', 'question_id', 'option_id', 'option_ids', 'is_correct', 'answered_at'
+    )
+    return (
+        attempts
+        .order_by('id')
+        .only('id', 'user_id', 'quiz_id', 'status', 'score', 'started_at', 'submitted_at')
+        .prefetch_related(Prefetch('answers', queryset=answers))
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+
+
+def attempt_records(attempts):
+    for attempt in iter_attempts(attempts):
+        yield {
+            'id': attempt.id,
+            'user_id': attempt.user_id,
+            'quiz_id': attempt.quiz_id,
+            'status': attempt.status,
+            'score': attempt.score,
+            'started_at': attempt.started_at,
+            'submitted_at': attempt.submitted_at,
+            'answers': [
+                {
+                    'question_id': answer.question_id,
+                    'option_ids': sorted(answer.selected_option_ids),
+                    'is_correct': answer.is_correct,
+                    'answered_at': answer.answered_at,
+                }
+                for answer in attempt.answers.all()
+            ],
+        }
+
+
+def attempt_rows(attempts):
+    """
+    One CSV row per answer, repeating the attempt columns. Attempts with no
+    answers get a single row with empty answer columns.
+    """
+    for attempt in iter_attempts(attempts):
+        columns = [
+            attempt.id, attempt.user_id, attempt.quiz_id, attempt.status, attempt.score,
+            attempt.started_at.isoformat(),
+            attempt.submitted_at.isoformat() if attempt.submitted_at else '',
+        ]
+        answers = attempt.answers.all()
+        if not answers:
+            yield columns + ['', '', '', '']
+        for answer in answers:
+            yield columns + [
+                answer.question_id,
+                ';'.join(str(option_id) for option_id in sorted(answer.selected_option_ids)),
+                answer.is_correct,
+                answer.answered_at.isoformat(),
+            ]
+
+
+def export_attempts(attempts, file_format):
+    if file_format == 'csv':
+        lines = csv_lines(ATTEMPT_CSV_HEADER, attempt_rows(attempts))
+    else:
+        lines = jsonl_lines(attempt_records(attempts))
+    return export_response(lines, 'attempts', file_format)
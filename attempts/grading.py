@@ -0,0 +1,130 @@
+from django.conf import settings
+
+
+class QuestionKey:
+    """
+    A question's answer key as bitmasks over its options.
+
+    Fields:
+        - bits: Mapping of option id to its bit (by position in the question).
+        - correct: Mask of the correct options.
+        - correct_count / wrong_count: Number of correct and incorrect options.
+        - multi_select: Whether the question accepts several options (MCQ).
+    """
+    __slots__ = ('bits', 'correct', 'correct_count', 'wrong_count', 'multi_select')
+
+    def __init__(self, question):
+        self.bits = {option['id']: 1 << position for position, option in enumerate(question['options'])}
+        self.correct = 0
+        for option in question['options']:
+            if option['is_correct']:
+                self.correct |= self.bits[option['id']]
+        self.correct_count = self.correct.bit_count()
+        self.wrong_count = len(self.bits) - self.correct_count
+        self.multi_select = question['question_type'] == 'MCQ'
+
+    def mask(self, option_ids):
+        """
+        The mask of the given options; ids not in the question are ignored.
+        """
+        mask = 0
+        for option_id in option_ids:
+            mask |= self.bits.get(option_id, 0)
+        return mask
+
+
+def single_choice(mask, key):
+    """
+    One option chosen, and it is a correct one. Used for OBJ questions.
+    """
+    return 1.0 if mask and mask & (mask - 1) == 0 and mask & key.correct else 0.0
+
+
+def all_or_nothing(mask, key):
+    """
+    Full credit for choosing exactly the correct options, none otherwise.
+    """
+    return 1.0 if mask and mask == key.correct else 0.0
+
+
+def proportional(mask, key):
+    """
+    The share of correct options chosen, each wrong choice cancelling a
+    correct one, never below zero.
+    """
+    if not key.correct_count:
+        return 0.0
+    hits = (mask & key.correct).bit_count()
+    misses = (mask & ~key.correct).bit_count()
+    return max(hits - misses, 0) / key.correct_count
+
+
+def negative(mask, key):
+    """
+    The share of correct options chosen minus the share of wrong options
+    chosen, so guessing everything scores zero and credit can go down to -1.
+    """
+    credit = (mask & key.correct).bit_count() / key.correct_count if key.correct_count else 0.0
+    if key.wrong_count:
+        credit -= (mask & ~key.correct).bit_count() / key.wrong_count
+    return credit
+
+
+STRATEGIES = {
+    'all_or_nothing': all_or_nothing,
+    'proportional': proportional,
+    'negative': negative,
+}
+
+
+def mcq_strategy():
+    """
+    The strategy for multi-select questions, chosen by MCQ_GRADING_STRATEGY.
+    """
+    return STRATEGIES[getattr(settings, 'MCQ_GRADING_STRATEGY', 'all_or_nothing')]
+
+
+def question_keys(snapshot):
+    """
+    ``{question_id: QuestionKey}`` for a quiz snapshot, built once per
+    snapshot and kept in ``snapshot.rendered``, so it is evicted with it.
+    """
+    keys = snapshot.rendered.get('question_keys')
+    if keys is None:
+        keys = snapshot.rendered['question_keys'] = {
+            question_id: QuestionKey(question) for question_id, question in snapshot.questions.items()
+        }
+    return keys
+
+
+def answer_credit(key, option_ids, strategy):
+    """
+    Credit for choosing ``option_ids``: by ``strategy`` for a multi-select
+    question, by single_choice otherwise.
+    """
+    rule = strategy if key.multi_select else single_choice
+    return rule(key.mask(option_ids), key)
+
+
+def grade(answers, snapshot):
+    """
+    Set ``credit`` and ``is_correct`` (full credit) on every answer in
+    memory and return ``(score, points)``: the number of fully correct
+    answers and the sum of credit.
+
+    ``answers`` only needs ``question_id``, ``option_id`` and
+    ``option_ids`` loaded. Answers to questions no longer in the quiz get
+    no credit.
+    """
+    keys = question_keys(snapshot)
+    strategy = mcq_strategy()
+    score = 0
+    points = 0.0
+    for answer in answers:
+        key = keys.get(answer.question_id)
+        credit = 0.0 if key is None else answer_credit(key, answer.selected_option_ids, strategy)
+        answer.credit = round(credit, 4)
+        answer.is_correct = credit == 1.0
+        score += answer.is_correct
+        points += credit
+    return score, round(points, 4)
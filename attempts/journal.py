@@ -0,0 +1,200 @@
+import fcntl
+import json
+import logging
+import os
+from contextlib import contextmanager
+from django.conf import settings
+from quizzes.models import Question
+from .models import Attempt, AttemptAnswer
+
+logger = logging.getLogger(__name__)
+
+
+def answer_journal():
+    """
+    The journal answers are written behind through, or None when
+    ATTEMPT_ANSWER_JOURNAL is unset and answers go straight to the table.
+    """
+    path = getattr(settings, 'ATTEMPT_ANSWER_JOURNAL', None)
+    return AnswerJournal(path) if path else None
+
+
+class AnswerJournal:
+    """
+    An append-only file of answers waiting to be written to AttemptAnswer.
+
+    append() returns once the record has been fsynced, so an acknowledged
+    answer survives a crash. flush() moves the journal aside to a
+    ``.flushing`` segment, upserts its answers in batches and only then
+    deletes the segment; a flush interrupted at any point is replayed by
+    the next one, and replaying is harmless because the upserts are
+    idempotent.
+
+    Appenders share a lock that flush() takes exclusively while moving the
+    journal aside, so no record is written to a segment after it has been
+    read. A second lock keeps one flusher at a time; flush_attempt() shares
+    it, so submitting an attempt does not wait on other attempts' answers.
+
+    A crash during append can leave a partial line. The next append starts
+    on a fresh line, and readers log and skip lines they cannot parse.
+    """
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        self.segment = self.path + '.flushing'
+
+    @contextmanager
+    def lock(self, suffix, mode):
+        fd = os.open(self.path + suffix, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, mode)
+            yield
+        finally:
+            os.close(fd)
+
+    def append(self, attempt_id, question_id, option_ids):
+        record = {'attempt': attempt_id, 'question': question_id, 'options': list(option_ids)}
+        line = (json.dumps(record, separators=(',', ':')) + '\n').encode()
+
+        with self.lock('.lock', fcntl.LOCK_SH):
+            created = not os.path.exists(self.path)
+            fd = os.open(self.path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                size = os.fstat(fd).st_size
+                if size and os.pread(fd, 1, size - 1) != b'\n':
+                    # Leave a torn record on a line of its own.
+                    line = b'\n' + line
+                os.write(fd, line)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            if created:
+                self.sync_directory()
+
+    def sync_directory(self):
+        # Makes a newly created journal file itself survive a crash.
+        fd = os.open(os.path.dirname(os.path.abspath(self.path)), os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def rotate(self):
+        """
+        Move the journal aside as the segment to flush, unless a segment
+        left by an interrupted flush is still waiting.
+        """
+        if os.path.exists(self.segment):
+            return
+        with self.lock('.lock', fcntl.LOCK_EX):
+            if os.path.exists(self.path):
+                os.rename(self.path, self.segment)
+
+    def read_records(self, path, attempt_id=None):
+        """
+        Yield the records of a journal file in order, only those of
+        ``attempt_id`` when given. Lines that do not parse (a record torn by
+        a crash during append, before it was acknowledged) are logged and
+        skipped.
+        """
+        marker = b'"attempt":%d,' % attempt_id if attempt_id is not None else b''
+        try:
+            journal = open(path, 'rb')
+        except FileNotFoundError:
+            return
+        with journal:
+            for number, line in enumerate(journal, start=1):
+                if not line.strip() or marker not in line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    logger.warning("Skipping unreadable line %d of answer journal %s.", number, path)
+                    continue
+                if attempt_id is None or record['attempt'] == attempt_id:
+                    yield record
+
+    def read_segment(self):
+        """
+        Return the segment's answers, the latest per (attempt, question).
+        """
+        return {(record['attempt'], record['question']): record for record in self.read_records(self.segment)}
+
+    def pending(self, attempt_id):
+        """
+        The journaled answers of one attempt not yet flushed, the latest
+        per question, from the segment being flushed and the live journal.
+        """
+        # The live journal is opened first: if it is moved aside in
+        # between, its records are then read again as the segment.
+        live = list(self.read_records(self.path, attempt_id))
+        records = {}
+        for record in [*self.read_records(self.segment, attempt_id), *live]:
+            records[record['question']] = record
+        return records
+
+    def apply_segment(self, batch_size=500):
+        """
+        Upsert the segment's answers, ``batch_size`` rows per statement.
+
+        Answers for attempts already submitted (they raced the submission)
+        or for questions deleted since are dropped. ``answered_at`` is set
+        when the answer is written, as auto_now always does. Returns the
+        number of answers written.
+        """
+        return self.apply_records(list(self.read_segment().values()), batch_size)
+
+    def apply_records(self, records, batch_size=500):
+        written = 0
+        for start in range(0, len(records), batch_size):
+            batch = records[start:start + batch_size]
+            attempt_ids = set(
+                Attempt.objects.filter(
+                    id__in={record['attempt'] for record in batch}, status='in_progress'
+                ).values_list('id', flat=True)
+            )
+            question_ids = set(
+                Question.objects.filter(
+                    id__in={record['question'] for record in batch}
+                ).values_list('id', flat=True)
+            )
+            # Records journaled before multi-select answers carry one 'option'.
+            answers = [
+                AttemptAnswer.for_options(record['attempt'], record['question'], record.get('options') or [record['option']])
+                for record in batch
+                if record['attempt'] in attempt_ids and record['question'] in question_ids
+            ]
+            AttemptAnswer.objects.bulk_create(
+                answers,
+                update_conflicts=True,
+                unique_fields=['attempt', 'question'],
+                update_fields=['option', 'option_ids', 'answered_at'],
+            )
+            written += len(answers)
+        return written
+
+    def flush_attempt(self, attempt_id):
+        """
+        Write one attempt's journaled answers to AttemptAnswer, as submitting
+        it needs, without rotating the journal or blocking appends. Only
+        waits for a flush() in progress, which could otherwise write an
+        older segment record after these. Returns the number of answers
+        written.
+        """
+        with self.lock('.flush.lock', fcntl.LOCK_SH):
+            return self.apply_records(list(self.pending(attempt_id).values()))
+
+    def flush(self, batch_size=500):
+        """
+        Write every journaled answer to AttemptAnswer. Returns the number
+        of answers written.
+        """
+        written = 0
+        with self.lock('.flush.lock', fcntl.LOCK_EX):
+            # A leftover segment is flushed first, then the live journal.
+            for _ in range(2):
+                self.rotate()
+                if not os.path.exists(self.segment):
+                    break
+                written += self.apply_segment(batch_size)
+                os.remove(self.segment)
+        return written
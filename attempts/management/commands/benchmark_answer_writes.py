@@ -0,0 +1,107 @@
+import threading
+import time
+import uuid
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+from quizzes.models import Quiz, Question, Option
+from quizzes.snapshots import get_snapshot
+from attempts.models import Attempt, build_question_order
+from attempts.services import advance_cursor, save_answer
+
+
+class Command(BaseCommand):
+    help = (
+        "Record answers from concurrent threads, one attempt per thread, through the same "
+        "upsert and cursor update as the answer endpoint, and report throughput and lock "
+        "errors for the configured database. Run it once per DB_PROFILE (or with "
+        "SQLITE_TUNING=off for an untuned SQLite baseline) to compare."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--questions', type=int, default=50)
+        parser.add_argument('--rounds', type=int, default=4,
+                            help="Times each thread answers every question.")
+
+    def handle(self, *args, **options):
+        self.describe_database()
+
+        tag = uuid.uuid4().hex[:8]
+        quiz = Quiz.objects.create(quiz_name=f'Benchmark quiz {tag}')
+        questions = Question.objects.bulk_create(
+            Question(quiz=quiz, question_type='OBJ', question_text=f'Benchmark question {number}')
+            for number in range(options['questions'])
+        )
+        Option.objects.bulk_create(
+            Option(question=question, option_text='Right', is_correct=True) for question in questions
+        )
+        quiz.bump_content_version()
+        answers = dict(Option.objects.filter(question__quiz=quiz).values_list('question_id', 'id'))
+
+        User = get_user_model()
+        users = User.objects.bulk_create(
+            User(username=f'benchmark-{tag}-{number}', email=f'benchmark-{tag}-{number}@example.com')
+            for number in range(options['threads'])
+        )
+        order = build_question_order(get_snapshot(quiz.id).question_ids)
+        attempts = Attempt.objects.bulk_create(
+            Attempt(user=user, quiz=quiz, question_order=order) for user in users
+        )
+
+        written = []
+        errors = []
+
+        def record(attempt):
+            done = failed = 0
+            try:
+                for _ in range(options['rounds']):
+                    attempt.cursor = 0
+                    for question_id, option_id in answers.items():
+                        try:
+                            save_answer(attempt, question_id, [option_id])
+                            advance_cursor(attempt, question_id)
+                            done += 1
+                        except OperationalError:
+                            failed += 1
+            finally:
+                written.append(done)
+                errors.append(failed)
+                connection.close()
+
+        threads = [threading.Thread(target=record, args=(attempt,)) for attempt in attempts]
+        started = time.perf_counter()
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+        finally:
+            quiz.delete()
+            User.objects.filter(id__in=[user.id for user in users]).delete()
+
+        self.stdout.write(
+            f"{sum(written)} answers in {elapsed:.2f}s ({sum(written) / elapsed:,.0f} answers/s), "
+            f"{sum(errors)} lock errors, {options['threads']} threads."
+        )
+
+    def describe_database(self):
+        settings_dict = connection.settings_dict
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                journal_mode = cursor.fetchone()[0]
+                cursor.execute('PRAGMA synchronous')
+                synchronous = cursor.fetchone()[0]
+                cursor.execute('PRAGMA busy_timeout')
+                busy_timeout = cursor.fetchone()[0]
+            self.stdout.write(
+                f"sqlite: journal_mode={journal_mode} synchronous={synchronous} "
+                f"busy_timeout={busy_timeout}ms transaction_mode={connection.transaction_mode or 'DEFERRED'}"
+            )
+        else:
+            pool = settings_dict['OPTIONS'].get('pool')
+            self.stdout.write(
+                f"{connection.vendor}: pool={pool or 'off'} conn_max_age={settings_dict['CONN_MAX_AGE']}"
+            )
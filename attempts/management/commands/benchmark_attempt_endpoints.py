@@ -0,0 +1,149 @@
+import asyncio
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.test import AsyncClient, Client, override_settings
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+from quizzes.models import Quiz, Question, Option
+
+# Mode: (URL names for start, answer and submit; whether it runs on the ASGI handler).
+MODES = {
+    'wsgi': (('start-attempt', 'attempt-answer', 'attempt-submit'), False),
+    'asgi-sync': (('start-attempt', 'attempt-answer', 'attempt-submit'), True),
+    'asgi': (('async-start-attempt', 'async-attempt-answer', 'async-attempt-submit'), True),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive concurrent students through start, answer and submit on the sync views "
+        "under WSGI, the same views under ASGI, and the async views under ASGI, and "
+        "report throughput and answer latency. Creates its own quiz and users and "
+        "deletes them afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=200)
+        parser.add_argument('--questions', type=int, default=20)
+        parser.add_argument('--concurrency', type=int, default=50,
+                            help="Students in flight at once.")
+        parser.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES))
+
+    def handle(self, *args, **options):
+        tag = uuid.uuid4().hex[:8]
+        quiz, options_by_question = self.create_quiz(tag, options['questions'])
+        users = self.create_users(tag, options['students'])
+
+        try:
+            self.stdout.write(
+                f"{'mode':>10} {'requests':>9} {'seconds':>8} {'req/s':>8} {'p50 ms':>7} {'p95 ms':>7}"
+            )
+            # The test clients address the host as "testserver".
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+                for mode in options['modes']:
+                    names, on_asgi = MODES[mode]
+                    if on_asgi:
+                        latencies, elapsed = asyncio.run(
+                            self.run_asgi(names, quiz, options_by_question, users, options['concurrency'])
+                        )
+                    else:
+                        latencies, elapsed = self.run_wsgi(
+                            names, quiz, options_by_question, users, options['concurrency']
+                        )
+                    self.report(mode, len(users), latencies, elapsed)
+        finally:
+            quiz.delete()
+            get_user_model().objects.filter(id__in=[user.id for user in users]).delete()
+
+    def create_quiz(self, tag, question_count):
+        quiz = Quiz.objects.create(quiz_name=f'Benchmark quiz {tag}')
+        questions = Question.objects.bulk_create(
+            Question(quiz=quiz, question_type='OBJ', question_text=f'Benchmark question {number}')
+            for number in range(question_count)
+        )
+        Option.objects.bulk_create(
+            Option(question=question, option_text='Right', is_correct=True) for question in questions
+        )
+        quiz.bump_content_version()
+        quiz.refresh_from_db()
+        return quiz, dict(Option.objects.filter(question__quiz=quiz).values_list('question_id', 'id'))
+
+    def create_users(self, tag, count):
+        User = get_user_model()
+        users = [
+            User(username=f'benchmark-{tag}-{number}', email=f'benchmark-{tag}-{number}@example.com')
+            for number in range(count)
+        ]
+        for user in users:
+            user.set_unusable_password()
+        return User.objects.bulk_create(users)
+
+    def headers(self, user):
+        return {'authorization': f'Bearer {AccessToken.for_user(user)}'}
+
+    def run_wsgi(self, names, quiz, options_by_question, users, concurrency):
+        start_name, answer_name, submit_name = names
+
+        def take(user):
+            client = Client(headers=self.headers(user))
+            latencies = []
+            response = client.post(reverse(start_name), {'quiz_id': quiz.id}, content_type='application/json')
+            attempt_id = response.json()['attempt_id']
+            for question_id, option_id in options_by_question.items():
+                started = time.perf_counter()
+                client.put(
+                    reverse(answer_name, args=[attempt_id, question_id]),
+                    {'answer_id': option_id},
+                    content_type='application/json'
+                )
+                latencies.append(time.perf_counter() - started)
+            client.post(reverse(submit_name, args=[attempt_id]))
+            return latencies
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(take, users))
+        return [latency for latencies in results for latency in latencies], time.perf_counter() - started
+
+    async def run_asgi(self, names, quiz, options_by_question, users, concurrency):
+        start_name, answer_name, submit_name = names
+        slots = asyncio.Semaphore(concurrency)
+
+        async def take(user):
+            async with slots:
+                client = AsyncClient()
+                headers = self.headers(user)
+                latencies = []
+                response = await client.post(
+                    reverse(start_name), {'quiz_id': quiz.id}, content_type='application/json', headers=headers
+                )
+                attempt_id = response.json()['attempt_id']
+                for question_id, option_id in options_by_question.items():
+                    started = time.perf_counter()
+                    await client.put(
+                        reverse(answer_name, args=[attempt_id, question_id]),
+                        {'answer_id': option_id},
+                        content_type='application/json',
+                        headers=headers
+                    )
+                    latencies.append(time.perf_counter() - started)
+                await client.post(reverse(submit_name, args=[attempt_id]), headers=headers)
+                return latencies
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(take(user) for user in users))
+        return [latency for latencies in results for latency in latencies], time.perf_counter() - started
+
+    def report(self, mode, students, latencies, elapsed):
+        # Each student also starts and submits once.
+        requests = len(latencies) + 2 * students
+        p50 = statistics.median(latencies) * 1000
+        p95 = statistics.quantiles(latencies, n=20)[-1] * 1000
+        self.stdout.write(
+            f"{mode:>10} {requests:>9} {elapsed:>8.2f} {requests / elapsed:>8.0f} {p50:>7.1f} {p95:>7.1f}"
+        )
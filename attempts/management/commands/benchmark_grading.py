@@ -0,0 +1,45 @@
+import random
+import time
+from django.core.management.base import BaseCommand
+from attempts.grading import QuestionKey, STRATEGIES, single_choice
+
+
+class Command(BaseCommand):
+    help = (
+        "Grade synthetic multi-select answers with every MCQ strategy (and the "
+        "single-choice rule) in memory, and report the time per strategy. No "
+        "database access."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--answers', type=int, default=1_000_000)
+        parser.add_argument('--options', type=int, default=5,
+                            help="Options per question.")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        option_count = options['options']
+        keys = [
+            QuestionKey({
+                'question_type': 'MCQ',
+                'options': [
+                    {'id': option_id, 'is_correct': rng.random() < 0.4} for option_id in range(option_count)
+                ],
+            })
+            for _ in range(100)
+        ]
+        answers = [
+            (rng.getrandbits(option_count), keys[number % len(keys)]) for number in range(options['answers'])
+        ]
+
+        self.stdout.write(f"{'strategy':>15} {'seconds':>8} {'answers/s':>12} {'mean credit':>12}")
+        for name, strategy in [*STRATEGIES.items(), ('single_choice', single_choice)]:
+            started = time.perf_counter()
+            total = 0.0
+            for mask, key in answers:
+                total += strategy(mask, key)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"{name:>15} {elapsed:>8.2f} {len(answers) / elapsed:>12,.0f} {total / len(answers):>12.3f}"
+            )
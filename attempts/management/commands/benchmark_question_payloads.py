@@ -0,0 +1,75 @@
+import random
+import statistics
+import time
+from types import SimpleNamespace
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from attempts.serializers import StudentQuestionSerializer, student_question_json
+from quizzes.snapshots import QuizSnapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the next-question payload of an exam the way the start and answer "
+        "endpoints do, with StudentQuestionSerializer and DRF's JSONRenderer and with the "
+        "pre-rendered bytes of student_question_json, and report per-response latency. "
+        "Uses a synthetic quiz snapshot held in memory; no database access."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questions', type=int, default=100)
+        parser.add_argument('--options', type=int, default=5,
+                            help="Options per question.")
+        parser.add_argument('--students', type=int, default=2000)
+        parser.add_argument('--responses', type=int, default=20_000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        rows = tuple(
+            (
+                question_id,
+                'OBJ',
+                f'Question {question_id}: which of the following best explains the finding described?',
+                'Explanation ' * 20,
+                tuple(
+                    (question_id * 100 + number, f'Option {number} of question {question_id}', number == 0)
+                    for number in range(options['options'])
+                ),
+            )
+            for question_id in range(1, options['questions'] + 1)
+        )
+        snapshot = QuizSnapshot(1, (1, rows))
+        renderer = JSONRenderer()
+        requests = [
+            (rng.choice(snapshot.question_ids), SimpleNamespace(id=rng.randrange(options['students']) + 1))
+            for _ in range(options['responses'])
+        ]
+
+        def serializer(question_id, attempt):
+            return renderer.render(
+                StudentQuestionSerializer(snapshot.questions[question_id], context={'attempt': attempt}).data
+            )
+
+        def prerendered(question_id, attempt):
+            return student_question_json(snapshot, question_id, attempt.id)
+
+        self.stdout.write(
+            f"{len(requests):,} responses over {len(snapshot.question_ids)} questions "
+            f"and {options['students']:,} students."
+        )
+        self.stdout.write(f"{'renderer':>12} {'p50 us':>8} {'p95 us':>8} {'total ms':>9}")
+        for name, render in (('serializer', serializer), ('prerendered', prerendered)):
+            latencies = []
+            for question_id, attempt in requests:
+                started = time.perf_counter()
+                render(question_id, attempt)
+                latencies.append(time.perf_counter() - started)
+            self.stdout.write(
+                f"{name:>12} {statistics.median(latencies) * 1e6:>8.1f} "
+                f"{statistics.quantiles(latencies, n=20)[-1] * 1e6:>8.1f} {sum(latencies) * 1000:>9.1f}"
+            )
+
+        question_id, attempt = requests[0]
+        if serializer(question_id, attempt) != prerendered(question_id, attempt):
+            self.stderr.write("The pre-rendered payload differs from the serializer's.")
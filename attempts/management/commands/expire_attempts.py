@@ -0,0 +1,24 @@
+import time
+from django.core.management.base import BaseCommand
+from attempts.scoring import expire_attempts
+
+
+class Command(BaseCommand):
+    help = "Submit and score in-progress attempts whose time limit has run out."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--interval', type=float,
+                            help="Keep running, sweeping expired attempts every INTERVAL seconds.")
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            submitted = expire_attempts(options['batch_size'])
+            elapsed = max(time.monotonic() - started, 1e-9)
+            if submitted or not options['interval']:
+                self.stdout.write(f"Submitted {submitted} expired attempts ({submitted / elapsed:,.0f} attempts/s).")
+
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
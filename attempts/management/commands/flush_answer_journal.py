@@ -0,0 +1,28 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from attempts.journal import answer_journal
+
+
+class Command(BaseCommand):
+    help = "Write answers from the ATTEMPT_ANSWER_JOURNAL write-behind journal to the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--interval', type=float,
+                            help="Keep running, flushing the journal every INTERVAL seconds.")
+
+    def handle(self, *args, **options):
+        journal = answer_journal()
+        if journal is None:
+            raise CommandError("ATTEMPT_ANSWER_JOURNAL is not set.")
+
+        while True:
+            started = time.monotonic()
+            written = journal.flush(options['batch_size'])
+            elapsed = max(time.monotonic() - started, 1e-9)
+            if written or not options['interval']:
+                self.stdout.write(f"Wrote {written} answers ({written / elapsed:,.0f} answers/s).")
+
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
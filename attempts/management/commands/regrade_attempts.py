@@ -0,0 +1,39 @@
+import time
+from django.core.management.base import BaseCommand
+from attempts.scoring import regrade_attempts
+
+
+class Command(BaseCommand):
+    help = "Re-score submitted attempts against the current answer keys."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--quiz', type=int, action='append', dest='quiz_ids',
+                            help="Only regrade attempts on this quiz. Can be repeated.")
+        parser.add_argument('--question', type=int, action='append', dest='question_ids',
+                            help="Only regrade attempts that answered this question. Can be repeated.")
+        parser.add_argument('--chunk-size', type=int, default=500,
+                            help="Number of attempts loaded per chunk.")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        totals = {'attempts': 0, 'answers': 0, 'changed_answers': 0, 'changed_scores': 0}
+
+        for totals in regrade_attempts(
+            quiz_ids=options['quiz_ids'],
+            question_ids=options['question_ids'],
+            chunk_size=options['chunk_size'],
+        ):
+            if options['verbosity'] > 1:
+                self.stdout.write(self.progress(totals, started))
+
+        self.stdout.write(self.style.SUCCESS(self.progress(totals, started)))
+        self.stdout.write(
+            f"{totals['changed_answers']} answers and {totals['changed_scores']} scores changed."
+        )
+
+    def progress(self, totals, started):
+        elapsed = max(time.monotonic() - started, 1e-9)
+        return (
+            f"Regraded {totals['attempts']} attempts / {totals['answers']} answers "
+            f"in {elapsed:.1f}s ({totals['answers'] / elapsed:,.0f} answers/s)."
+        )
@@ -0,0 +1,63 @@
+# Generated by Django 6.0 on 2026-10-18 14:48
+
+import struct
+
+from django.db import migrations, models
+
+
+def fill_question_order(apps, schema_editor):
+    """
+    Give attempts started before question_order existed the order they
+    were served in (by question id), with the cursor on the first
+    unanswered question.
+    """
+    Attempt = apps.get_model('attempts', 'Attempt')
+    Question = apps.get_model('quizzes', 'Question')
+    AttemptAnswer = apps.get_model('attempts', 'AttemptAnswer')
+
+    orders = {}
+    for attempt in Attempt.objects.iterator():
+        if attempt.quiz_id not in orders:
+            orders[attempt.quiz_id] = list(
+                Question.objects.filter(quiz_id=attempt.quiz_id)
+                .order_by('id')
+                .values_list('id', flat=True)
+            )
+        question_ids = orders[attempt.quiz_id]
+        answered = set(
+            AttemptAnswer.objects.filter(attempt_id=attempt.id).values_list('question_id', flat=True)
+        )
+        cursor = next(
+            (position for position, question_id in enumerate(question_ids) if question_id not in answered),
+            len(question_ids),
+        )
+        attempt.question_order = struct.pack(f'<{len(question_ids)}q', *question_ids)
+        attempt.cursor = cursor
+        attempt.save(update_fields=['question_order', 'cursor'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attempts', '0001_initial'),
+        ('quizzes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attempt',
+            name='cursor',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='attempt',
+            name='question_order',
+            field=models.BinaryField(default=bytes),
+        ),
+        migrations.AddField(
+            model_name='attempt',
+            name='shuffle_seed',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(fill_question_order, migrations.RunPython.noop),
+    ]
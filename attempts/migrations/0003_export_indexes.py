@@ -0,0 +1,24 @@
+# Generated by Django 6.0 on 2026-10-18 14:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attempts', '0002_question_order'),
+        ('quizzes', '0004_export_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attempt',
+            index=models.Index(fields=['quiz', 'started_at'], name='attempt_quiz_started_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attempt',
+            index=models.Index(fields=['started_at'], name='attempt_started_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 6.0 on 2026-10-18 15:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attempts', '0003_export_indexes'),
+        ('quizzes', '0006_quiz_question_summary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attempt',
+            index=models.Index(fields=['user', 'quiz', 'started_at'], name='attempt_user_quiz_started_idx'),
+        ),
+    ]
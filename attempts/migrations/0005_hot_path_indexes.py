@@ -0,0 +1,24 @@
+# Generated by Django 6.0 on 2026-10-18 15:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attempts', '0004_history_index'),
+        ('quizzes', '0007_option_correct_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attempt',
+            index=models.Index(fields=['user', 'status'], name='attempt_user_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attemptanswer',
+            index=models.Index(fields=['attempt', 'question'], include=('answer',), name='answer_attempt_covering_idx'),
+        ),
+    ]
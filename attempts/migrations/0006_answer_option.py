@@ -0,0 +1,90 @@
+# Generated by Django 6.0 on 2026-10-18 15:14
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Answers were stored as the option id, or before that as the string form
+# of the Option instance, e.g. "Option object (12)".
+ANSWER_OPTION_ID = re.compile(r'(\d+)\)?\s*$')
+
+
+def parse_option_id(answer):
+    if not answer:
+        return None
+    match = ANSWER_OPTION_ID.search(answer)
+    return int(match.group(1)) if match else None
+
+
+def convert_answers(apps, schema_editor, batch_size=2000):
+    """
+    Move the option id parsed out of each answer's text into the option
+    foreign key. Ids of options deleted since are dropped.
+    """
+    AttemptAnswer = apps.get_model('attempts', 'AttemptAnswer')
+    Option = apps.get_model('quizzes', 'Option')
+
+    batch = []
+    for answer in AttemptAnswer.objects.only('id', 'answer').iterator(chunk_size=batch_size):
+        option_id = parse_option_id(answer.answer)
+        if option_id is not None:
+            answer.option_id = option_id
+            batch.append(answer)
+        if len(batch) >= batch_size:
+            save_batch(Option, AttemptAnswer, batch)
+            batch = []
+    save_batch(Option, AttemptAnswer, batch)
+
+
+def save_batch(Option, AttemptAnswer, batch):
+    existing = set(
+        Option.objects.filter(id__in={answer.option_id for answer in batch}).values_list('id', flat=True)
+    )
+    for answer in batch:
+        if answer.option_id not in existing:
+            answer.option_id = None
+    AttemptAnswer.objects.bulk_update(batch, ['option'])
+
+
+def restore_answers(apps, schema_editor):
+    AttemptAnswer = apps.get_model('attempts', 'AttemptAnswer')
+    batch = []
+    for answer in AttemptAnswer.objects.filter(option__isnull=False).only('id', 'option_id').iterator():
+        answer.answer = str(answer.option_id)
+        batch.append(answer)
+    AttemptAnswer.objects.bulk_update(batch, ['answer'], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attempts', '0005_hot_path_indexes'),
+        ('quizzes', '0007_option_correct_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='attemptanswer',
+            name='answer_attempt_covering_idx',
+        ),
+        migrations.AddField(
+            model_name='attemptanswer',
+            name='option',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='quizzes.option'),
+        ),
+        migrations.AddField(
+            model_name='attemptanswer',
+            name='option_ids',
+            field=models.BinaryField(blank=True, default=bytes),
+        ),
+        migrations.RunPython(convert_answers, restore_answers),
+        migrations.RemoveField(
+            model_name='attemptanswer',
+            name='answer',
+        ),
+        migrations.AddIndex(
+            model_name='attemptanswer',
+            index=models.Index(fields=['attempt', 'question'], include=('option', 'option_ids'), name='answer_attempt_covering_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-18 15:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attempts', '0006_answer_option'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attempt',
+            name='points',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='attemptanswer',
+            name='credit',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
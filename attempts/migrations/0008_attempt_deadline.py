@@ -0,0 +1,25 @@
+# Generated by Django 6.0 on 2026-10-18 15:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attempts', '0007_partial_credit'),
+        ('quizzes', '0008_quiz_time_limit'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attempt',
+            name='deadline',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='attempt',
+            index=models.Index(fields=['status', 'deadline'], name='attempt_status_deadline_idx'),
+        ),
+    ]
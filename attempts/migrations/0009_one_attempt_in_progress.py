@@ -0,0 +1,49 @@
+# Generated by Django 6.0 on 2026-10-18 15:22
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+from django.utils import timezone
+
+
+def close_duplicate_attempts(apps, schema_editor):
+    """
+    Keep only the most recently started in-progress attempt per user and
+    quiz; older ones are closed as abandoned, unscored, rather than
+    passed off as submitted attempts without a score.
+    """
+    Attempt = apps.get_model('attempts', 'Attempt')
+    duplicated = (
+        Attempt.objects.filter(status='in_progress')
+        .values('user_id', 'quiz_id')
+        .annotate(total=Count('id'))
+        .filter(total__gt=1)
+    )
+    now = timezone.now()
+    for pair in duplicated:
+        older = Attempt.objects.filter(
+            user_id=pair['user_id'], quiz_id=pair['quiz_id'], status='in_progress'
+        ).order_by('-started_at', '-id').values_list('id', flat=True)[1:]
+        Attempt.objects.filter(id__in=list(older)).update(status='abandoned', submitted_at=now)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attempts', '0008_attempt_deadline'),
+        ('quizzes', '0008_quiz_time_limit'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='attempt',
+            name='status',
+            field=models.CharField(choices=[('in_progress', 'In progress'), ('submitted', 'Submitted'), ('abandoned', 'Abandoned')], default='in_progress', max_length=20),
+        ),
+        migrations.RunPython(close_duplicate_attempts, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='attempt',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'in_progress')), fields=('user', 'quiz'), name='unique_in_progress_attempt'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-18 16:02
+
+import attempts.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attempts', '0010_protect_answer_option'),
+        ('quizzes', '0010_near_duplicates'),
+    ]
+
+    # The new constraint is built before the indexes it replaces are
+    # dropped, so answers stay unique throughout.
+    operations = [
+        migrations.AddConstraint(
+            model_name='attemptanswer',
+            constraint=attempts.models.CoveringUniqueConstraint(fields=('attempt', 'question'), include=('option', 'option_ids'), name='unique_attempt_answer'),
+        ),
+        migrations.RemoveIndex(
+            model_name='attemptanswer',
+            name='answer_attempt_covering_idx',
+        ),
+        migrations.AlterUniqueTogether(
+            name='attemptanswer',
+            unique_together=set(),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 6.0 on 2026-10-18 16:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attempts', '0011_answer_unique_constraint'),
+        ('quizzes', '0010_near_duplicates'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='attemptanswer',
+            name='option',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.RESTRICT, related_name='+', to='quizzes.option'),
+        ),
+    ]
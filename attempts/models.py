@@ -1,12 +1,73 @@
+import random
+import struct
+from datetime import timedelta
 from django.db import models
 from django.conf import settings
-from quizzes.models import Quiz, Question
+from django.utils import timezone
+from quizzes.models import Quiz, Question, Option
+
+# Question ids are stored as little-endian signed 64-bit integers.
+QUESTION_ID_FORMAT = '<q'
+QUESTION_ID_SIZE = struct.calcsize(QUESTION_ID_FORMAT)
+OPTION_ID_FORMAT = '<q'
+
+
+def pack_question_order(question_ids):
+    """
+    Pack a sequence of question ids into the compact form kept on Attempt.
+    """
+    return struct.pack(f'<{len(question_ids)}q', *question_ids)
+
+
+def pack_option_ids(option_ids):
+    """
+    Pack a set of option ids, sorted, into the compact form kept on
+    AttemptAnswer for multi-select answers.
+    """
+    option_ids = sorted(set(option_ids))
+    return struct.pack(f'<{len(option_ids)}q', *option_ids)
+
+
+def build_question_order(question_ids, seed=None):
+    """
+    Return the packed question order for a new attempt.
+
+    ``question_ids`` are used as given, then shuffled deterministically
+    when a seed is given.
+    """
+    question_ids = list(question_ids)
+    if seed is not None:
+        random.Random(seed).shuffle(question_ids)
+    return pack_question_order(question_ids)
+
+class CoveringUniqueConstraint(models.UniqueConstraint):
+    """
+    A UniqueConstraint whose ``include`` columns are dropped on databases
+    without covering indexes (SQLite), where Django would otherwise skip
+    the constraint altogether and leave the fields unenforced.
+    """
+    def for_schema_editor(self, schema_editor):
+        if self.include and not schema_editor.connection.features.supports_covering_indexes:
+            return models.UniqueConstraint(fields=self.fields, name=self.name)
+        return super()
+
+    def constraint_sql(self, model, schema_editor):
+        return self.for_schema_editor(schema_editor).constraint_sql(model, schema_editor)
+
+    def create_sql(self, model, schema_editor):
+        return self.for_schema_editor(schema_editor).create_sql(model, schema_editor)
+
+    def remove_sql(self, model, schema_editor):
+        return self.for_schema_editor(schema_editor).remove_sql(model, schema_editor)
+
 
 class Attempt(models.Model):
 
     STATUS_CHOICES = [
         ('in_progress', 'In progress'),
         ('submitted', 'Submitted'),
+        # Closed unscored: a duplicate in-progress attempt (migration 0009).
+        ('abandoned', 'Abandoned'),
     ]
 
     user = models.ForeignKey(
@@ -28,11 +89,86 @@ class Attempt(models.Model):
     )
     
     score = models.IntegerField(blank=True, null=True)
+    # Sum of answer credit, which MCQ strategies can make partial.
+    points = models.FloatField(blank=True, null=True)
     started_at = models.DateTimeField(auto_now_add=True)
     submitted_at = models.DateTimeField(null=True, blank=True)
+    # When a timed attempt runs out, from the quiz's time limit at start.
+    deadline = models.DateTimeField(null=True, blank=True)
+
+    # Question ids in the order they are served, fixed when the attempt starts.
+    question_order = models.BinaryField(default=bytes)
+    # Position in question_order of the next question to serve.
+    cursor = models.PositiveIntegerField(default=0)
+    shuffle_seed = models.BigIntegerField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['quiz', 'started_at'], name='attempt_quiz_started_idx'),
+            models.Index(fields=['started_at'], name='attempt_started_idx'),
+            models.Index(fields=['user', 'quiz', 'started_at'], name='attempt_user_quiz_started_idx'),
+            models.Index(fields=['user', 'status'], name='attempt_user_status_idx'),
+            models.Index(fields=['status', 'deadline'], name='attempt_status_deadline_idx'),
+        ]
+        constraints = [
+            # Starting an attempt resumes the one in progress instead.
+            models.UniqueConstraint(
+                fields=['user', 'quiz'],
+                condition=models.Q(status='in_progress'),
+                name='unique_in_progress_attempt'
+            ),
+        ]
+
+    @staticmethod
+    def deadline_for(quiz, started_at=None):
+        """
+        The deadline of an attempt on ``quiz`` started at ``started_at``
+        (now by default), or None when the quiz is untimed.
+        """
+        if not quiz.time_limit:
+            return None
+        return (started_at or timezone.now()) + timedelta(seconds=quiz.time_limit)
+
+    def is_expired(self, now=None):
+        return self.deadline is not None and (now or timezone.now()) >= self.deadline
+
+    @property
+    def question_count(self):
+        return len(self.question_order) // QUESTION_ID_SIZE
+
+    def question_at(self, position):
+        """
+        Return the question id at ``position`` or None past the end.
+        """
+        if position >= self.question_count:
+            return None
+        return struct.unpack_from(
+            QUESTION_ID_FORMAT, self.question_order, position * QUESTION_ID_SIZE
+        )[0]
+
+    @property
+    def current_question_id(self):
+        return self.question_at(self.cursor)
+
+    @property
+    def question_ids(self):
+        return [
+            question_id
+            for (question_id,) in struct.iter_unpack(QUESTION_ID_FORMAT, self.question_order)
+        ]
 
 
 class AttemptAnswer(models.Model):
+    """
+    The answer given to one question of an attempt.
+
+    Fields:
+        - option: The chosen option for a single-choice answer.
+        - option_ids: Packed ids (see pack_option_ids) of the chosen
+          options for a multi-select answer; empty otherwise.
+        - credit: Credit awarded when graded (see grading.py); is_correct
+          is set for full credit.
+    """
     attempt = models.ForeignKey(
         Attempt,
         on_delete=models.CASCADE,
@@ -42,9 +178,52 @@ class AttemptAnswer(models.Model):
         Question,
         on_delete=models.CASCADE
     )
-    answer = models.TextField(null=True, blank=True)
+    # Restricted so a content edit cannot silently drop a recorded answer;
+    # question edits keep option ids (see update_question_options).
+    # Deleting the question or quiz still deletes the answer with it.
+    option = models.ForeignKey(
+        Option,
+        on_delete=models.RESTRICT,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    option_ids = models.BinaryField(default=bytes, blank=True)
+    credit = models.FloatField(null=True, blank=True)
     is_correct = models.BooleanField(null=True)
     answered_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        unique_together = ('attempt', 'question')
\ No newline at end of file
+        constraints = [
+            # One answer per question, and a covering index that lets
+            # grading read answers from the index alone (PostgreSQL only;
+            # elsewhere it is a plain unique index).
+            CoveringUniqueConstraint(
+                fields=['attempt', 'question'], include=['option', 'option_ids'], name='unique_attempt_answer'
+            ),
+        ]
+
+    @property
+    def selected_option_ids(self):
+        """
+        The frozenset of chosen option ids.
+        """
+        if self.option_ids:
+            return frozenset(
+                option_id for (option_id,) in struct.iter_unpack(OPTION_ID_FORMAT, self.option_ids)
+            )
+        if self.option_id is not None:
+            return frozenset([self.option_id])
+        return frozenset()
+
+    @classmethod
+    def for_options(cls, attempt_id, question_id, option_ids, **fields):
+        """
+        An unsaved answer choosing ``option_ids``: a single option is kept
+        in ``option``, several are packed into ``option_ids``.
+        """
+        if len(option_ids) == 1:
+            return cls(attempt_id=attempt_id, question_id=question_id, option_id=option_ids[0], option_ids=b'', **fields)
+        return cls(
+            attempt_id=attempt_id, question_id=question_id, option=None, option_ids=pack_option_ids(option_ids), **fields
+        )
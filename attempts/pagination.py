@@ -0,0 +1,14 @@
+from rest_framework.pagination import CursorPagination
+
+
+class AttemptHistoryPagination(CursorPagination):
+    """
+    Keyset pagination for a user's attempts, most recent first.
+
+    Filtered to one quiz, each page is a range scan on the
+    (user, quiz, started_at) index.
+    """
+    ordering = ('-started_at', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
@@ -0,0 +1,173 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework.exceptions import PermissionDenied
+from quizzes.snapshots import get_snapshot
+from .grading import grade
+from .journal import answer_journal
+from .models import Attempt, AttemptAnswer
+from .signals import attempt_submitted, attempts_regraded
+
+
+def submit_attempt(attempt, snapshot=None):
+    """
+    Score an in-progress attempt and mark it submitted.
+
+    The answer key is read once from the quiz snapshot, every answer is
+    graded in memory, then ``credit`` and ``is_correct`` are written with
+    one bulk_update and the score with one update. The status change is guarded so an
+    attempt is only scored once. Sends attempt_submitted before committing.
+
+    The attempt's answers still in the write-behind journal are written
+    first.
+    """
+    journal = answer_journal()
+    if journal:
+        journal.flush_attempt(attempt.id)
+
+    if snapshot is None:
+        snapshot = get_snapshot(attempt.quiz_id, getattr(attempt, 'quiz_version', None))
+
+    answers = list(
+        AttemptAnswer.objects.filter(attempt_id=attempt.id).only('id', 'question_id', 'option_id', 'option_ids')
+    )
+    score, points = grade(answers, snapshot)
+    submitted_at = timezone.now()
+
+    with transaction.atomic():
+        updated = Attempt.objects.filter(id=attempt.id, status='in_progress').update(
+            status='submitted',
+            score=score,
+            points=points,
+            submitted_at=submitted_at
+        )
+        if not updated:
+            raise PermissionDenied("Attempt has already been submitted.")
+
+        AttemptAnswer.objects.bulk_update(answers, ['credit', 'is_correct'], batch_size=1000)
+
+        attempt.status = 'submitted'
+        attempt.score = score
+        attempt.points = points
+        attempt.submitted_at = submitted_at
+        attempt_submitted.send(sender=Attempt, attempt=attempt, answers=answers, snapshot=snapshot)
+
+    return attempt
+
+
+def expire_attempts(batch_size=200, now=None):
+    """
+    Submit and score in-progress attempts whose deadline has passed.
+
+    Expired attempts are read ``batch_size`` at a time from the
+    (status, deadline) index, oldest deadline first, and each is submitted
+    as if the student had done so. An attempt the student submits
+    concurrently is skipped. Returns the number of attempts submitted.
+    """
+    now = now or timezone.now()
+    expired = (
+        Attempt.objects
+        .filter(status='in_progress', deadline__lte=now)
+        .annotate(quiz_version=F('quiz__content_version'))
+        .only('id', 'user_id', 'quiz_id', 'status', 'question_order', 'deadline')
+        .order_by('deadline', 'id')
+    )
+
+    # Every attempt in a batch leaves the in_progress filter, submitted
+    # here or concurrently, so the next batch starts after it.
+    submitted = 0
+    while True:
+        batch = list(expired[:batch_size])
+        if not batch:
+            return submitted
+        for attempt in batch:
+            try:
+                submit_attempt(attempt)
+                submitted += 1
+            except PermissionDenied:
+                pass
+
+
+def regrade_attempts(quiz_ids=None, question_ids=None, chunk_size=500):
+    """
+    Re-score submitted attempts against the current answer keys.
+
+    Attempts are streamed in keyset-paginated chunks ordered by id, so
+    memory use depends on ``chunk_size`` and not on the size of the table.
+    Each quiz's snapshot is loaded once and reused across chunks. Only
+    answers and attempts whose grade changed are written, one bulk_update
+    per chunk for each, and reported through attempts_regraded.
+
+    quiz_ids / question_ids:
+        Limit the run to attempts on those quizzes, or with an answer to
+        one of those questions.
+
+    Yields a dict of running totals after each chunk.
+    """
+    attempts = Attempt.objects.filter(status='submitted')
+    if quiz_ids:
+        attempts = attempts.filter(quiz_id__in=quiz_ids)
+    if question_ids:
+        attempts = attempts.filter(
+            id__in=AttemptAnswer.objects.filter(question_id__in=question_ids).values('attempt_id')
+        )
+
+    snapshots = {}
+    totals = {'attempts': 0, 'answers': 0, 'changed_answers': 0, 'changed_scores': 0}
+    last_id = 0
+
+    while True:
+        chunk = list(
+            attempts.filter(id__gt=last_id).order_by('id').only('id', 'quiz_id', 'score', 'points')[:chunk_size]
+        )
+        if not chunk:
+            break
+        last_id = chunk[-1].id
+
+        answers_by_attempt = {}
+        answers = AttemptAnswer.objects.filter(
+            attempt_id__in=[attempt.id for attempt in chunk]
+        ).only('id', 'attempt_id', 'question_id', 'option_id', 'option_ids', 'credit', 'is_correct')
+        for answer in answers:
+            answers_by_attempt.setdefault(answer.attempt_id, []).append(answer)
+
+        changed_answers = []
+        changed_attempts = []
+        answer_changes = []
+        score_changes = []
+        for attempt in chunk:
+            if attempt.quiz_id not in snapshots:
+                snapshots[attempt.quiz_id] = get_snapshot(attempt.quiz_id)
+
+            attempt_answers = answers_by_attempt.get(attempt.id, [])
+            previous = [(answer.is_correct, answer.credit) for answer in attempt_answers]
+            score, points = grade(attempt_answers, snapshots[attempt.quiz_id])
+
+            for answer, (was_correct, credit) in zip(attempt_answers, previous):
+                if answer.is_correct != was_correct or answer.credit != credit:
+                    changed_answers.append(answer)
+                if answer.is_correct != was_correct:
+                    answer_changes.append(
+                        (attempt.id, attempt.quiz_id, answer.question_id, bool(was_correct), answer.is_correct)
+                    )
+            if score != attempt.score:
+                score_changes.append((attempt.id, attempt.quiz_id, attempt.score or 0, score))
+            if score != attempt.score or points != attempt.points:
+                attempt.score = score
+                attempt.points = points
+                changed_attempts.append(attempt)
+
+            totals['answers'] += len(attempt_answers)
+
+        with transaction.atomic():
+            AttemptAnswer.objects.bulk_update(changed_answers, ['credit', 'is_correct'], batch_size=1000)
+            Attempt.objects.bulk_update(changed_attempts, ['score', 'points'], batch_size=1000)
+            if answer_changes or score_changes:
+                attempts_regraded.send(
+                    sender=Attempt, answer_changes=answer_changes, score_changes=score_changes
+                )
+
+        totals['attempts'] += len(chunk)
+        totals['changed_answers'] += len(changed_answers)
+        totals['changed_scores'] += len(changed_attempts)
+        yield dict(totals)
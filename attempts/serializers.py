@@ -1,8 +1,28 @@
+import random
+from django.utils import timezone
 from quizzes.models import Question, Quiz, Option
 from . models import Attempt, AttemptAnswer
 from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
 
-class StartAttemptSerializer(serializers.Serializer):
+class StartAttemptParamsSerializer(serializers.Serializer):
+    """
+    Start parameters with the quiz left as an id, for callers that look the
+    quiz up themselves (the async views cannot query during validation).
+    """
+    quiz_id = serializers.IntegerField()
+    shuffle = serializers.BooleanField(default=False)
+    seed = serializers.IntegerField(required=False, min_value=0)
+
+    def validate(self, data):
+        # A seed always implies a shuffled order; shuffling without one
+        # picks a seed so the order can be reproduced later.
+        if data.get('shuffle') and 'seed' not in data:
+            data['seed'] = random.getrandbits(32)
+        return data
+
+
+class StartAttemptSerializer(StartAttemptParamsSerializer):
     quiz_id = serializers.PrimaryKeyRelatedField(
         queryset=Quiz.objects.all()
     )
@@ -13,6 +33,92 @@ class AttemptSerializer(serializers.ModelSerializer):
         model = Attempt
         fields = ['id']
 
+class AttemptResultSerializer(serializers.ModelSerializer):
+    total_question = serializers.IntegerField(source='question_count', read_only=True)
+
+    class Meta:
+        model = Attempt
+        fields = [
+            'id',
+            'status',
+            'score',
+            'points',
+            'total_question',
+            'submitted_at'
+        ]
+
+class AttemptHistorySerializer(serializers.ModelSerializer):
+    total_question = serializers.IntegerField(source='question_count', read_only=True)
+
+    class Meta:
+        model = Attempt
+        fields = [
+            'id',
+            'quiz',
+            'status',
+            'score',
+            'points',
+            'total_question',
+            'started_at',
+            'deadline',
+            'submitted_at'
+        ]
+
+class AttemptStateSerializer(serializers.ModelSerializer):
+    """
+    An attempt as needed to resume it.
+
+    Fields:
+        - attempt_id: Primary key of the attempt.
+        - answers: The answered questions, in the attempt's order, each with
+          the ids of the chosen options.
+        - current_question: The next question to answer with its options,
+          null once every question has been served or the attempt is
+          submitted.
+        - remaining_seconds: Whole seconds left before the deadline, null for
+          untimed attempts.
+    """
+    attempt_id = serializers.IntegerField(source='id', read_only=True)
+    total_question = serializers.IntegerField(source='question_count', read_only=True)
+    answers = serializers.SerializerMethodField()
+    current_question = serializers.SerializerMethodField()
+    remaining_seconds = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Attempt
+        fields = [
+            'attempt_id',
+            'quiz',
+            'status',
+            'score',
+            'points',
+            'total_question',
+            'answers',
+            'current_question',
+            'deadline',
+            'remaining_seconds',
+            'submitted_at'
+        ]
+
+    def get_answers(self, obj):
+        answers = self.context['answers']
+        return [
+            {'question_id': question_id, 'answer_ids': answers[question_id]}
+            for question_id in obj.question_ids
+            if question_id in answers
+        ]
+
+    def get_current_question(self, obj):
+        question = self.context['question']
+        if question is None:
+            return None
+        return StudentQuestionSerializer(question, context={'attempt': obj}).data
+
+    def get_remaining_seconds(self, obj):
+        if obj.deadline is None:
+            return None
+        return max(int((obj.deadline - timezone.now()).total_seconds()), 0)
+
 class StudentOptionSerializer(serializers.ModelSerializer):
     # id = serializers.UUIDField(read_only=True)
     class Meta:
@@ -39,8 +145,41 @@ class StudentQuestionSerializer(serializers.ModelSerializer):
             return attempt.id
         return None
 
+def student_question_json(snapshot, question_id, attempt_id=None):
+    """
+    StudentQuestionSerializer output for a snapshot question as JSON
+    bytes, identical to what the API would render.
+
+    Everything but attempt_id is the same for every student, so it is
+    rendered once per question and content version, kept in
+    ``snapshot.rendered``, and each response splices the attempt id in.
+    """
+    key = ('student_question', question_id)
+    prefix = snapshot.rendered.get(key)
+    if prefix is None:
+        question = snapshot.questions[question_id]
+        body = JSONRenderer().render({
+            'id': question['id'],
+            'question_type': question['question_type'],
+            'question_text': question['question_text'],
+            'options': [{'id': option['id'], 'option_text': option['option_text']} for option in question['options']],
+        })
+        prefix = snapshot.rendered[key] = body[:-1] + b',"attempt_id":'
+    return prefix + (b'null' if attempt_id is None else b'%d' % attempt_id) + b'}'
+
 class AttemptAnswerSerializer(serializers.Serializer):
-    answer_id = serializers.UUIDField()
+    """
+    One option as ``answer_id``, or several for an MCQ question as
+    ``answer_ids``. Validated data holds the ids as ``option_ids``.
+    """
+    answer_id = serializers.IntegerField(required=False)
+    answer_ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+
+    def validate(self, data):
+        if ('answer_id' in data) == ('answer_ids' in data):
+            raise serializers.ValidationError("Provide either answer_id or answer_ids.")
+        data['option_ids'] = [data['answer_id']] if 'answer_id' in data else list(dict.fromkeys(data['answer_ids']))
+        return data
 
     # def validate(self, data):
     #     # Check question exists
@@ -0,0 +1,289 @@
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.http import Http404
+from django.utils import timezone
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from quizzes.snapshots import aget_snapshot, get_snapshot
+from .journal import answer_journal
+from .models import Attempt, AttemptAnswer, build_question_order
+from .scoring import submit_attempt
+
+
+def load_attempt(user, attempt_id, *fields):
+    """
+    Load the user's attempt together with its quiz's content version in
+    one joined query, or raise Http404.
+
+    Only ``fields`` (plus id and quiz_id) are loaded; the version is
+    available as ``attempt.quiz_version``.
+    """
+    attempt = attempt_queryset(user, attempt_id, fields).first()
+    if attempt is None:
+        raise Http404
+    return attempt
+
+
+async def aload_attempt(user, attempt_id, *fields):
+    attempt = await attempt_queryset(user, attempt_id, fields).afirst()
+    if attempt is None:
+        raise Http404
+    return attempt
+
+
+def attempt_queryset(user, attempt_id, fields):
+    return (
+        Attempt.objects
+        .filter(id=attempt_id, user=user)
+        .annotate(quiz_version=F('quiz__content_version'))
+        .only('id', 'quiz_id', *fields)
+    )
+
+
+def start_attempt(user, quiz, snapshot, seed=None):
+    """
+    Return ``(attempt, created)``: the user's in-progress attempt on the
+    quiz, or a new one when there is none.
+
+    An in-progress attempt past its deadline is submitted first. At most
+    one attempt per user and quiz is in progress (a partial unique
+    constraint), so a concurrent start that loses the race to create it
+    gets the winner's attempt.
+    """
+    current = Attempt.objects.filter(user=user, quiz=quiz, status='in_progress')
+    attempt = current.first()
+    if attempt is not None:
+        if not attempt.is_expired():
+            return attempt, False
+        submit_expired(attempt)
+
+    try:
+        with transaction.atomic():
+            attempt = Attempt.objects.create(**new_attempt_fields(user, quiz, snapshot, seed))
+    except IntegrityError:
+        return current.get(), False
+    return attempt, True
+
+
+async def astart_attempt(user, quiz, snapshot, seed=None):
+    current = Attempt.objects.filter(user=user, quiz=quiz, status='in_progress')
+    attempt = await current.afirst()
+    if attempt is not None:
+        if not attempt.is_expired():
+            return attempt, False
+        await sync_to_async(submit_expired)(attempt)
+
+    try:
+        attempt = await Attempt.objects.acreate(**new_attempt_fields(user, quiz, snapshot, seed))
+    except IntegrityError:
+        return await current.aget(), False
+    return attempt, True
+
+
+def new_attempt_fields(user, quiz, snapshot, seed):
+    return {
+        'user': user,
+        'quiz': quiz,
+        'status': 'in_progress',
+        'question_order': build_question_order(snapshot.question_ids, seed),
+        'shuffle_seed': seed,
+        'deadline': Attempt.deadline_for(quiz),
+    }
+
+
+def submit_expired(attempt):
+    try:
+        submit_attempt(attempt)
+    except PermissionDenied:
+        # Submitted in the meantime, by the student or expire_attempts.
+        pass
+
+
+def load_attempt_state(user, attempt_id):
+    """
+    Everything needed to resume an attempt, in two queries with the quiz
+    snapshot cached: one for the attempt and one for its answers.
+
+    Returns ``(attempt, answers, current_question)``, where ``answers`` maps
+    each answered question id to the sorted ids of the chosen options.
+    Answers of an in-progress attempt still in the write-behind journal
+    are merged in.
+    """
+    attempt = load_attempt(
+        user, attempt_id, 'status', 'score', 'points', 'question_order', 'cursor', 'deadline', 'submitted_at'
+    )
+    snapshot = get_snapshot(attempt.quiz_id, attempt.quiz_version)
+    answers = {
+        answer.question_id: sorted(answer.selected_option_ids)
+        for answer in AttemptAnswer.objects.filter(attempt_id=attempt.id).only(
+            'id', 'question_id', 'option_id', 'option_ids'
+        )
+    }
+    journal = answer_journal()
+    if journal and attempt.status == 'in_progress':
+        for question_id, record in journal.pending(attempt.id).items():
+            # Questions deleted since are dropped, as flushing does.
+            if question_id in snapshot.questions:
+                answers[question_id] = sorted(record.get('options') or [record['option']])
+    current_question = next_question(attempt, snapshot) if attempt.status == 'in_progress' else None
+    return attempt, answers, current_question
+
+
+def load_answer_target(user, attempt_id, question_id, option_ids):
+    """
+    Validate attempt, question and options ownership.
+
+    The attempt is loaded in one joined query; the question and options are
+    then checked against the quiz snapshot, and the deadline against the
+    clock, in memory.
+
+    Returns ``(attempt, snapshot)``.
+    """
+    attempt = load_attempt(user, attempt_id, 'status', 'question_order', 'cursor', 'deadline')
+    snapshot = get_snapshot(attempt.quiz_id, attempt.quiz_version)
+    check_answer_target(attempt, snapshot, question_id, option_ids)
+    return attempt, snapshot
+
+
+async def aload_answer_target(user, attempt_id, question_id, option_ids):
+    attempt = await aload_attempt(user, attempt_id, 'status', 'question_order', 'cursor', 'deadline')
+    snapshot = await aget_snapshot(attempt.quiz_id, attempt.quiz_version)
+    check_answer_target(attempt, snapshot, question_id, option_ids)
+    return attempt, snapshot
+
+
+def check_answer_target(attempt, snapshot, question_id, option_ids):
+    if not all(snapshot.has_option(question_id, option_id) for option_id in option_ids):
+        raise Http404
+
+    if len(option_ids) > 1 and snapshot.questions[question_id]['question_type'] != 'MCQ':
+        raise ValidationError({'answer_ids': ['Only MCQ questions accept several options.']})
+
+    if attempt.status != 'in_progress':
+        raise PermissionDenied(f"Cannot update answers. Attempt has been {attempt.get_status_display().lower()}.")
+
+    # The deadline is loaded with the attempt, so expiry costs no query;
+    # expire_attempts submits the attempt later.
+    if attempt.is_expired():
+        raise PermissionDenied("Cannot update answers. The time limit has passed.")
+
+
+def save_answer(attempt, question_id, option_ids):
+    """
+    Insert or update the answer for a question in a single statement.
+    """
+    AttemptAnswer.objects.bulk_create(**answer_upsert(attempt, question_id, option_ids))
+
+
+async def asave_answer(attempt, question_id, option_ids):
+    await AttemptAnswer.objects.abulk_create(**answer_upsert(attempt, question_id, option_ids))
+
+
+def answer_upsert(attempt, question_id, option_ids):
+    return {
+        'objs': [AttemptAnswer.for_options(attempt.id, question_id, option_ids, answered_at=timezone.now())],
+        'update_conflicts': True,
+        'unique_fields': ['attempt', 'question'],
+        'update_fields': ['option', 'option_ids', 'answered_at'],
+    }
+
+
+def advance_cursor(attempt, question_id):
+    """
+    Move the attempt past the current question once it has been answered.
+
+    Answers to any other question (going back to change an answer) leave
+    the cursor where it is. The update is guarded on the cursor value so
+    concurrent answers to the same question advance it only once.
+    """
+    if attempt.current_question_id != question_id:
+        return
+
+    Attempt.objects.filter(id=attempt.id, cursor=attempt.cursor).update(cursor=F('cursor') + 1)
+    attempt.cursor += 1
+
+
+async def aadvance_cursor(attempt, question_id):
+    if attempt.current_question_id != question_id:
+        return
+
+    await Attempt.objects.filter(id=attempt.id, cursor=attempt.cursor).aupdate(cursor=F('cursor') + 1)
+    attempt.cursor += 1
+
+
+def skip_deleted_questions(attempt, snapshot):
+    """
+    Move ``attempt.cursor`` past questions deleted from the quiz since the
+    attempt started. Returns the cursor it started from when it moved,
+    otherwise None.
+    """
+    cursor = attempt.cursor
+    while attempt.current_question_id is not None and attempt.current_question_id not in snapshot.questions:
+        attempt.cursor += 1
+    return cursor if attempt.cursor != cursor else None
+
+
+def next_question(attempt, snapshot):
+    """
+    Return the snapshot question at the attempt's cursor, or None once the
+    end of the order has been reached.
+
+    Deleted questions are skipped, and the cursor saved past them so that
+    answering the question returned advances it.
+    """
+    cursor = skip_deleted_questions(attempt, snapshot)
+    if cursor is not None:
+        Attempt.objects.filter(id=attempt.id, cursor=cursor).update(cursor=attempt.cursor)
+
+    question_id = attempt.current_question_id
+    if question_id is None:
+        return None
+
+    return snapshot.questions[question_id]
+
+
+async def anext_question(attempt, snapshot):
+    cursor = skip_deleted_questions(attempt, snapshot)
+    if cursor is not None:
+        await Attempt.objects.filter(id=attempt.id, cursor=cursor).aupdate(cursor=attempt.cursor)
+
+    question_id = attempt.current_question_id
+    if question_id is None:
+        return None
+
+    return snapshot.questions[question_id]
+
+
+def answer_and_advance(user, attempt_id, question_id, option_ids):
+    """
+    Record an answer (a list of one option id, or several for an MCQ
+    question) and return ``(attempt, snapshot, next_question)``.
+
+    With the quiz snapshot cached this costs one query to load the attempt,
+    one for the upsert and one to advance the cursor. With
+    ATTEMPT_ANSWER_JOURNAL set the upsert is replaced by an append to the
+    answer journal, flushed to the table later in batches.
+    """
+    attempt, snapshot = load_answer_target(user, attempt_id, question_id, option_ids)
+    journal = answer_journal()
+    if journal:
+        journal.append(attempt.id, question_id, option_ids)
+    else:
+        save_answer(attempt, question_id, option_ids)
+    advance_cursor(attempt, question_id)
+    return attempt, snapshot, next_question(attempt, snapshot)
+
+
+async def aanswer_and_advance(user, attempt_id, question_id, option_ids):
+    """
+    Async answer_and_advance(). A journal append blocks on fsync, so it
+    runs in a worker thread that does not hold up other requests.
+    """
+    attempt, snapshot = await aload_answer_target(user, attempt_id, question_id, option_ids)
+    journal = answer_journal()
+    if journal:
+        await sync_to_async(journal.append, thread_sensitive=False)(attempt.id, question_id, option_ids)
+    else:
+        await asave_answer(attempt, question_id, option_ids)
+    await aadvance_cursor(attempt, question_id)
+    return attempt, snapshot, await anext_question(attempt, snapshot)
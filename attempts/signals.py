@@ -0,0 +1,14 @@
+from django.dispatch import Signal
+
+# Sent with ``attempt`` right after an attempt is created.
+attempt_started = Signal()
+
+# Sent with ``attempt``, its graded ``answers`` and the quiz ``snapshot``
+# inside the transaction that marks the attempt submitted.
+attempt_submitted = Signal()
+
+# Sent by regrading inside the transaction that writes each chunk, with
+# ``answer_changes`` as (attempt_id, quiz_id, question_id, was_correct,
+# is_correct) tuples and ``score_changes`` as (attempt_id, quiz_id,
+# old_score, new_score) tuples.
+attempts_regraded = Signal()
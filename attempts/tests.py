@@ -1,3 +1,793 @@
-from django.test import TestCase
+import importlib
+import os
+import tempfile
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from quizzes.models import Quiz, Question, Option
+from quizzes.snapshots import get_snapshot, snapshot_cache
+from .grading import QuestionKey, STRATEGIES, single_choice
+from .journal import AnswerJournal
+from .models import Attempt, AttemptAnswer, build_question_order, pack_option_ids
+from .scoring import expire_attempts, regrade_attempts
+from .serializers import StudentQuestionSerializer
+from .signals import attempt_started
 
-# Create your tests here.
+
+class AttemptAnswerViewTests(TestCase):
+    # Attempt with quiz version, upsert and cursor advance.
+    ANSWER_QUERY_BUDGET = 3
+
+    def setUp(self):
+        cache.clear()
+        snapshot_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username='student', email='student@example.com', password='pass'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.quiz = Quiz.objects.create(quiz_name='Haematology')
+        self.questions = []
+        for number in range(3):
+            question = Question.objects.create(
+                quiz=self.quiz,
+                question_type='OBJ',
+                question_text=f'Question {number}',
+            )
+            Option.objects.create(question=question, option_text='Right', is_correct=True)
+            Option.objects.create(question=question, option_text='Wrong')
+            self.questions.append(question)
+
+        self.attempt = Attempt.objects.create(
+            user=self.user,
+            quiz=self.quiz,
+            question_order=build_question_order(get_snapshot(self.quiz.id).question_ids)
+        )
+
+    def answer(self, question, option):
+        url = reverse('attempt-answer', args=[self.attempt.id, question.id])
+        return self.client.put(url, {'answer_id': option.id}, format='json')
+
+    def test_answer_returns_next_question_with_options(self):
+        first, second = self.questions[:2]
+        response = self.answer(first, first.options.first())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['id'], second.id)
+        self.assertEqual(response.json()['attempt_id'], self.attempt.id)
+        self.assertEqual(len(response.json()['options']), 2)
+
+
+    def test_next_question_matches_the_serializer_byte_for_byte(self):
+        first, second = self.questions[:2]
+        second.question_text = 'Which stain shows “Auer rods”?\u2028Pick one.'
+        second.save()
+        self.quiz.bump_content_version()
+
+        response = self.answer(first, first.options.first())
+        question = get_snapshot(self.quiz.id).questions[second.id]
+
+        self.assertEqual(
+            response.content,
+            JSONRenderer().render(StudentQuestionSerializer(question, context={'attempt': self.attempt}).data)
+        )
+    def test_answer_stays_within_query_budget(self):
+        question = self.questions[0]
+        option = question.options.first()
+
+        for _ in range(2):
+            with CaptureQueriesContext(connection) as queries:
+                self.answer(question, option)
+            self.assertLessEqual(len(queries), self.ANSWER_QUERY_BUDGET)
+
+    def test_reanswering_updates_the_existing_row(self):
+        question = self.questions[0]
+        right, wrong = question.options.order_by('id')
+
+        self.answer(question, right)
+        self.answer(question, wrong)
+
+        answer = AttemptAnswer.objects.get(attempt=self.attempt, question=question)
+        self.assertEqual(answer.option_id, wrong.id)
+
+    def test_option_from_another_question_is_rejected(self):
+        other_option = self.questions[1].options.first()
+        response = self.answer(self.questions[0], other_option)
+
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(AttemptAnswer.objects.exists())
+
+    def test_several_options_need_an_mcq_question(self):
+        question = self.questions[0]
+        url = reverse('attempt-answer', args=[self.attempt.id, question.id])
+        response = self.client.put(url, {'answer_ids': [option.id for option in question.options.all()]}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('answer_ids', response.data)
+
+    def test_submitted_attempt_is_read_only(self):
+        Attempt.objects.filter(id=self.attempt.id).update(status='submitted')
+        question = self.questions[0]
+        response = self.answer(question, question.options.first())
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_expired_attempt_rejects_answers_without_extra_queries(self):
+        Attempt.objects.filter(id=self.attempt.id).update(deadline=timezone.now() - timedelta(seconds=1))
+        question = self.questions[0]
+        option = question.options.first()
+
+        with self.assertNumQueries(1):
+            response = self.answer(question, option)
+
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(AttemptAnswer.objects.exists())
+
+    def test_last_answer_completes_the_quiz(self):
+        for question in self.questions:
+            response = self.answer(question, question.options.first())
+
+        self.assertEqual(response.data, {"detail": "Quiz completed"})
+
+    def test_going_back_keeps_the_cursor(self):
+        first, second, third = self.questions
+        self.answer(first, first.options.first())
+        self.answer(second, second.options.first())
+
+        response = self.answer(first, first.options.last())
+
+        self.assertEqual(response.json()['id'], third.id)
+
+
+class AnswerJournalTests(AttemptAnswerViewTests):
+    # Attempt with quiz version and cursor advance; the answer itself is
+    # only appended to the journal.
+    ANSWER_QUERY_BUDGET = 2
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'answers.journal')
+        settings = override_settings(ATTEMPT_ANSWER_JOURNAL=self.path)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_reanswering_updates_the_existing_row(self):
+        question = self.questions[0]
+        right, wrong = question.options.order_by('id')
+        self.answer(question, right)
+        AnswerJournal(self.path).flush()
+        self.answer(question, wrong)
+        AnswerJournal(self.path).flush()
+
+        answer = AttemptAnswer.objects.get(attempt=self.attempt, question=question)
+        self.assertEqual(answer.option_id, wrong.id)
+
+    def test_answers_are_written_behind(self):
+        question = self.questions[0]
+        self.answer(question, question.options.first())
+
+        self.assertFalse(AttemptAnswer.objects.exists())
+        self.assertEqual(AnswerJournal(self.path).flush(), 1)
+        self.assertTrue(AttemptAnswer.objects.filter(question=question).exists())
+
+    def test_submit_writes_the_attempts_answers(self):
+        for question in self.questions:
+            self.answer(question, question.options.get(is_correct=True))
+        other = Attempt.objects.create(user=self.user, quiz=Quiz.objects.create(quiz_name='Other'))
+        AnswerJournal(self.path).append(other.id, self.questions[0].id, [self.questions[0].options.first().id])
+
+        response = self.client.post(reverse('attempt-submit', args=[self.attempt.id]))
+
+        self.assertEqual(response.data['score'], 3)
+        # Other attempts' answers wait for the next flush.
+        self.assertFalse(AttemptAnswer.objects.filter(attempt=other).exists())
+        self.assertEqual(AnswerJournal(self.path).flush(), 1)
+        self.assertTrue(AttemptAnswer.objects.filter(attempt=other).exists())
+
+    def test_resume_includes_journaled_answers(self):
+        question = self.questions[0]
+        option = question.options.get(is_correct=True)
+        self.answer(question, option)
+
+        response = self.client.get(reverse('attempt-resume', args=[self.attempt.id]))
+
+        self.assertEqual(response.data['answers'], [{'question_id': question.id, 'answer_ids': [option.id]}])
+
+    def test_appends_after_a_torn_record_are_kept(self):
+        first, second = self.questions[:2]
+        self.answer(first, first.options.get(is_correct=True))
+        with open(self.path, 'ab') as live:
+            live.write(b'{"attempt":')
+        self.answer(second, second.options.get(is_correct=True))
+
+        with self.assertLogs('attempts.journal', 'WARNING'):
+            self.assertEqual(AnswerJournal(self.path).flush(), 2)
+        self.assertEqual(AttemptAnswer.objects.filter(attempt=self.attempt).count(), 2)
+
+    def test_acknowledged_answers_survive_a_crash(self):
+        first, second, third = self.questions
+        self.answer(first, first.options.get(is_correct=True))
+        self.answer(second, second.options.get(is_correct=True))
+
+        # The worker moves the journal aside, writes the answers and dies
+        # before deleting the segment.
+        journal = AnswerJournal(self.path)
+        journal.rotate()
+        journal.apply_segment()
+
+        # Meanwhile an answer is changed and another is acknowledged, then
+        # a request dies partway through appending.
+        self.answer(first, first.options.get(is_correct=False))
+        self.answer(third, third.options.get(is_correct=True))
+        with open(self.path, 'ab') as live:
+            live.write(b'{"attempt":')
+
+        with self.assertLogs('attempts.journal', 'WARNING'):
+            AnswerJournal(self.path).flush()
+
+        answers = dict(AttemptAnswer.objects.values_list('question_id', 'option_id'))
+        self.assertEqual(answers, {
+            first.id: first.options.get(is_correct=False).id,
+            second.id: second.options.get(is_correct=True).id,
+            third.id: third.options.get(is_correct=True).id,
+        })
+        self.assertFalse(os.path.exists(journal.segment))
+
+
+class StartAttemptViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        snapshot_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username='student', email='student@example.com', password='pass'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.quiz = Quiz.objects.create(quiz_name='Microbiology')
+        for number in range(10):
+            question = Question.objects.create(
+                quiz=self.quiz,
+                question_type='OBJ',
+                question_text=f'Question {number}',
+            )
+            Option.objects.create(question=question, option_text='Right', is_correct=True)
+
+    def start(self, **data):
+        return self.client.post(reverse('start-attempt'), {'quiz_id': self.quiz.id, **data}, format='json')
+
+    def test_order_follows_question_ids_by_default(self):
+        response = self.start()
+        attempt = Attempt.objects.get()
+        question_ids = list(self.quiz.questions.order_by('id').values_list('id', flat=True))
+
+        self.assertEqual(attempt.question_ids, question_ids)
+        self.assertEqual(response.json()['id'], question_ids[0])
+
+    def test_seeded_shuffle_is_reproducible(self):
+        self.start(seed=7)
+        Attempt.objects.update(status='submitted')
+        self.start(seed=7)
+        first, second = Attempt.objects.order_by('id')
+
+        self.assertEqual(first.question_ids, second.question_ids)
+        self.assertEqual(sorted(first.question_ids), sorted(self.quiz.questions.values_list('id', flat=True)))
+
+    def test_shuffle_without_seed_records_one(self):
+        self.start(shuffle=True)
+        attempt = Attempt.objects.get()
+
+        self.assertIsNotNone(attempt.shuffle_seed)
+        question_ids = get_snapshot(self.quiz.id).question_ids
+        self.assertEqual(attempt.question_order, build_question_order(question_ids, attempt.shuffle_seed))
+
+    def test_time_limit_sets_the_deadline(self):
+        self.start()
+        Attempt.objects.update(status='submitted')
+        Quiz.objects.filter(id=self.quiz.id).update(time_limit=600)
+        self.start()
+        untimed, timed = Attempt.objects.order_by('id')
+
+        self.assertIsNone(untimed.deadline)
+        self.assertAlmostEqual(timed.deadline - timed.started_at, timedelta(seconds=600), delta=timedelta(seconds=1))
+
+    def test_starting_again_returns_the_attempt_in_progress(self):
+        first = self.start()
+        attempt = Attempt.objects.get()
+        question = attempt.current_question_id
+        self.client.put(
+            reverse('attempt-answer', args=[attempt.id, question]),
+            {'answer_id': Option.objects.get(question_id=question).id},
+            format='json'
+        )
+
+        again = self.start()
+
+        self.assertEqual((first.status_code, again.status_code), (201, 200))
+        self.assertEqual(again.json()['attempt_id'], attempt.id)
+        self.assertEqual(again.json()['id'], attempt.question_at(1))
+        self.assertEqual(Attempt.objects.count(), 1)
+
+    def test_expired_attempt_is_submitted_before_starting_anew(self):
+        self.start()
+        Attempt.objects.update(deadline=timezone.now() - timedelta(seconds=1))
+
+        response = self.start()
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            list(Attempt.objects.order_by('id').values_list('status', flat=True)), ['submitted', 'in_progress']
+        )
+
+    def test_resume_returns_the_attempt_state(self):
+        Quiz.objects.filter(id=self.quiz.id).update(time_limit=600)
+        self.start()
+        attempt = Attempt.objects.get()
+        answered = attempt.question_ids[:3]
+        for question_id in answered:
+            self.client.put(
+                reverse('attempt-answer', args=[attempt.id, question_id]),
+                {'answer_id': Option.objects.get(question_id=question_id).id},
+                format='json'
+            )
+
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('attempt-resume', args=[attempt.id]))
+
+        self.assertEqual([answer['question_id'] for answer in response.data['answers']], answered)
+        self.assertEqual(
+            response.data['answers'][0]['answer_ids'], [Option.objects.get(question_id=answered[0]).id]
+        )
+        self.assertEqual(response.data['current_question']['id'], attempt.question_at(3))
+        self.assertEqual(len(response.data['current_question']['options']), 1)
+        self.assertTrue(590 <= response.data['remaining_seconds'] <= 600)
+
+    def test_deleted_questions_are_skipped(self):
+        self.start()
+        attempt = Attempt.objects.get()
+        first, deleted, shown, after = attempt.question_ids[:4]
+        self.client.put(
+            reverse('attempt-answer', args=[attempt.id, first]),
+            {'answer_id': Option.objects.get(question_id=first).id},
+            format='json'
+        )
+        self.client.delete(reverse('quiz-questions-detail', args=[self.quiz.id, deleted]))
+
+        response = self.client.get(reverse('attempt-resume', args=[attempt.id]))
+        self.assertEqual(response.data['current_question']['id'], shown)
+
+        response = self.client.put(
+            reverse('attempt-answer', args=[attempt.id, shown]),
+            {'answer_id': Option.objects.get(question_id=shown).id},
+            format='json'
+        )
+        self.assertEqual(response.json()['id'], after)
+
+    def test_resume_is_limited_to_own_attempts(self):
+        self.start()
+        other = get_user_model().objects.create_user(username='other', email='other@example.com')
+        self.client.force_authenticate(other)
+
+        response = self.client.get(reverse('attempt-resume', args=[Attempt.objects.get().id]))
+
+        self.assertEqual(response.status_code, 404)
+
+
+class AsyncAttemptViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        snapshot_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username='student', email='student@example.com', password='pass'
+        )
+        self.headers = {'authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+
+        self.quiz = Quiz.objects.create(quiz_name='Immunology')
+        self.right = []
+        for number in range(3):
+            question = Question.objects.create(
+                quiz=self.quiz,
+                question_type='OBJ',
+                question_text=f'Question {number}',
+            )
+            self.right.append(Option.objects.create(question=question, option_text='Right', is_correct=True))
+            Option.objects.create(question=question, option_text='Wrong')
+
+    async def request(self, method, name, *args, data=None):
+        return await getattr(self.async_client, method)(
+            reverse(name, args=args), data or {}, content_type='application/json', headers=self.headers
+        )
+
+    async def test_start_answer_and_submit(self):
+        response = await self.request('post', 'async-start-attempt', data={'quiz_id': self.quiz.id})
+        self.assertEqual(response.status_code, 201)
+        attempt_id = response.json()['attempt_id']
+
+        for option in self.right:
+            response = await self.request(
+                'put', 'async-attempt-answer', attempt_id, option.question_id, data={'answer_id': option.id}
+            )
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'detail': 'Quiz completed'})
+
+        response = await self.request('post', 'async-attempt-submit', attempt_id)
+        self.assertEqual(response.json()['score'], 3)
+        self.assertEqual(response.json()['total_question'], 3)
+
+        response = await self.request('post', 'async-attempt-submit', attempt_id)
+        self.assertEqual(response.status_code, 403)
+
+    async def test_errors_match_the_sync_views(self):
+        response = await self.request('post', 'async-start-attempt', data={'quiz_id': 0})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('quiz_id', response.json())
+
+        response = await self.request('put', 'async-attempt-answer', 0, 0, data={'answer_id': 1})
+        self.assertEqual(response.status_code, 404)
+
+        self.headers = {}
+        response = await self.request('post', 'async-start-attempt', data={'quiz_id': self.quiz.id})
+        self.assertEqual(response.status_code, 401)
+
+
+class SubmitAttemptViewTests(TestCase):
+    # Attempt with quiz version, answers, status update and bulk_update,
+    # an insert and an update for each of the three analytics rollups, the
+    # user's progress update, plus the savepoint pair TestCase turns the
+    # atomic block into.
+    SUBMIT_QUERY_BUDGET = 13
+
+    def setUp(self):
+        cache.clear()
+        snapshot_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username='student', email='student@example.com', password='pass'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.quiz = Quiz.objects.create(quiz_name='Chemical pathology')
+        self.right = []
+        self.wrong = []
+        for number in range(20):
+            question = Question.objects.create(
+                quiz=self.quiz,
+                question_type='OBJ',
+                question_text=f'Question {number}',
+            )
+            self.right.append(Option.objects.create(question=question, option_text='Right', is_correct=True))
+            self.wrong.append(Option.objects.create(question=question, option_text='Wrong'))
+
+        self.attempt = Attempt.objects.create(
+            user=self.user,
+            quiz=self.quiz,
+            question_order=build_question_order(get_snapshot(self.quiz.id).question_ids)
+        )
+        attempt_started.send(sender=Attempt, attempt=self.attempt)
+
+    def submit(self):
+        return self.client.post(reverse('attempt-submit', args=[self.attempt.id]))
+
+    def test_submit_scores_every_answer(self):
+        chosen = self.right[:12] + self.wrong[12:18]
+        AttemptAnswer.objects.bulk_create(
+            AttemptAnswer(attempt=self.attempt, question_id=option.question_id, option=option)
+            for option in chosen
+        )
+
+        with self.assertNumQueries(self.SUBMIT_QUERY_BUDGET):
+            response = self.submit()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['score'], 12)
+        self.assertEqual(response.data['points'], 12.0)
+        self.assertEqual(response.data['total_question'], 20)
+        self.assertEqual(AttemptAnswer.objects.filter(is_correct=True).count(), 12)
+        self.assertEqual(AttemptAnswer.objects.filter(is_correct=False).count(), 6)
+
+    def test_multi_select_answer_needs_every_correct_option(self):
+        question = Question.objects.create(quiz=self.quiz, question_type='MCQ', question_text='Pick two')
+        first, second = (
+            Option.objects.create(question=question, option_text=text, is_correct=True) for text in 'AB'
+        )
+        Option.objects.create(question=question, option_text='C')
+        self.quiz.bump_content_version()
+        AttemptAnswer.objects.bulk_create([
+            AttemptAnswer(attempt=self.attempt, question=question, option_ids=pack_option_ids([second.id, first.id])),
+            AttemptAnswer(attempt=self.attempt, question_id=self.right[0].question_id,
+                          option_ids=pack_option_ids([self.right[0].id, self.wrong[0].id])),
+        ])
+
+        self.assertEqual(self.submit().data['score'], 1)
+
+    @override_settings(MCQ_GRADING_STRATEGY='proportional')
+    def test_multi_select_answer_earns_partial_credit(self):
+        question = Question.objects.create(quiz=self.quiz, question_type='MCQ', question_text='Pick two')
+        first, _ = (Option.objects.create(question=question, option_text=text, is_correct=True) for text in 'AB')
+        wrong = Option.objects.create(question=question, option_text='C')
+        self.quiz.bump_content_version()
+        self.attempt.question_order = build_question_order(get_snapshot(self.quiz.id).question_ids)
+        self.attempt.save()
+
+        url = reverse('attempt-answer', args=[self.attempt.id, question.id])
+        self.client.put(url, {'answer_ids': [first.id, wrong.id]}, format='json')
+        self.assertEqual(AttemptAnswer.objects.get(question=question).selected_option_ids, {first.id, wrong.id})
+        self.client.put(url, {'answer_ids': [first.id]}, format='json')
+        response = self.submit()
+
+        self.assertEqual(response.data['score'], 0)
+        self.assertEqual(response.data['points'], 0.5)
+        answer = AttemptAnswer.objects.get(question=question)
+        self.assertEqual(answer.credit, 0.5)
+        self.assertFalse(answer.is_correct)
+
+    def test_abandoned_attempts_are_closed(self):
+        Attempt.objects.filter(id=self.attempt.id).update(status='abandoned')
+
+        response = self.submit()
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.data['detail'], "Attempt has already been abandoned.")
+
+    def test_legacy_answer_text_is_converted(self):
+        migration = importlib.import_module('attempts.migrations.0006_answer_option')
+
+        self.assertEqual(migration.parse_option_id('Option object (12)'), 12)
+        self.assertEqual(migration.parse_option_id('12'), 12)
+        self.assertIsNone(migration.parse_option_id('Option object'))
+
+    def test_expired_attempts_are_submitted_in_batches(self):
+        past = timezone.now() - timedelta(minutes=1)
+        Attempt.objects.filter(id=self.attempt.id).update(deadline=past)
+        AttemptAnswer.objects.bulk_create(
+            AttemptAnswer(attempt=self.attempt, question_id=option.question_id, option=option)
+            for option in self.right[:5]
+        )
+        # One attempt in progress per quiz, so the rest are on other quizzes.
+        quizzes = [Quiz.objects.create(quiz_name=f'Other quiz {number}') for number in range(4)]
+        running = Attempt.objects.create(
+            user=self.user, quiz=quizzes[0], deadline=timezone.now() + timedelta(minutes=1)
+        )
+        untimed = Attempt.objects.create(user=self.user, quiz=quizzes[1])
+        expired = [Attempt.objects.create(user=self.user, quiz=quiz, deadline=past) for quiz in quizzes[2:]]
+
+        self.assertEqual(expire_attempts(batch_size=2), 3)
+
+        self.attempt.refresh_from_db()
+        self.assertEqual((self.attempt.status, self.attempt.score), ('submitted', 5))
+        self.assertEqual(
+            dict(Attempt.objects.values_list('id', 'status')),
+            {
+                self.attempt.id: 'submitted', running.id: 'in_progress', untimed.id: 'in_progress',
+                expired[0].id: 'submitted', expired[1].id: 'submitted',
+            }
+        )
+        self.assertEqual(expire_attempts(), 0)
+
+    def test_attempt_is_only_submitted_once(self):
+        self.submit()
+        response = self.submit()
+
+        self.assertEqual(response.status_code, 403)
+
+    def edit_question(self, option, correct='Right'):
+        # PUT the question back with its options, ``correct`` marked right.
+        return self.client.put(
+            reverse('quiz-questions-detail', args=[self.quiz.id, option.question_id]),
+            {
+                'question_type': 'OBJ',
+                'question_text': option.question.question_text,
+                'options': [{'option_text': text, 'is_correct': text == correct} for text in ('Right', 'Wrong')],
+            },
+            format='json'
+        )
+
+    def test_question_edits_keep_answered_options(self):
+        AttemptAnswer.objects.create(attempt=self.attempt, question_id=self.right[0].question_id, option=self.right[0])
+        self.submit()
+
+        response = self.edit_question(self.right[0])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(AttemptAnswer.objects.get().option_id, self.right[0].id)
+        self.assertEqual(
+            set(Option.objects.filter(question_id=self.right[0].question_id).values_list('id', flat=True)),
+            {self.right[0].id, self.wrong[0].id}
+        )
+
+        response = self.client.patch(
+            reverse('quiz-questions-detail', args=[self.quiz.id, self.right[0].question_id]),
+            {'options': [{'option_text': 'Replacement', 'is_correct': True}]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(Option.objects.filter(id=self.right[0].id).exists())
+
+    def test_answered_questions_can_be_deleted(self):
+        question_id = self.right[0].question_id
+        AttemptAnswer.objects.create(attempt=self.attempt, question_id=question_id, option=self.right[0])
+
+        response = self.client.delete(reverse('quiz-questions-detail', args=[self.quiz.id, question_id]))
+
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(AttemptAnswer.objects.exists())
+        self.assertFalse(Option.objects.filter(question_id=question_id).exists())
+
+    def test_answered_quizzes_can_be_deleted(self):
+        AttemptAnswer.objects.create(attempt=self.attempt, question_id=self.right[0].question_id, option=self.right[0])
+        self.submit()
+
+        response = self.client.delete(reverse('quiz-detail', args=[self.quiz.id]))
+
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Attempt.objects.exists())
+        self.assertFalse(Option.objects.exists())
+
+    def test_regrade_follows_answer_key_changes(self):
+        chosen = self.right[:10] + self.wrong[10:]
+        AttemptAnswer.objects.bulk_create(
+            AttemptAnswer(attempt=self.attempt, question_id=option.question_id, option=option)
+            for option in chosen
+        )
+        self.submit()
+
+        # The key for the last question flips from "Right" to "Wrong".
+        Option.objects.filter(id=self.right[-1].id).update(is_correct=False)
+        Option.objects.filter(id=self.wrong[-1].id).update(is_correct=True)
+        self.quiz.bump_content_version()
+        *_, totals = regrade_attempts(question_ids=[self.right[-1].question_id], chunk_size=1)
+
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.score, 11)
+        self.assertEqual(totals['changed_answers'], 1)
+        self.assertEqual(totals['changed_scores'], 1)
+
+    def test_regrade_after_fixing_the_key_through_the_api(self):
+        chosen = self.right[:10] + self.wrong[10:]
+        AttemptAnswer.objects.bulk_create(
+            AttemptAnswer(attempt=self.attempt, question_id=option.question_id, option=option)
+            for option in chosen
+        )
+        self.submit()
+
+        response = self.edit_question(self.right[-1], correct='Wrong')
+        self.assertEqual(response.status_code, 200)
+        list(regrade_attempts(question_ids=[self.right[-1].question_id]))
+
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.score, 11)
+        self.assertEqual(AttemptAnswer.objects.get(question_id=self.wrong[-1].question_id).option_id, self.wrong[-1].id)
+
+
+class GradingStrategyTests(SimpleTestCase):
+    def setUp(self):
+        # Options 1 and 2 are correct, 3 and 4 are not.
+        self.key = QuestionKey({
+            'question_type': 'MCQ',
+            'options': [{'id': option_id, 'is_correct': option_id < 3} for option_id in (1, 2, 3, 4)],
+        })
+
+    def credit(self, strategy, *option_ids):
+        return STRATEGIES[strategy](self.key.mask(option_ids), self.key)
+
+    def test_all_or_nothing(self):
+        self.assertEqual(self.credit('all_or_nothing', 1, 2), 1.0)
+        self.assertEqual(self.credit('all_or_nothing', 1), 0.0)
+        self.assertEqual(self.credit('all_or_nothing', 1, 2, 3), 0.0)
+
+    def test_proportional(self):
+        self.assertEqual(self.credit('proportional', 1), 0.5)
+        self.assertEqual(self.credit('proportional', 1, 2, 3), 0.5)
+        self.assertEqual(self.credit('proportional', 1, 3, 4), 0.0)
+
+    def test_negative(self):
+        self.assertEqual(self.credit('negative', 1, 2), 1.0)
+        self.assertEqual(self.credit('negative', 1, 2, 3, 4), 0.0)
+        self.assertEqual(self.credit('negative', 3, 4), -1.0)
+
+    def test_single_choice_takes_one_correct_option(self):
+        self.assertEqual(single_choice(self.key.mask([2]), self.key), 1.0)
+        self.assertEqual(single_choice(self.key.mask([1, 2]), self.key), 0.0)
+        self.assertEqual(single_choice(self.key.mask([]), self.key), 0.0)
+
+
+class AttemptHistoryViewTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='student', email='student@example.com', password='pass'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.quizzes = [Quiz.objects.create(quiz_name=f'Quiz {number}') for number in range(2)]
+        self.attempts = [
+            Attempt.objects.create(user=self.user, quiz=self.quizzes[number % 2], status='submitted')
+            for number in range(5)
+        ]
+        other = get_user_model().objects.create_user(username='other', email='other@example.com')
+        Attempt.objects.create(user=other, quiz=self.quizzes[0])
+
+    def test_lists_own_attempts_most_recent_first(self):
+        response = self.client.get(reverse('attempt-history'), {'page_size': 3})
+        second = self.client.get(response.data['next'])
+
+        ids = [attempt['id'] for attempt in response.data['results'] + second.data['results']]
+        self.assertEqual(ids, [attempt.id for attempt in reversed(self.attempts)])
+        self.assertIsNone(second.data['next'])
+
+    def test_quiz_filter(self):
+        response = self.client.get(reverse('attempt-history'), {'quiz': self.quizzes[1].id})
+
+        self.assertEqual(
+            [attempt['id'] for attempt in response.data['results']],
+            [self.attempts[3].id, self.attempts[1].id]
+        )
+
+    def test_invalid_quiz_filter_is_rejected(self):
+        response = self.client.get(reverse('attempt-history'), {'quiz': 'abc'})
+
+        self.assertEqual(response.status_code, 400)
+
+
+class AttemptExportViewTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='student', email='student@example.com', password='pass'
+        )
+        staff = get_user_model().objects.create_user(
+            username='staff', email='staff@example.com', password='pass', is_staff=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(staff)
+
+        self.quiz = Quiz.objects.create(quiz_name='Blood banking')
+        questions = [
+            Question.objects.create(quiz=self.quiz, question_type='OBJ', question_text=f'Question {number}')
+            for number in range(5)
+        ]
+        for _ in range(4):
+            attempt = Attempt.objects.create(user=self.user, quiz=self.quiz, status='submitted')
+            AttemptAnswer.objects.bulk_create(
+                AttemptAnswer(attempt=attempt, question=question) for question in questions
+            )
+
+    def export(self, **params):
+        response = self.client.get(reverse('attempt-export'), params)
+        return b''.join(response.streaming_content).decode().splitlines()
+
+    def test_students_cannot_export(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(reverse('attempt-export'))
+        self.assertEqual(response.status_code, 403)
+
+        self.client.force_authenticate(None)
+        response = self.client.get(reverse('attempt-export'))
+        self.assertEqual(response.status_code, 401)
+
+    def test_csv_has_one_row_per_answer(self):
+        lines = self.export(file_format='csv', quiz=self.quiz.id)
+
+        self.assertEqual(lines[0].split(',')[0], 'attempt_id')
+        self.assertEqual(len(lines), 1 + 4 * 5)
+
+    def test_query_count_does_not_depend_on_rows(self):
+        # Attempts and their answers, one query each per chunk.
+        with self.assertNumQueries(2):
+            lines = self.export()
+        self.assertEqual(len(lines), 4)
+
+    def test_date_range_filter(self):
+        lines = self.export(since='2000-01-01T00:00:00Z', until='2000-01-02T00:00:00Z')
+
+        self.assertEqual(lines, [])
@@ -1,7 +1,14 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 
 urlpatterns = [
     path('', views.StartAttemptView.as_view(), name='start-attempt'),
+    path('history/', views.AttemptHistoryView.as_view(), name='attempt-history'),
+    path('export/', views.AttemptExportView.as_view(), name='attempt-export'),
     path('<int:attempt_id>/answer/<int:question_id>/', views.AttemptAnswerView.as_view(), name='attempt-answer'),
+    path('<int:attempt_id>/resume/', views.AttemptResumeView.as_view(), name='attempt-resume'),
+    path('<int:attempt_id>/submit/', views.SubmitAttemptView.as_view(), name='attempt-submit'),
+    path('async/', async_views.start_attempt, name='async-start-attempt'),
+    path('async/<int:attempt_id>/answer/<int:question_id>/', async_views.answer_question, name='async-attempt-answer'),
+    path('async/<int:attempt_id>/submit/', async_views.submit, name='async-attempt-submit'),
 ]
\ No newline at end of file
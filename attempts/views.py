@@ -1,76 +1,131 @@
-from django.shortcuts import get_object_or_404
-from .models import Attempt, AttemptAnswer
-from .serializers import StartAttemptSerializer, StudentQuestionSerializer, AttemptAnswerSerializer
-from quizzes.models import Question, Option
+from django.http import HttpResponse
+from quizzes.exports import filter_by_date
+from quizzes.serializers import ExportSerializer
+from quizzes.snapshots import get_snapshot
+from .exports import export_attempts
+from .signals import attempt_started
+from .models import Attempt
+from .pagination import AttemptHistoryPagination
+from .serializers import StartAttemptSerializer, student_question_json, AttemptAnswerSerializer, AttemptResultSerializer, AttemptHistorySerializer, AttemptStateSerializer
+from .scoring import submit_attempt
+from .services import answer_and_advance, load_attempt, load_attempt_state, next_question, start_attempt
 from rest_framework.response import Response
-from rest_framework import status
+from rest_framework import generics, status
 from rest_framework.views import APIView
 from rest_framework.decorators import api_view
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser
 
 class StartAttemptView(APIView):
+    """
+    Starts an attempt on a quiz, or picks up the user's attempt already in
+    progress on it (200 instead of 201) and returns its current question.
+    """
     def post(self, request):
         serializer = StartAttemptSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
         quiz = serializer.validated_data['quiz_id']
+        snapshot = get_snapshot(quiz.id, quiz.content_version)
 
-        attempt = Attempt.objects.create(
-            user=request.user,
-            quiz=quiz,
-            status='in_progress'
-        )
-        first_question = quiz.questions.first()
+        attempt, created = start_attempt(request.user, quiz, snapshot, serializer.validated_data.get('seed'))
+        if created:
+            attempt_started.send(sender=Attempt, attempt=attempt)
 
-        question_serializer = StudentQuestionSerializer(
-            first_question,
-            context={'attempt': attempt}
-        )
+        question = next_question(attempt, snapshot)
+        if not question:
+            return Response({"detail": "Quiz completed", "attempt_id": attempt.id}, status=status.HTTP_200_OK)
 
-        return Response(
-            question_serializer.data,
-            status=status.HTTP_201_CREATED
+        return HttpResponse(
+            student_question_json(snapshot, question['id'], attempt.id),
+            content_type='application/json',
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
         )
 
 class AttemptAnswerView(APIView):
     def put(self, request, attempt_id, question_id):
-        attempt = get_object_or_404(Attempt, id=attempt_id, user=request.user)
+        serializer = AttemptAnswerSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        attempt, snapshot, question = answer_and_advance(
+            request.user,
+            attempt_id,
+            question_id,
+            serializer.validated_data['option_ids']
+        )
+
+        if not question:
+            return Response({"detail": "Quiz completed"}, status=status.HTTP_200_OK)
+
+        return HttpResponse(
+            student_question_json(snapshot, question['id'], attempt.id), content_type='application/json'
+        )
+
+class AttemptResumeView(APIView):
+    """
+    The state of one of the user's attempts, to pick it up again after a
+    reload: the answers so far, the current question and the time left.
+    """
+    def get(self, request, attempt_id):
+        attempt, answers, question = load_attempt_state(request.user, attempt_id)
+        serializer = AttemptStateSerializer(attempt, context={'answers': answers, 'question': question})
+        return Response(serializer.data)
 
-        if attempt.status == 'submitted':
+class SubmitAttemptView(APIView):
+    def post(self, request, attempt_id):
+        attempt = load_attempt(request.user, attempt_id, 'user_id', 'status', 'question_order')
+
+        if attempt.status != 'in_progress':
             return Response(
-                {"detail": "Cannot update answers. Attempt has been submitted."},
+                {"detail": f"Attempt has already been {attempt.get_status_display().lower()}."},
                 status=status.HTTP_403_FORBIDDEN
             )
-           
-        question = get_object_or_404(
-            Question,
-            id=question_id,
-            quiz=attempt.quiz
-            )
 
-        serializer = AttemptAnswerSerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
+        submit_attempt(attempt)
 
-        answer = get_object_or_404(
-            Option,
-            id=serializer.validated_data['answer_id'],
-            question=question
-        )
+        return Response(AttemptResultSerializer(attempt).data)
 
-        attempt_answer, created = AttemptAnswer.objects.get_or_create(
-            attempt=attempt,
-            question=question,
-            defaults={'answer': answer}
+
+class AttemptExportView(APIView):
+    """
+    Streams attempts with their per-question answers as CSV or JSON Lines,
+    optionally filtered by quiz and start date. Staff only, as it covers
+    every student's attempts.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        params = ExportSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+
+        attempts = Attempt.objects.all()
+        if 'quiz' in params.validated_data:
+            attempts = attempts.filter(quiz_id=params.validated_data['quiz'])
+        attempts = filter_by_date(
+            attempts,
+            'started_at',
+            params.validated_data.get('since'),
+            params.validated_data.get('until')
         )
 
-        if not created:
-            attempt_answer.answer = answer
-            attempt_answer.save()
+        return export_attempts(attempts, params.validated_data['file_format'])
 
-        answered_questions = attempt.answers.values_list('question_id', flat=True)
-        next_question = attempt.quiz.questions.exclude(id__in=answered_questions).first()
 
-        if not next_question:
-            return Response({"detail": "Quiz completed"}, status=status.HTTP_200_OK)
+class AttemptHistoryView(generics.ListAPIView):
+    """
+    The requesting user's attempts, most recent first, optionally limited
+    to one quiz with ``?quiz=<id>``.
+    """
+    serializer_class = AttemptHistorySerializer
+    pagination_class = AttemptHistoryPagination
 
-        next_question_serializer = StudentQuestionSerializer(next_question, context={'attempt': attempt})
-        return Response(next_question_serializer.data)
\ No newline at end of file
+    def get_queryset(self):
+        attempts = Attempt.objects.filter(user=self.request.user).only(
+            'id', 'quiz_id', 'status', 'score', 'points', 'question_order', 'started_at', 'deadline', 'submitted_at'
+        )
+        quiz_id = self.request.query_params.get('quiz')
+        if quiz_id:
+            if not quiz_id.isdigit():
+                raise ValidationError({'quiz': ["A valid integer is required."]})
+            attempts = attempts.filter(quiz_id=quiz_id)
+        return attempts
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -41,6 +42,7 @@ INSTALLED_APPS = [
     'users',
     'quizzes',
     'attempts',
+    'analytics',
 ]
 
 MIDDLEWARE = [
@@ -76,12 +78,57 @@ WSGI_APPLICATION = 'medlovescience_quiz.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# DB_PROFILE selects the database: "sqlite" (the default, for local
+# work) or "postgres" (production, configured from the DB_* variables).
+
+DB_PROFILE = os.environ.get('DB_PROFILE', 'sqlite')
+
+if DB_PROFILE == 'postgres':
+    DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', '0'))
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'medlovescience_quiz'),
+            'USER': os.environ.get('DB_USER', 'postgres'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
     }
-}
+    if DB_POOL_MAX_SIZE:
+        # A psycopg pool per process; Django does not allow persistent
+        # connections alongside it.
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', '2')),
+            'max_size': DB_POOL_MAX_SIZE,
+            'timeout': float(os.environ.get('DB_POOL_TIMEOUT', '10')),
+        }
+    else:
+        DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('DB_CONN_MAX_AGE', '60'))
+else:
+    # Covering unique constraints are PostgreSQL-only; SQLite builds them
+    # without the included columns (see CoveringUniqueConstraint).
+    SILENCED_SYSTEM_CHECKS = ['models.W039']
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {},
+        }
+    }
+    if os.environ.get('SQLITE_TUNING', 'on') == 'on':
+        # WAL lets readers run alongside the single writer; NORMAL only
+        # syncs at checkpoints, which is safe in WAL mode. Writers wait up
+        # to the busy timeout for the lock instead of failing at once, and
+        # take it when the transaction starts so they never deadlock
+        # upgrading a read lock.
+        DATABASES['default']['OPTIONS'].update({
+            'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL',
+            'timeout': float(os.environ.get('SQLITE_BUSY_TIMEOUT', '20')),
+            'transaction_mode': 'IMMEDIATE',
+        })
 
 
 # Password validation
@@ -130,4 +177,41 @@ REST_FRAMEWORK = {
     # 'DEFAULT_PERMISSION_CLASSES': (
     #     'rest_framework.permissions.IsAuthenticated',
     # ),
-}
\ No newline at end of file
+}
+
+# Fold submitted attempts into the analytics rollups from the
+# refresh_analytics command instead of during submission.
+ANALYTICS_DEFERRED = False
+
+# Ranked boards behind the leaderboard endpoints. LocalLeaderboard keeps
+# them in each process; use analytics.leaderboards.RedisLeaderboard (with
+# LEADERBOARD_REDIS_URL) to share them between workers.
+LEADERBOARD_BACKEND = 'analytics.leaderboards.LocalLeaderboard'
+LEADERBOARD_REDIS_URL = 'redis://localhost:6379/0'
+
+# Path of a journal to acknowledge answers from once appended, writing
+# them to the database in batches with the flush_answer_journal command.
+# Unset, answers are written to the database directly.
+ATTEMPT_ANSWER_JOURNAL = None
+
+# How multi-select (MCQ) answers earn credit: 'all_or_nothing',
+# 'proportional' or 'negative' (see attempts/grading.py). Single-choice
+# questions are always right or wrong.
+MCQ_GRADING_STRATEGY = 'all_or_nothing'
+
+# Adaptive practice (analytics/practice.py): students' sessions kept per
+# process, how many changed sessions or seconds before their mastery is
+# written back, and seconds a quiz's difficulty is reused.
+PRACTICE_SESSION_CACHE_SIZE = 10000
+PRACTICE_FLUSH_SIZE = 200
+PRACTICE_FLUSH_INTERVAL = 30
+PRACTICE_DIFFICULTY_TTL = 300
+
+# Text search configuration the PostgreSQL question search index is built
+# with (see quizzes/search.py); rebuild_search_index after changing it.
+QUESTION_SEARCH_CONFIG = 'english'
+
+# Estimated similarity (0-1) of two questions' normalized texts from which
+# imports and the audit_duplicates command flag them as near-duplicates
+# (see quizzes/duplicates.py).
+DUPLICATE_SIMILARITY_THRESHOLD = 0.7
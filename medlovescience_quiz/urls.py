@@ -22,4 +22,5 @@ urlpatterns = [
     path('users/', include('users.urls')),
     path('quizzes/', include('quizzes.urls')),
     path('attempts/', include('attempts.urls')),
+    path('analytics/', include('analytics.urls')),
 ]
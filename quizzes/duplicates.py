@@ -0,0 +1,251 @@
+"""
+Near-duplicate question detection with MinHash and locality-sensitive
+hashing (LSH).
+
+A question's text is normalized (Unicode NFKC, lowercased, punctuation
+dropped, whitespace collapsed) and cut into overlapping character
+shingles. Its MinHash signature holds NUM_HASHES minimum shingle hashes
+(see minhash()); two signatures agree at a position with probability
+close to the Jaccard similarity of the shingle sets, so similarity()
+estimates it from 256 bytes per question.
+
+The signature is split into BANDS bands of ROWS values and each band is
+hashed to a bucket (QuestionBand). Questions sharing any bucket are
+candidates, and only candidates are compared, so finding the duplicates
+of a question reads a handful of buckets instead of the whole bank. With
+16 bands of 4 rows a pair at similarity 0.7 shares a bucket 99% of the
+time, and one at 0.3 under 13%.
+
+Signatures are stored on Question.minhash and buckets written with the
+questions (bulk_create_questions); imports flag candidates as they go,
+and the audit_duplicates command signs older questions and checks the
+whole bank.
+"""
+import hashlib
+import re
+import struct
+import unicodedata
+from django.conf import settings
+from django.db import connection, transaction
+from .models import DuplicateCandidate, Question, QuestionBand
+
+SHINGLE_SIZE = 7
+NUM_HASHES = 64
+BANDS = 16
+ROWS = NUM_HASHES // BANDS
+SIGNATURE_FORMAT = f'<{NUM_HASHES}I'
+BAND_BYTES = ROWS * 4
+# Bins are picked by the top bits of a 64-bit hash.
+BIN_SHIFT = 64 - (NUM_HASHES - 1).bit_length()
+EMPTY_BIN = 1 << 32
+# For each bin, the bins an empty one borrows from, first filled one wins.
+# Derived from hashes so stored signatures stay comparable.
+BORROW_ORDER = [
+    sorted(range(NUM_HASHES), key=lambda source: hashlib.blake2b(bytes([position, source])).digest())
+    for position in range(NUM_HASHES)
+]
+# Members of one bucket each compared with at most this many others, so
+# a bucket of many templated questions stays linear.
+BUCKET_WINDOW = 50
+# Buckets looked up per query.
+LOOKUP_BATCH = 900
+
+PUNCTUATION = re.compile(r'[\W_]+')
+
+
+def duplicate_threshold():
+    return getattr(settings, 'DUPLICATE_SIMILARITY_THRESHOLD', 0.7)
+
+
+def normalize(text):
+    text = unicodedata.normalize('NFKC', text).lower()
+    return ' '.join(PUNCTUATION.sub(' ', text).split())
+
+
+def shingles(text):
+    text = normalize(text)
+    return {text[start:start + SHINGLE_SIZE] for start in range(max(len(text) - SHINGLE_SIZE + 1, 1))}
+
+
+def minhash(text):
+    """
+    The MinHash signature of ``text``: NUM_HASHES little-endian uint32.
+
+    One-permutation hashing: each shingle is hashed once, the top bits of
+    the hash pick one of NUM_HASHES bins and the bin keeps the smallest low
+    32 bits. A bin no shingle fell into copies the first filled bin of its
+    own fixed random order (optimal densification), so short texts still
+    have comparable signatures and empty bins of one band are filled from
+    different bins.
+    """
+    values = [EMPTY_BIN] * NUM_HASHES
+    for shingle in shingles(text):
+        value = int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), 'little')
+        position = value >> BIN_SHIFT
+        value &= 0xFFFFFFFF
+        if value < values[position]:
+            values[position] = value
+
+    if EMPTY_BIN in values:
+        values = [
+            value if value != EMPTY_BIN else next(
+                values[source] for source in BORROW_ORDER[position] if values[source] != EMPTY_BIN
+            )
+            for position, value in enumerate(values)
+        ]
+    return struct.pack(SIGNATURE_FORMAT, *values)
+
+
+def similarity(signature, other):
+    """
+    Estimated Jaccard similarity of the texts behind two signatures.
+    """
+    return sum(
+        value == other_value
+        for value, other_value in zip(struct.unpack(SIGNATURE_FORMAT, signature), struct.unpack(SIGNATURE_FORMAT, other))
+    ) / NUM_HASHES
+
+
+def band_buckets(signature):
+    """
+    The signature's bucket in each band, as signed 64-bit integers.
+    """
+    signature = bytes(signature)
+    return [
+        int.from_bytes(
+            hashlib.blake2b(signature[start:start + BAND_BYTES], digest_size=8, salt=bytes([band])).digest(),
+            'little',
+            signed=True
+        )
+        for band, start in enumerate(range(0, NUM_HASHES * 4, BAND_BYTES))
+    ]
+
+
+def sign_questions(questions):
+    for question in questions:
+        question.minhash = minhash(question.question_text)
+
+
+def store_buckets(questions, replace=False):
+    """
+    Write the buckets of signed questions in one statement. With
+    ``replace``, their previous buckets are deleted first. Call inside the
+    transaction that wrote them.
+    """
+    if replace:
+        QuestionBand.objects.filter(question_id__in=[question.id for question in questions]).delete()
+    rows = [(question.id, bucket) for question in questions for bucket in band_buckets(question.minhash)]
+    if rows:
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {QuestionBand._meta.db_table} (question_id, bucket) VALUES (%s, %s)', rows
+            )
+
+
+def flag_duplicates(questions, threshold=None):
+    """
+    Record which of the given signed questions are near-duplicates of any
+    other question, in the bank or among themselves.
+
+    Candidates come from their buckets (one query per LOOKUP_BATCH
+    buckets) and are kept when their similarity reaches ``threshold``; the
+    newer question of each pair is the one flagged. Returns the
+    DuplicateCandidate rows written.
+    """
+    threshold = duplicate_threshold() if threshold is None else threshold
+    signatures = {question.id: question.minhash for question in questions}
+    members = {}
+    for question_id, signature in signatures.items():
+        for bucket in band_buckets(signature):
+            members.setdefault(bucket, []).append(question_id)
+
+    buckets = list(members)
+    pairs = set()
+    for start in range(0, len(buckets), LOOKUP_BATCH):
+        for bucket, other_id in QuestionBand.objects.filter(
+            bucket__in=buckets[start:start + LOOKUP_BATCH]
+        ).values_list('bucket', 'question_id'):
+            for question_id in members[bucket]:
+                if other_id != question_id:
+                    pairs.add((max(question_id, other_id), min(question_id, other_id)))
+
+    missing = {question_id for pair in pairs for question_id in pair} - signatures.keys()
+    if missing:
+        signatures.update(Question.objects.filter(id__in=missing).values_list('id', 'minhash'))
+
+    candidates = verify_pairs(pairs, signatures, threshold)
+    DuplicateCandidate.objects.bulk_create(candidates, ignore_conflicts=True, batch_size=500)
+    return candidates
+
+
+def candidate_pairs(signatures):
+    """
+    ``{(question_id, duplicate_of_id)}`` for questions sharing a band, from
+    ``{question_id: signature}`` held in memory, one band at a time.
+    """
+    pairs = set()
+    for band in range(BANDS):
+        start = band * BAND_BYTES
+        members = {}
+        for question_id, signature in signatures.items():
+            members.setdefault(signature[start:start + BAND_BYTES], []).append(question_id)
+        for question_ids in members.values():
+            if len(question_ids) < 2:
+                continue
+            question_ids.sort()
+            for index, question_id in enumerate(question_ids):
+                for other_id in question_ids[index + 1:index + 1 + BUCKET_WINDOW]:
+                    pairs.add((other_id, question_id))
+    return pairs
+
+
+def verify_pairs(pairs, signatures, threshold):
+    candidates = []
+    for question_id, duplicate_of_id in sorted(pairs):
+        score = similarity(signatures[question_id], signatures[duplicate_of_id])
+        if score >= threshold:
+            candidates.append(DuplicateCandidate(
+                question_id=question_id, duplicate_of_id=duplicate_of_id, similarity=round(score, 4)
+            ))
+    return candidates
+
+
+def sign_unsigned(batch_size=2000):
+    """
+    Sign and bucket questions created without a signature, ``batch_size``
+    at a time with one transaction per batch. Yields the number signed so
+    far after each batch.
+    """
+    signed = 0
+    last_id = 0
+    while True:
+        questions = list(
+            Question.objects.filter(id__gt=last_id, minhash=b'').order_by('id').only('id', 'question_text')[:batch_size]
+        )
+        if not questions:
+            return
+        last_id = questions[-1].id
+        sign_questions(questions)
+        with transaction.atomic():
+            Question.objects.bulk_update(questions, ['minhash'], batch_size=500)
+            store_buckets(questions, replace=True)
+        signed += len(questions)
+        yield signed
+
+
+def load_signatures(batch_size=5000):
+    """
+    ``{question_id: signature}`` for every signed question, read in id
+    order ``batch_size`` at a time.
+    """
+    signatures = {}
+    last_id = 0
+    while True:
+        batch = list(
+            Question.objects.filter(id__gt=last_id).exclude(minhash=b'').order_by('id')
+            .values_list('id', 'minhash')[:batch_size]
+        )
+        if not batch:
+            return signatures
+        last_id = batch[-1][0]
+        signatures.update((question_id, bytes(signature)) for question_id, signature in batch)
@@ -0,0 +1,116 @@
+import csv
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+from .models import Question
+
+# Rows fetched per round trip; related rows are prefetched per chunk.
+EXPORT_CHUNK_SIZE = 2000
+
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+
+class Echo:
+    """
+    File-like object whose write() returns the value, so csv.writer can
+    format one row at a time for a streaming response.
+    """
+    def write(self, value):
+        return value
+
+
+def csv_lines(header, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def jsonl_lines(records):
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    for record in records:
+        yield encoder.encode(record) + '\n'
+
+
+def export_response(lines, filename, file_format):
+    response = StreamingHttpResponse(lines, content_type=CONTENT_TYPES[file_format])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{file_format}"'
+    return response
+
+
+def filter_by_date(queryset, field, since=None, until=None):
+    if since:
+        queryset = queryset.filter(**{f'{field}__gte': since})
+    if until:
+        queryset = queryset.filter(**{f'{field}__lt': until})
+    return queryset
+
+
+QUIZ_CSV_HEADER = [
+    'quiz_id', 'quiz_name', 'created_at',
+    'question_id', 'question_type', 'question_text', 'explanation',
+    'option_id', 'option_text', 'is_correct',
+]
+
+
+def iter_quizzes(quizzes):
+    """
+    Iterate quizzes in id order with questions and options prefetched one
+    chunk of quizzes at a time.
+    """
+    return (
+        quizzes
+        .order_by('id')
+        .prefetch_related(
+            Prefetch('questions', queryset=Question.objects.order_by('id').prefetch_related('options'))
+        )
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+
+
+def quiz_records(quizzes):
+    for quiz in iter_quizzes(quizzes):
+        yield {
+            'id': quiz.id,
+            'quiz_name': quiz.quiz_name,
+            'created_at': quiz.created_at,
+            'questions': [
+                {
+                    'id': question.id,
+                    'question_type': question.question_type,
+                    'question_text': question.question_text,
+                    'explanation': question.explanation,
+                    'options': [
+                        {'id': option.id, 'option_text': option.option_text, 'is_correct': option.is_correct}
+                        for option in question.options.all()
+                    ],
+                }
+                for question in quiz.questions.all()
+            ],
+        }
+
+
+def quiz_rows(quizzes):
+    """
+    One CSV row per option, repeating the quiz and question columns.
+    """
+    for quiz in iter_quizzes(quizzes):
+        for question in quiz.questions.all():
+            for option in question.options.all():
+                yield [
+                    quiz.id, quiz.quiz_name, quiz.created_at.isoformat(),
+                    question.id, question.question_type, question.question_text, question.explanation,
+                    option.id, option.option_text, option.is_correct,
+                ]
+
+
+def export_quizzes(quizzes, file_format):
+    if file_format == 'csv':
+        lines = csv_lines(QUIZ_CSV_HEADER, quiz_rows(quizzes))
+    else:
+        lines = jsonl_lines(quiz_records(quizzes))
+    return export_response(lines, 'quizzes', file_format)
@@ -0,0 +1,147 @@
+import csv
+import json
+import time
+from itertools import islice
+from django.db import transaction
+from rest_framework import serializers
+from .duplicates import flag_duplicates
+from .models import QuestionImport
+from .serializers import QuizQuestionSerializer, bulk_create_questions, existing_question_texts
+
+
+def read_jsonl(stream):
+    """
+    Yield ``(payload, error)`` for each non-empty line of a JSON Lines
+    stream. Each line holds one question shaped like the questions API
+    payload.
+    """
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line), None
+        except ValueError as exc:
+            yield None, f'Invalid JSON: {exc}'
+
+
+def read_csv(stream):
+    """
+    Yield ``(payload, error)`` for each row of a CSV stream.
+
+    Columns: question_type, question_text, explanation, option_1 ... option_N
+    and correct, the 1-based numbers of the correct options separated by ";".
+    """
+    reader = csv.DictReader(stream)
+    for row in reader:
+        option_columns = [column for column in reader.fieldnames if column.startswith('option_')]
+        try:
+            correct = {int(number) for number in (row.get('correct') or '').split(';') if number.strip()}
+        except ValueError:
+            yield None, 'correct must list option numbers separated by ";".'
+            continue
+
+        options = [
+            {'option_text': row[column], 'is_correct': position in correct}
+            for position, column in enumerate(option_columns, start=1)
+            if row.get(column)
+        ]
+        yield {
+            'question_type': row.get('question_type'),
+            'question_text': row.get('question_text'),
+            'explanation': row.get('explanation') or '',
+            'options': options,
+        }, None
+
+
+READERS = {
+    'csv': read_csv,
+    'jsonl': read_jsonl,
+}
+
+
+def validate_chunk(quiz, rows):
+    """
+    Validate a chunk of ``(row_number, payload, error)`` rows with the same
+    rules as QuizQuestionSerializer.
+
+    Field validation runs per row; the duplicate check runs once for the
+    whole chunk. Returns ``(valid, errors)`` where ``valid`` is a list of
+    validated data and ``errors`` a list of ``{'row', 'errors'}`` dicts.
+    """
+    child = QuizQuestionSerializer(many=True, context={'quiz': quiz}).child
+    valid = []
+    errors = []
+
+    for row_number, payload, error in rows:
+        if error:
+            errors.append({'row': row_number, 'errors': [error]})
+            continue
+        try:
+            valid.append((row_number, child.run_validation(payload)))
+        except serializers.ValidationError as exc:
+            errors.append({'row': row_number, 'errors': exc.detail})
+
+    existing = existing_question_texts(quiz, [data['question_text'] for _, data in valid])
+    unique = []
+    for row_number, data in valid:
+        text = data['question_text'].lower()
+        if text in existing:
+            errors.append({'row': row_number, 'errors': ["This question already exists in this quiz."]})
+            continue
+        existing.add(text)
+        unique.append(data)
+
+    errors.sort(key=lambda error: error['row'])
+    return unique, errors
+
+
+def import_questions(question_import, stream, chunk_size=500):
+    """
+    Stream questions from ``stream`` into the import's quiz.
+
+    Rows are parsed lazily and handled ``chunk_size`` at a time: each chunk
+    is validated, bulk created and recorded on ``question_import`` in one
+    transaction. Rows already counted in ``rows_processed`` are skipped, so
+    calling this again with the same source resumes an interrupted import.
+    Invalid rows are recorded and skipped without stopping the import.
+    Imported questions that are near-duplicates of questions in any quiz
+    are flagged as DuplicateCandidate rows and counted in rows_flagged.
+
+    Yields ``(question_import, rows_per_second)`` after each chunk.
+    """
+    quiz = question_import.quiz
+    rows = (
+        (row_number, payload, error)
+        for row_number, (payload, error) in enumerate(READERS[question_import.file_format](stream), start=1)
+    )
+    rows = islice(rows, question_import.rows_processed, None)
+
+    started = time.monotonic()
+    handled = 0
+
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+
+        valid, errors = validate_chunk(quiz, chunk)
+
+        with transaction.atomic():
+            if valid:
+                questions = bulk_create_questions(quiz, valid)
+                quiz.bump_content_version()
+                flagged = flag_duplicates(questions)
+                question_import.rows_flagged += len({candidate.question_id for candidate in flagged})
+
+            room = QuestionImport.MAX_STORED_ERRORS - len(question_import.errors)
+            question_import.errors.extend(errors[:max(room, 0)])
+            question_import.rows_processed = chunk[-1][0]
+            question_import.rows_imported += len(valid)
+            question_import.rows_failed += len(errors)
+            question_import.save()
+
+        handled += len(chunk)
+        yield question_import, handled / max(time.monotonic() - started, 1e-9)
+
+    question_import.status = 'completed'
+    question_import.save(update_fields=['status', 'updated_at'])
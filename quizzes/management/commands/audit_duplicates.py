@@ -0,0 +1,39 @@
+import time
+from django.core.management.base import BaseCommand
+from quizzes.duplicates import (
+    candidate_pairs, duplicate_threshold, load_signatures, sign_unsigned, verify_pairs,
+)
+from quizzes.models import DuplicateCandidate
+
+
+class Command(BaseCommand):
+    help = (
+        "Flag near-duplicate questions across the whole bank: sign questions that have no "
+        "MinHash signature yet, group every signature by LSH band in memory and record the "
+        "candidate pairs whose similarity reaches the threshold."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threshold', type=float,
+                            help="Minimum similarity; DUPLICATE_SIMILARITY_THRESHOLD when omitted.")
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        threshold = options['threshold'] if options['threshold'] is not None else duplicate_threshold()
+
+        started = time.monotonic()
+        signed = 0
+        for signed in sign_unsigned(options['batch_size']):
+            self.stdout.write(f"Signed {signed} questions.")
+
+        signatures = load_signatures(options['batch_size'])
+        pairs = candidate_pairs(signatures)
+        candidates = verify_pairs(pairs, signatures, threshold)
+        DuplicateCandidate.objects.bulk_create(candidates, ignore_conflicts=True, batch_size=500)
+
+        elapsed = max(time.monotonic() - started, 1e-9)
+        self.stdout.write(self.style.SUCCESS(
+            f"Audited {len(signatures)} questions ({signed} newly signed): {len(pairs)} candidate pairs, "
+            f"{len(candidates)} at similarity >= {threshold} flagged in {elapsed:.1f}s "
+            f"({len(signatures) / elapsed:,.0f} questions/s)."
+        ))
@@ -0,0 +1,73 @@
+import statistics
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from quizzes.models import Quiz
+from quizzes.serializers import bulk_create_questions
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare a full read of the quiz catalogue, a quiz and its questions with a "
+        "repeat read that sends back the ETag it got, and report bytes, queries and "
+        "latency for each. Runs in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--quizzes', type=int, default=50)
+        parser.add_argument('--questions', type=int, default=50,
+                            help="Questions per quiz, each with four options.")
+        parser.add_argument('--requests', type=int, default=200,
+                            help="Requests timed per endpoint and mode.")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, options):
+        for number in range(options['quizzes']):
+            quiz = Quiz.objects.create(quiz_name=f'Conditional benchmark quiz {number}')
+            bulk_create_questions(quiz, [
+                {
+                    'question_type': 'OBJ',
+                    'question_text': f'Benchmark question {question} of quiz {number}',
+                    'options': [{'option_text': f'Option {option}', 'is_correct': option == 0} for option in range(4)],
+                }
+                for question in range(options['questions'])
+            ])
+            quiz.bump_content_version()
+
+        client = Client()
+        urls = {
+            'catalogue': reverse('quiz-list'),
+            'quiz': reverse('quiz-detail', args=[quiz.id]),
+            'questions': reverse('quiz-questions-list', args=[quiz.id]),
+        }
+        self.stdout.write(f"{'endpoint':>10} {'mode':>8} {'status':>6} {'bytes':>7} {'queries':>7} {'p50 ms':>7}")
+        # The test client addresses the host as "testserver".
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            for name, url in urls.items():
+                etag = client.get(url)['ETag']
+                for mode, headers in (('full', {}), ('repeat', {'HTTP_IF_NONE_MATCH': etag})):
+                    latencies = []
+                    for _ in range(options['requests']):
+                        with CaptureQueriesContext(connection) as queries:
+                            started = time.perf_counter()
+                            response = client.get(url, **headers)
+                            latencies.append(time.perf_counter() - started)
+                    self.stdout.write(
+                        f"{name:>10} {mode:>8} {response.status_code:>6} {len(response.content):>7} "
+                        f"{len(queries):>7} {statistics.median(latencies) * 1000:>7.2f}"
+                    )
@@ -0,0 +1,66 @@
+import random
+import time
+from django.core.management.base import BaseCommand
+from quizzes.duplicates import candidate_pairs, duplicate_threshold, minhash, verify_pairs
+from quizzes.management.commands.benchmark_question_search import WORDS
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the near-duplicate audit on synthetic questions held in memory: random "
+        "questions plus rewordings of some of them (a word dropped, swapped or replaced). "
+        "Reports signing, LSH bucketing and verification time and how many rewordings "
+        "were found. No database access."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questions', type=int, default=100_000)
+        parser.add_argument('--rewordings', type=float, default=0.05,
+                            help="Share of the questions that reword an earlier one.")
+        parser.add_argument('--threshold', type=float)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        threshold = options['threshold'] if options['threshold'] is not None else duplicate_threshold()
+        vocabulary = WORDS + [f'term{number}' for number in range(5000)]
+
+        texts = []
+        planted = set()
+        for question_id in range(options['questions']):
+            if texts and rng.random() < options['rewordings']:
+                original_id = rng.randrange(len(texts))
+                words = texts[original_id].split()
+                position = rng.randrange(len(words))
+                edit = rng.randrange(3)
+                if edit == 0:
+                    del words[position]
+                elif edit == 1:
+                    words[position] = rng.choice(vocabulary)
+                else:
+                    other = rng.randrange(len(words))
+                    words[position], words[other] = words[other], words[position]
+                texts.append(' '.join(words))
+                planted.add((question_id, original_id))
+            else:
+                texts.append(' '.join(rng.choice(vocabulary) for _ in range(rng.randint(10, 20))) + '?')
+
+        started = time.perf_counter()
+        signatures = {question_id: minhash(text) for question_id, text in enumerate(texts)}
+        signed = time.perf_counter()
+        pairs = candidate_pairs(signatures)
+        bucketed = time.perf_counter()
+        candidates = verify_pairs(pairs, signatures, threshold)
+        verified = time.perf_counter()
+
+        found = {(candidate.question_id, candidate.duplicate_of_id) for candidate in candidates}
+        self.stdout.write(
+            f"{len(texts):,} questions, {len(planted):,} rewordings, {len(pairs):,} candidate pairs, "
+            f"{len(found):,} at similarity >= {threshold}."
+        )
+        self.stdout.write(f"{'stage':>8} {'seconds':>8}")
+        for name, seconds in (
+            ('sign', signed - started), ('bucket', bucketed - signed), ('verify', verified - bucketed),
+        ):
+            self.stdout.write(f"{name:>8} {seconds:>8.2f}")
+        self.stdout.write(f"Rewordings found: {len(planted & found) / max(len(planted), 1):.1%}.")
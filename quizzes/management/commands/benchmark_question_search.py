@@ -0,0 +1,80 @@
+import random
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from quizzes.models import Quiz
+from quizzes.search import search_questions
+from quizzes.serializers import bulk_create_questions
+
+WORDS = (
+    'anaemia antibody antigen bilirubin blood calcium cardiac cell chronic clotting creatinine deficiency '
+    'diagnosis enzyme ferritin glucose haemoglobin heparin hormone infection insulin iron kidney lactate '
+    'leukaemia lipid liver lymphocyte marker neutrophil platelet potassium protein renal serum sodium '
+    'syndrome test therapy thyroid transfusion troponin urea vitamin warfarin'
+).split()
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the question bank with synthetic questions through the normal write path (so "
+        "they are indexed), then time ranked searches of one to three words. Runs in a "
+        "transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questions', type=int, default=500_000)
+        parser.add_argument('--quizzes', type=int, default=500)
+        parser.add_argument('--searches', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, options):
+        rng = random.Random(options['seed'])
+        # Rare made-up words next to the common vocabulary, as real banks have.
+        vocabulary = WORDS + [f'term{number}' for number in range(5000)]
+
+        def text(words):
+            return ' '.join(rng.choice(vocabulary) for _ in range(words))
+
+        per_quiz = max(options['questions'] // options['quizzes'], 1)
+        started = time.perf_counter()
+        for number in range(options['quizzes']):
+            quiz = Quiz.objects.create(quiz_name=f'Search benchmark quiz {number}')
+            bulk_create_questions(quiz, [
+                {
+                    'question_type': 'OBJ',
+                    'question_text': f'{text(12)} {question}',
+                    'explanation': text(20),
+                    'options': [{'option_text': text(3), 'is_correct': option == 0} for option in range(4)],
+                }
+                for question in range(per_quiz)
+            ])
+        self.stdout.write(
+            f"Created and indexed {per_quiz * options['quizzes']:,} questions in {time.perf_counter() - started:.1f}s."
+        )
+
+        self.stdout.write(f"{'words':>6} {'searches':>9} {'p50 ms':>8} {'p95 ms':>8} {'results':>8}")
+        for words in (1, 2, 3):
+            latencies = []
+            results = 0
+            for _ in range(options['searches']):
+                query = ' '.join(rng.choice(WORDS) for _ in range(words))
+                started = time.perf_counter()
+                results += len(search_questions(query, limit=20))
+                latencies.append(time.perf_counter() - started)
+            self.stdout.write(
+                f"{words:>6} {len(latencies):>9} {statistics.median(latencies) * 1000:>8.2f} "
+                f"{statistics.quantiles(latencies, n=20)[-1] * 1000:>8.2f} {results / len(latencies):>8.1f}"
+            )
@@ -0,0 +1,54 @@
+import time
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.core.management.base import BaseCommand
+from quizzes.models import Quiz, Question
+from quizzes.serializers import QuizDetailSerializer
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Serialize growing numbers of quizzes with QuizDetailSerializer and report "
+        "query counts and timings. Runs in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000, 10000])
+        parser.add_argument('--questions', type=int, default=5,
+                            help="Questions created per quiz.")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options['sizes'], options['questions'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, sizes, questions_per_quiz):
+        created = 0
+        self.stdout.write(f"{'quizzes':>8} {'queries':>8} {'seconds':>8}")
+        for size in sorted(sizes):
+            quizzes = Quiz.objects.bulk_create(
+                Quiz(quiz_name=f'Benchmark quiz {number}') for number in range(created, size)
+            )
+            Question.objects.bulk_create(
+                Question(quiz=quiz, question_type='MCQ' if number % 3 else 'OBJ',
+                         question_text=f'Benchmark question {number}')
+                for quiz in quizzes
+                for number in range(questions_per_quiz)
+            )
+            Quiz.objects.filter(pk__in=[quiz.pk for quiz in quizzes]).update(**Quiz.summary_expressions())
+            created = max(created, size)
+
+            queryset = Quiz.objects.order_by('id')[:size]
+            started = time.perf_counter()
+            with CaptureQueriesContext(connection) as queries:
+                QuizDetailSerializer(queryset, many=True).data
+            elapsed = time.perf_counter() - started
+
+            self.stdout.write(f"{size:>8} {len(queries):>8} {elapsed:>8.3f}")
@@ -0,0 +1,57 @@
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from quizzes.importer import import_questions
+from quizzes.models import Quiz, QuestionImport
+
+
+class Command(BaseCommand):
+    help = "Stream a CSV or JSON Lines question bank into a quiz."
+
+    def add_arguments(self, parser):
+        parser.add_argument('quiz_id', type=int)
+        parser.add_argument('path', type=Path)
+        parser.add_argument('--format', dest='file_format', choices=dict(QuestionImport.FORMATS),
+                            help="File format; taken from the file extension when omitted.")
+        parser.add_argument('--chunk-size', type=int, default=500,
+                            help="Number of rows validated and written per chunk.")
+        parser.add_argument('--resume', type=int, dest='import_id',
+                            help="Id of an interrupted import of the same file to resume.")
+
+    def handle(self, *args, **options):
+        try:
+            quiz = Quiz.objects.get(pk=options['quiz_id'])
+        except Quiz.DoesNotExist:
+            raise CommandError(f"Quiz {options['quiz_id']} does not exist.")
+
+        path = options['path']
+        if options['import_id']:
+            try:
+                question_import = QuestionImport.objects.get(pk=options['import_id'], quiz=quiz)
+            except QuestionImport.DoesNotExist:
+                raise CommandError(f"Import {options['import_id']} does not exist for this quiz.")
+        else:
+            file_format = options['file_format'] or path.suffix.lstrip('.').lower()
+            if file_format not in dict(QuestionImport.FORMATS):
+                raise CommandError("Could not tell the file format; pass --format.")
+            question_import = QuestionImport.objects.create(
+                quiz=quiz, source=path.name, file_format=file_format
+            )
+
+        self.stdout.write(f"Import {question_import.id}: starting after row {question_import.rows_processed}.")
+
+        rate = 0
+        with path.open(encoding='utf-8-sig', newline='') as stream:
+            for question_import, rate in import_questions(question_import, stream, options['chunk_size']):
+                self.stdout.write(
+                    f"{question_import.rows_processed} rows read, {question_import.rows_imported} imported, "
+                    f"{question_import.rows_failed} failed, {question_import.rows_flagged} flagged as near-duplicates "
+                    f"({rate:,.0f} rows/s)."
+                )
+
+        for error in question_import.errors:
+            self.stderr.write(f"Row {error['row']}: {error['errors']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Import {question_import.id} completed: {question_import.rows_imported} imported, "
+            f"{question_import.rows_failed} failed, {question_import.rows_flagged} flagged as near-duplicates "
+            f"({rate:,.0f} rows/s)."
+        ))
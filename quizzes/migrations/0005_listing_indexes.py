@@ -0,0 +1,26 @@
+# Generated by Django 6.0 on 2026-10-18 14:56
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0004_export_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['quiz', 'id'], name='question_quiz_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['quiz', 'question_type', 'id'], name='question_quiz_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quiz',
+            index=models.Index(django.db.models.functions.text.Lower('quiz_name'), name='quiz_name_lower_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 6.0 on 2026-10-18 14:57
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_question_summary(apps, schema_editor):
+    Quiz = apps.get_model('quizzes', 'Quiz')
+    Question = apps.get_model('quizzes', 'Question')
+
+    questions = Question.objects.filter(quiz=OuterRef('pk')).order_by()
+    Quiz.objects.update(
+        question_count=Coalesce(
+            Subquery(questions.values('quiz').annotate(total=Count('id')).values('total')),
+            0
+        ),
+        question_type=Subquery(
+            questions.values('question_type')
+            .annotate(total=Count('id'))
+            .order_by('-total', 'question_type')
+            .values('question_type')[:1]
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0005_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='question_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='quiz',
+            name='question_type',
+            field=models.CharField(blank=True, max_length=10, null=True),
+        ),
+        migrations.RunPython(fill_question_summary, migrations.RunPython.noop),
+    ]
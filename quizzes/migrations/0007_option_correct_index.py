@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-18 15:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0006_quiz_question_summary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='option',
+            index=models.Index(fields=['question', 'is_correct'], name='option_question_correct_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0007_option_correct_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='time_limit',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 6.0 on 2026-10-18 15:40
+
+from django.conf import settings
+from django.db import migrations
+
+SQLITE_CREATE = [
+    """
+    CREATE VIRTUAL TABLE quizzes_question_search USING fts5(
+        quiz_id UNINDEXED, question_text, explanation, option_text, tokenize = 'porter unicode61'
+    )
+    """,
+    """
+    INSERT INTO quizzes_question_search (rowid, quiz_id, question_text, explanation, option_text)
+    SELECT question.id, question.quiz_id, question.question_text, question.explanation,
+           COALESCE((SELECT group_concat(option_text, ' ') FROM quizzes_option WHERE question_id = question.id), '')
+    FROM quizzes_question question
+    """,
+]
+
+POSTGRES_CREATE = [
+    """
+    CREATE TABLE quizzes_question_search (
+        question_id bigint PRIMARY KEY,
+        quiz_id bigint NOT NULL,
+        document tsvector NOT NULL
+    )
+    """,
+    """
+    INSERT INTO quizzes_question_search (question_id, quiz_id, document)
+    SELECT question.id, question.quiz_id,
+           setweight(to_tsvector(%s::regconfig, question.question_text), 'A') ||
+           setweight(to_tsvector(%s::regconfig, question.explanation), 'B') ||
+           setweight(to_tsvector(%s::regconfig, COALESCE(
+               (SELECT string_agg(option_text, ' ') FROM quizzes_option WHERE question_id = question.id), ''
+           )), 'C')
+    FROM quizzes_question question
+    """,
+    'CREATE INDEX question_search_document_idx ON quizzes_question_search USING gin (document)',
+    'CREATE INDEX question_search_quiz_idx ON quizzes_question_search (quiz_id)',
+]
+
+
+def create_search_index(apps, schema_editor):
+    """
+    Create and fill the full-text index read by quizzes.search. Other
+    databases get no index. PostgreSQL documents are built with the
+    QUESTION_SEARCH_CONFIG text search configuration.
+    """
+    vendor = schema_editor.connection.vendor
+    statements = {'sqlite': SQLITE_CREATE, 'postgresql': POSTGRES_CREATE}.get(vendor, [])
+    config = getattr(settings, 'QUESTION_SEARCH_CONFIG', 'english')
+    for statement in statements:
+        # Placeholders are only ever the configuration.
+        schema_editor.execute(statement, [config] * statement.count('%s') or None)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute('DROP TABLE quizzes_question_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0008_quiz_time_limit'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
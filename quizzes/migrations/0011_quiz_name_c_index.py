@@ -0,0 +1,31 @@
+# Generated by Django 6.0 on 2026-10-18 16:30
+
+from django.db import migrations
+
+
+def create_name_index(apps, schema_editor):
+    """
+    Index the lowercase quiz name in the "C" collation on PostgreSQL, for
+    the bytewise name prefix ranges of quizzes.views.lower_name(). Other
+    databases compare bytewise already and use quiz_name_lower_idx.
+    """
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX quiz_name_lower_c_idx ON quizzes_quiz ((lower(quiz_name) COLLATE "C"))'
+        )
+
+
+def drop_name_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX quiz_name_lower_c_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0010_near_duplicates'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_name_index, drop_name_index),
+    ]
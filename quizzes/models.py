@@ -1,9 +1,58 @@
 from django.db import models
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Lower
+from django.utils import timezone
 
 class Quiz(models.Model):
     quiz_name = models.CharField(max_length=255)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Incremented on every change to the quiz's questions or options so
+    # cached snapshots of the content are keyed to exactly one state.
+    content_version = models.PositiveIntegerField(default=1)
+    # Summary of the quiz's questions, refreshed with the content version.
+    question_count = models.PositiveIntegerField(default=0)
+    question_type = models.CharField(max_length=10, blank=True, null=True)
+    # Seconds a student has to finish an attempt; no limit when null.
+    time_limit = models.PositiveIntegerField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='quiz_created_idx'),
+            models.Index(Lower('quiz_name'), name='quiz_name_lower_idx'),
+        ]
+
+    def bump_content_version(self):
+        """
+        Record a change to the quiz's questions or options: increment
+        content_version, touch updated_at and recompute the question
+        summary, in one UPDATE.
+        """
+        Quiz.objects.filter(pk=self.pk).update(
+            content_version=F('content_version') + 1,
+            updated_at=timezone.now(),
+            **Quiz.summary_expressions()
+        )
+
+    @staticmethod
+    def summary_expressions():
+        """
+        Subqueries computing question_count and question_type (the most
+        common type, ties broken alphabetically) for each quiz row.
+        """
+        questions = Question.objects.filter(quiz=OuterRef('pk')).order_by()
+        return {
+            'question_count': Coalesce(
+                Subquery(questions.values('quiz').annotate(total=Count('id')).values('total')),
+                0
+            ),
+            'question_type': Subquery(
+                questions.values('question_type')
+                .annotate(total=Count('id'))
+                .order_by('-total', 'question_type')
+                .values('question_type')[:1]
+            ),
+        }
 
 class Question(models.Model):
     QUESTION_TYPES = [
@@ -15,6 +64,9 @@ class Question(models.Model):
     question_type = models.CharField(max_length=10, choices=QUESTION_TYPES)
     question_text = models.TextField()
     explanation = models.TextField(blank=True)
+    # MinHash signature of the normalized question text (see
+    # quizzes/duplicates.py); empty until computed.
+    minhash = models.BinaryField(blank=True, default=bytes, editable=False)
 
     class Meta:
         constraints = [
@@ -23,8 +75,79 @@ class Question(models.Model):
                 name="unique_question_per_quiz"
         )
     ]
+        indexes = [
+            models.Index(fields=['quiz', 'id'], name='question_quiz_idx'),
+            models.Index(fields=['quiz', 'question_type', 'id'], name='question_quiz_type_idx'),
+        ]
     
 class Option(models.Model):
     question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='options')
     option_text = models.TextField()
-    is_correct = models.BooleanField(default=False)
\ No newline at end of file
+    is_correct = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['question', 'is_correct'], name='option_question_correct_idx'),
+        ]
+
+class QuestionBand(models.Model):
+    """
+    One LSH bucket of a question's MinHash signature, per band. Questions
+    sharing a bucket are near-duplicate candidates.
+    """
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='+')
+    bucket = models.BigIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['bucket', 'question'], name='question_band_bucket_idx'),
+        ]
+
+class DuplicateCandidate(models.Model):
+    """
+    A question flagged as a likely rewording of an older one.
+
+    similarity is the estimated Jaccard similarity of their normalized
+    texts' shingles.
+    """
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='duplicate_candidates')
+    duplicate_of = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='+')
+    similarity = models.FloatField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['question', 'duplicate_of'], name='unique_duplicate_candidate'),
+        ]
+
+class QuestionImport(models.Model):
+    """
+    Progress of a streamed question-bank import.
+
+    rows_processed is the number of data rows consumed from the source and
+    is committed together with each chunk, so an interrupted import can
+    resume from exactly where it stopped.
+    """
+    FORMATS = [
+        ('csv', 'CSV'),
+        ('jsonl', 'JSON Lines'),
+    ]
+    STATUS_CHOICES = [
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+    ]
+    # Only the first errors are kept; rows_failed has the full count.
+    MAX_STORED_ERRORS = 1000
+
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='imports')
+    source = models.CharField(max_length=255)
+    file_format = models.CharField(max_length=10, choices=FORMATS)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='running')
+    rows_processed = models.PositiveIntegerField(default=0)
+    rows_imported = models.PositiveIntegerField(default=0)
+    rows_failed = models.PositiveIntegerField(default=0)
+    # Imported questions flagged as near-duplicates of existing ones.
+    rows_flagged = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
@@ -0,0 +1,24 @@
+from rest_framework.pagination import CursorPagination
+
+
+class QuizCursorPagination(CursorPagination):
+    """
+    Keyset pagination for the quiz catalogue, newest first.
+
+    The cursor holds the last created_at seen, so each page is an index
+    range scan on (created_at, id) whatever the depth.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class QuestionCursorPagination(CursorPagination):
+    """
+    Keyset pagination for the questions of a quiz, in id order.
+    """
+    ordering = ('id',)
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
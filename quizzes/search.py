@@ -0,0 +1,195 @@
+"""
+Full-text search over the question bank: question text, explanation and
+option text.
+
+The index is a table kept beside quizzes_question, one row per question
+(see migration 0009_question_search):
+
+- SQLite: an FTS5 virtual table ranked with bm25().
+- PostgreSQL: a weighted tsvector column with a GIN index, ranked with
+  ts_rank_cd().
+
+Rows are written in the same transaction as the questions they index, by
+index_questions() and unindex_questions(); rebuild_search_index rebuilds
+the whole table.
+"""
+import re
+from django.conf import settings
+from django.db import NotSupportedError, connection
+from .models import Question, Option
+
+SEARCH_TABLE = 'quizzes_question_search'
+# Relative weight of matches in question text, explanation and options.
+SQLITE_WEIGHTS = (10.0, 2.0, 1.0)
+SEARCH_TERM = re.compile(r'\w+')
+
+
+def search_config():
+    return getattr(settings, 'QUESTION_SEARCH_CONFIG', 'english')
+
+
+def question_documents(question_ids):
+    """
+    ``[(question_id, quiz_id, question_text, explanation, option_text)]``
+    for the questions that still exist, options joined with spaces. Two
+    queries.
+    """
+    options = {}
+    for question_id, option_text in (
+        Option.objects
+        .filter(question_id__in=question_ids)
+        .order_by('id')
+        .values_list('question_id', 'option_text')
+    ):
+        options.setdefault(question_id, []).append(option_text)
+
+    return [
+        (question_id, quiz_id, question_text, explanation, ' '.join(options.get(question_id, ())))
+        for question_id, quiz_id, question_text, explanation in (
+            Question.objects.filter(id__in=question_ids).values_list('id', 'quiz_id', 'question_text', 'explanation')
+        )
+    ]
+
+
+class SqliteSearchIndex:
+    def delete(self, cursor, question_ids):
+        placeholders = ', '.join(['%s'] * len(question_ids))
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({placeholders})', list(question_ids))
+
+    def insert(self, cursor, documents):
+        cursor.executemany(
+            f'INSERT INTO {SEARCH_TABLE} (rowid, quiz_id, question_text, explanation, option_text) '
+            'VALUES (%s, %s, %s, %s, %s)',
+            documents
+        )
+
+    def match(self, cursor, query, quiz_id, limit, offset):
+        # Every term must match; the last one also matches as a prefix.
+        terms = SEARCH_TERM.findall(query)
+        expression = ' '.join(f'"{term}"' for term in terms) + '*'
+        quiz_filter = 'AND quiz_id = %s' if quiz_id is not None else ''
+        weights = ', '.join(str(weight) for weight in SQLITE_WEIGHTS)
+        cursor.execute(
+            f'SELECT rowid, -bm25({SEARCH_TABLE}, 0, {weights}) AS rank FROM {SEARCH_TABLE} '
+            f'WHERE {SEARCH_TABLE} MATCH %s {quiz_filter} ORDER BY rank DESC, rowid LIMIT %s OFFSET %s',
+            [expression, *([quiz_id] if quiz_id is not None else []), limit, offset]
+        )
+        return cursor.fetchall()
+
+
+class PostgresSearchIndex:
+    def delete(self, cursor, question_ids):
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE question_id = ANY(%s)', [list(question_ids)])
+
+    def insert(self, cursor, documents):
+        config = search_config()
+        cursor.executemany(
+            f'INSERT INTO {SEARCH_TABLE} (question_id, quiz_id, document) VALUES (%s, %s, '
+            "setweight(to_tsvector(%s::regconfig, %s), 'A') || "
+            "setweight(to_tsvector(%s::regconfig, %s), 'B') || "
+            "setweight(to_tsvector(%s::regconfig, %s), 'C'))",
+            [
+                (question_id, quiz_id, config, question_text, config, explanation, config, option_text)
+                for question_id, quiz_id, question_text, explanation, option_text in documents
+            ]
+        )
+
+    def match(self, cursor, query, quiz_id, limit, offset):
+        quiz_filter = 'AND quiz_id = %s' if quiz_id is not None else ''
+        cursor.execute(
+            f'SELECT question_id, ts_rank_cd(document, query) AS rank '
+            f'FROM {SEARCH_TABLE}, websearch_to_tsquery(%s::regconfig, %s) query '
+            f'WHERE document @@ query {quiz_filter} ORDER BY rank DESC, question_id LIMIT %s OFFSET %s',
+            [search_config(), query, *([quiz_id] if quiz_id is not None else []), limit, offset]
+        )
+        return cursor.fetchall()
+
+
+BACKENDS = {
+    'sqlite': SqliteSearchIndex,
+    'postgresql': PostgresSearchIndex,
+}
+
+
+def search_index():
+    """
+    The index for the default database, or None on other databases, where
+    questions are not indexed.
+    """
+    backend = BACKENDS.get(connection.vendor)
+    return backend() if backend else None
+
+
+def index_questions(question_ids, replace=True):
+    """
+    (Re)index the given questions from their current text and options.
+    Call inside the transaction that wrote them; pass ``replace=False`` for
+    questions just created, which have no rows to delete.
+    """
+    index = search_index()
+    question_ids = list(question_ids)
+    if index is None or not question_ids:
+        return
+    documents = question_documents(question_ids)
+    with connection.cursor() as cursor:
+        if replace:
+            index.delete(cursor, question_ids)
+        index.insert(cursor, documents)
+
+
+def unindex_questions(question_ids):
+    index = search_index()
+    question_ids = list(question_ids)
+    if index is None or not question_ids:
+        return
+    with connection.cursor() as cursor:
+        index.delete(cursor, question_ids)
+
+
+def rebuild_index(batch_size=2000):
+    """
+    Reindex every question, ``batch_size`` at a time in id order, and drop
+    rows of questions deleted without being unindexed. Yields the number
+    of questions indexed so far after each batch.
+    """
+    index = search_index()
+    if index is None:
+        raise NotSupportedError(f'Question search is not supported on {connection.vendor}.')
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+
+    indexed = 0
+    last_id = 0
+    while True:
+        question_ids = list(
+            Question.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size]
+        )
+        if not question_ids:
+            return
+        last_id = question_ids[-1]
+        documents = question_documents(question_ids)
+        with connection.cursor() as cursor:
+            index.insert(cursor, documents)
+        indexed += len(documents)
+        yield indexed
+
+
+def search_questions(query, quiz_id=None, limit=20, offset=0):
+    """
+    Questions matching ``query``, best first, as ``[(question, rank)]``.
+
+    One index query and one query for the matched questions; questions
+    deleted since they were indexed are left out.
+    """
+    index = search_index()
+    if index is None:
+        raise NotSupportedError(f'Question search is not supported on {connection.vendor}.')
+    if not SEARCH_TERM.search(query):
+        return []
+
+    with connection.cursor() as cursor:
+        matches = index.match(cursor, query, quiz_id, limit, offset)
+    questions = Question.objects.only(
+        'id', 'quiz_id', 'question_type', 'question_text', 'explanation'
+    ).in_bulk([question_id for question_id, _ in matches])
+    return [(questions[question_id], rank) for question_id, rank in matches if question_id in questions]
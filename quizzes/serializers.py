@@ -1,17 +1,112 @@
 from rest_framework import serializers
-from . models import Quiz, Question, Option
+from . models import Quiz, Question, Option, QuestionImport
+from .duplicates import sign_questions, store_buckets
+from .search import index_questions
 from django.db import transaction
+from django.db.models import RestrictedError
+from django.db.models.functions import Lower
+
+
+def bulk_create_questions(quiz, questions_data):
+    """
+    Create questions and their options for a quiz with one bulk_create for
+    the questions and one for all of the options.
+
+    Must run inside a transaction. Returns the created questions in input
+    order, with primary keys set, adds them to the search index and stores
+    their near-duplicate signatures and buckets.
+    """
+    questions = []
+    options_data = []
+    for question_data in questions_data:
+        question_data = dict(question_data)
+        options_data.append(question_data.pop('options', []))
+        questions.append(Question(quiz=quiz, **question_data))
+
+    sign_questions(questions)
+    Question.objects.bulk_create(questions)
+
+    Option.objects.bulk_create(
+        Option(question=question, option_text=option_data['option_text'], is_correct=option_data.get('is_correct', False))
+        for question, question_options in zip(questions, options_data)
+        for option_data in question_options
+    )
+    index_questions((question.id for question in questions), replace=False)
+    store_buckets(questions)
+    return questions
+
+
+def update_question_options(question, options_data):
+    """
+    Make the question's options match ``options_data`` while keeping the
+    ids of the options that stay, so answers pointing at them survive.
+
+    An entry is matched to an existing option by ``id`` when given, else
+    by identical option_text. Matched options are updated when they
+    changed, the rest are created, and existing options left unmatched are
+    deleted. Deleting an option a student chose raises a ValidationError
+    (answers protect their option). Must run inside a transaction.
+    """
+    existing = {option.id: option for option in question.options.all()}
+    unmatched = dict(existing)
+    matched = []
+    for option_data in options_data:
+        option_id = option_data.get('id')
+        if option_id is not None and option_id not in existing:
+            raise serializers.ValidationError({'options': [f'Option {option_id} does not belong to this question.']})
+        if option_id is None:
+            option_id = next(
+                (candidate.id for candidate in unmatched.values() if candidate.option_text == option_data['option_text']),
+                None
+            )
+        matched.append((unmatched.pop(option_id, None), option_data))
+
+    changed = []
+    created = []
+    for option, option_data in matched:
+        is_correct = option_data.get('is_correct', False)
+        if option is None:
+            created.append(Option(question=question, option_text=option_data['option_text'], is_correct=is_correct))
+        elif (option.option_text, option.is_correct) != (option_data['option_text'], is_correct):
+            option.option_text = option_data['option_text']
+            option.is_correct = is_correct
+            changed.append(option)
+
+    if unmatched:
+        try:
+            Option.objects.filter(id__in=list(unmatched)).delete()
+        except RestrictedError:
+            raise serializers.ValidationError(
+                {'options': ['Options students have answered cannot be removed; edit them instead.']}
+            )
+    Option.objects.bulk_update(changed, ['option_text', 'is_correct'])
+    Option.objects.bulk_create(created)
+
+
+def existing_question_texts(quiz, texts):
+    """
+    Return the subset of ``texts`` (lowercased) already used by questions
+    in the quiz, compared case-insensitively in a single query.
+    """
+    return set(
+        Question.objects
+        .filter(quiz=quiz)
+        .annotate(lower_text=Lower('question_text'))
+        .filter(lower_text__in=[text.lower() for text in texts])
+        .values_list('lower_text', flat=True)
+    )
 
 class OptionSerializer(serializers.ModelSerializer):
     """
     Serializer for Option model
 
     Field:
-        - id: Primary key of the option
+        - id: Primary key of the option; send it back when updating a
+          question to edit the option in place.
         - option_text: Options for a quiz
         is_correct: To check for the correct answer
     """
-    id = serializers.UUIDField(read_only=True)
+    id = serializers.IntegerField(required=False)
 
     class Meta:
         model = Option
@@ -53,14 +148,15 @@ class QuizSerializer(serializers.ModelSerializer):
     Fields:
         - id: Primary key of the quiz.
         - quiz_name: Name or title of the quiz.
+        - time_limit: Seconds allowed per attempt, optional.
         - questions: Nested list of questions associated with the quiz, optional.
 
     create(validated_data):
         Overrides the default create method to handle nested question and option data.
         - Extracts questions data from the validated data.
         - Uses a database transaction to ensure atomic creation of quiz, questions, and options.
-        - Iterates over each question and its options to create related objects.
-        - Returns the created Quiz instance.
+        - Bulk creates all questions, then all options, in one query each.
+        - Returns the created Quiz instance with questions and options prefetched.
 
     update(instance, validate):
         Update the quiz name of the instance of created quiz
@@ -76,27 +172,25 @@ class QuizSerializer(serializers.ModelSerializer):
         fields = [
             'id',
             'quiz_name',
+            'time_limit',
             'questions'
 
             ]
 
     def create(self, validated_data):
-        questions_data = validated_data.pop('questions')
+        questions_data = validated_data.pop('questions', [])
 
         with transaction.atomic():
             quiz = Quiz.objects.create(**validated_data)
+            if questions_data:
+                bulk_create_questions(quiz, questions_data)
+                quiz.bump_content_version()
 
-            for question_data in questions_data:
-                options_data = question_data.pop('options')
-                question = Question.objects.create(quiz=quiz, **question_data)
-
-                for option_data in options_data:
-                    Option.objects.create(question=question, **option_data)
-
-        return quiz
+        return Quiz.objects.prefetch_related('questions__options').get(pk=quiz.pk)
 
     def update(self, instance, validated_data):
         instance.quiz_name = validated_data.get('quiz_name', instance.quiz_name)
+        instance.time_limit = validated_data.get('time_limit', instance.time_limit)
         instance.save()
         return instance
     
@@ -123,22 +217,18 @@ class QuizListSerializer(serializers.ModelSerializer):
 class QuizDetailSerializer(serializers.ModelSerializer):
     """
     Serializer to give detail about a quiz
-    It include computation field for question type and total question for the the quiz
+    It include the question type and total question for the the quiz, read from
+    the summary columns Quiz keeps up to date on every question write, so
+    serializing any number of quizzes costs no extra queries.
 
     Fields:
         - id: PRimary key
         - quiz_name: Name of the quiz
-        - question_type: Question type
+        - question_type: The most common question type in the quiz
         - tota_question: Total question for a quiz
-
-    qet_question_type
-        A function that get the question type of the first question and return it
-
-    qet_total_question
-        A funtion that count and return all question in a quiz
+        - time_limit: Seconds allowed per attempt, null for untimed quizzes
     """
-    question_type = serializers.SerializerMethodField()
-    total_question = serializers.SerializerMethodField()
+    total_question = serializers.IntegerField(source='question_count', read_only=True)
 
     class Meta:
         model = Quiz
@@ -147,17 +237,9 @@ class QuizDetailSerializer(serializers.ModelSerializer):
             'quiz_name',
             'question_type',
             'total_question',
+            'time_limit',
         ]
-
-    def get_question_type(self, obj):
-        """
-        Returns the question_type.
-        """
-        first_question = obj.questions.first()
-        return first_question.question_type if first_question else None
-
-    def get_total_question(self, obj):
-        return obj.questions.count()
+        read_only_fields = ['question_type']
 
 class BulkQuestionListSerializer(serializers.ListSerializer):
     """
@@ -167,26 +249,47 @@ class BulkQuestionListSerializer(serializers.ListSerializer):
         Overides the default create method to handle bulk creation of questions and options.
         - Creates multiple Question instances along with their associated Option instances in a single operation.
         - Uses the context to get the quiz to which the questions belong.
-        - Iterates over the validated data to create each question and its options.
-        - Returns the list of created Question instances.
+        - Runs in a transaction, so a failed import leaves nothing behind.
+        - Returns the list of created Question instances with options prefetched.
+
+    validate(attrs):
+        Checks the whole batch for questions already in the quiz with one query,
+        and for questions repeated within the batch.
     """
     def create(self, validated_data):
         quiz = self.context['quiz']
-        questions = []
 
-        for question_data in validated_data:
-            options_data = question_data.pop('options', [])
-            question = Question.objects.create(quiz=quiz, **question_data)
+        with transaction.atomic():
+            questions = bulk_create_questions(quiz, validated_data)
+            quiz.bump_content_version()
+
+        return list(
+            Question.objects
+            .filter(id__in=[question.id for question in questions])
+            .order_by('id')
+            .prefetch_related('options')
+        )
 
-            options = [
-                Option(question=question, **option_data)
-                for option_data in options_data
-            ]
-            Option.objects.bulk_create(options)
+    def validate(self, attrs):
+        quiz = self.context.get('quiz')
+        texts = [item['question_text'].lower() for item in attrs]
+
+        errors = []
+        seen = set()
+        for item, text in zip(attrs, texts):
+            if text in seen:
+                errors.append(f'"{item["question_text"]}" appears more than once.')
+            seen.add(text)
 
-            questions.append(question)
+        existing = existing_question_texts(quiz, seen)
+        for item, text in zip(attrs, texts):
+            if text in existing:
+                errors.append(f'"{item["question_text"]}": This question already exists in this quiz.')
 
-        return questions
+        if errors:
+            raise serializers.ValidationError(errors)
+
+        return attrs
 
 class QuizQuestionSerializer(serializers.ModelSerializer):
     """
@@ -209,7 +312,8 @@ class QuizQuestionSerializer(serializers.ModelSerializer):
         Overrides the default update method to handle nested question and option data for updating a question.
         
     validate(self, data):
-        Validate that no question appear twice in a quiz
+        Validate that no question appear twice in a quiz. Skipped for bulk
+        creation, which validates the batch as a whole.
     """
     options = OptionSerializer(many=True)
 
@@ -225,12 +329,11 @@ class QuizQuestionSerializer(serializers.ModelSerializer):
         list_serializer_class = BulkQuestionListSerializer
 
     def create(self, validated_data):
-        options_data = validated_data.pop('options', [])
         quiz = self.context.get('quiz')
-        question = Question.objects.create(quiz=quiz, **validated_data)
 
-        for option_data in options_data:
-            Option.objects.create(question=question, **option_data)
+        with transaction.atomic():
+            question, = bulk_create_questions(quiz, [validated_data])
+            quiz.bump_content_version()
 
         return question
 
@@ -240,13 +343,20 @@ class QuizQuestionSerializer(serializers.ModelSerializer):
         instance.question_type = validated_data.get('question_type', instance.question_type)
         instance.question_text = validated_data.get('question_text', instance.question_text)
         instance.explanation = validated_data.get('explanation', instance.explanation)
-        instance.save()
+        text_changed = not instance.minhash or 'question_text' in validated_data
+        if text_changed:
+            sign_questions([instance])
+
+        with transaction.atomic():
+            instance.save()
+            if text_changed:
+                store_buckets([instance], replace=True)
 
-        if option_data:
-            instance.options.all().delete()
-            for option in option_data:
-                Option.objects.create(question=instance, **option)
+            if option_data:
+                update_question_options(instance, option_data)
 
+            index_questions([instance.id])
+            instance.quiz.bump_content_version()
         return instance
     
     # def validate(self, data):
@@ -258,6 +368,10 @@ class QuizQuestionSerializer(serializers.ModelSerializer):
 
     #     return data
     def validate(self, data):
+        # Bulk imports check the whole batch at once in BulkQuestionListSerializer.validate.
+        if isinstance(self.parent, BulkQuestionListSerializer):
+            return data
+
         quiz = self.context.get("quiz")
         question_text = data.get("question_text")
    
@@ -268,4 +382,93 @@ class QuizQuestionSerializer(serializers.ModelSerializer):
         if qs.exists():
             raise serializers.ValidationError("This question already exists in this quiz.")
 
-        return data
\ No newline at end of file
+        return data
+class QuestionImportSerializer(serializers.ModelSerializer):
+    """
+    Serializer reporting the progress of a streamed question import.
+
+    Fields:
+        - id: Primary key of the import, used to resume it.
+        - source: Name of the imported file.
+        - file_format: csv or jsonl.
+        - status: running or completed.
+        - rows_processed: Data rows read so far.
+        - rows_imported: Questions created.
+        - rows_failed: Rows rejected by validation.
+        - rows_flagged: Imported questions flagged as near-duplicates.
+        - errors: Row numbers and validation errors of rejected rows.
+    """
+    class Meta:
+        model = QuestionImport
+        fields = [
+            'id',
+            'source',
+            'file_format',
+            'status',
+            'rows_processed',
+            'rows_imported',
+            'rows_failed',
+            'rows_flagged',
+            'errors',
+        ]
+
+class QuestionImportUploadSerializer(serializers.Serializer):
+    """
+    Serializer for uploading a question bank file.
+
+    Fields:
+        - file: CSV or JSON Lines file of questions.
+        - file_format: csv or jsonl, taken from the file extension when omitted.
+        - import_id: An earlier import of the same file to resume.
+    """
+    file = serializers.FileField()
+    file_format = serializers.ChoiceField(choices=QuestionImport.FORMATS, required=False)
+    import_id = serializers.IntegerField(required=False)
+
+    def validate(self, data):
+        if 'file_format' not in data:
+            extension = data['file'].name.rsplit('.', 1)[-1].lower()
+            if extension not in dict(QuestionImport.FORMATS):
+                raise serializers.ValidationError("Could not tell the file format; set file_format.")
+            data['file_format'] = extension
+        return data
+
+class ExportSerializer(serializers.Serializer):
+    """
+    Query parameters accepted by the streaming exports.
+
+    Fields:
+        - file_format: csv or jsonl (default).
+        - quiz: Only export this quiz.
+        - since / until: Only export rows created in [since, until).
+    """
+    file_format = serializers.ChoiceField(choices=['csv', 'jsonl'], default='jsonl')
+    quiz = serializers.IntegerField(required=False)
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+
+
+class QuestionSearchParamsSerializer(serializers.Serializer):
+    """
+    Query parameters accepted by the question search.
+
+    Fields:
+        - q: Words to look for in question text, explanations and options.
+        - quiz: Only search this quiz.
+        - page / page_size: Page of the ranked results.
+    """
+    q = serializers.CharField(max_length=200)
+    quiz = serializers.IntegerField(required=False)
+    page = serializers.IntegerField(default=1, min_value=1, max_value=500)
+    page_size = serializers.IntegerField(default=20, min_value=1, max_value=100)
+
+
+class QuestionSearchResultSerializer(serializers.ModelSerializer):
+    """
+    A question matched by the search, with its rank (higher is better).
+    """
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = Question
+        fields = ['id', 'quiz', 'question_type', 'question_text', 'explanation', 'rank']
@@ -0,0 +1,189 @@
+from collections import OrderedDict
+from threading import Lock
+from types import MappingProxyType
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from .models import Quiz, Question, Option
+
+
+class QuizSnapshot:
+    """
+    Immutable view of a quiz's content at one content_version.
+
+    Attributes:
+        - quiz_id: Primary key of the quiz.
+        - version: The Quiz.content_version the snapshot was built from.
+        - question_ids: Question ids ordered by id.
+        - questions: Mapping of question id to a read-only mapping shaped
+          like QuestionSerializer output (options include is_correct).
+        - answer_key: Mapping of question id to a frozenset of correct option ids.
+        - option_questions: Mapping of option id to its question id.
+        - rendered: Payloads and structures derived from this content,
+          filled in by their users (see attempts.serializers.student_question_json
+          and attempts.grading.question_keys) so they are cached, and
+          dropped, with the snapshot.
+
+    compact():
+        Return the nested-tuple form stored in the shared cache.
+
+    from_compact(quiz_id, data):
+        Rebuild a snapshot from the output of compact().
+    """
+    __slots__ = (
+        'quiz_id', 'version', 'question_ids', 'questions', 'answer_key', 'option_questions', 'rendered', '_compact'
+    )
+
+    def __init__(self, quiz_id, compact):
+        version, rows = compact
+        questions = {}
+        answer_key = {}
+        option_questions = {}
+
+        for question_id, question_type, question_text, explanation, options in rows:
+            questions[question_id] = MappingProxyType({
+                'id': question_id,
+                'question_type': question_type,
+                'question_text': question_text,
+                'explanation': explanation,
+                'options': tuple(
+                    MappingProxyType({'id': option_id, 'option_text': option_text, 'is_correct': is_correct})
+                    for option_id, option_text, is_correct in options
+                ),
+            })
+            answer_key[question_id] = frozenset(
+                option_id for option_id, _, is_correct in options if is_correct
+            )
+            for option_id, _, _ in options:
+                option_questions[option_id] = question_id
+
+        self.quiz_id = quiz_id
+        self.version = version
+        self.question_ids = tuple(questions)
+        self.questions = questions
+        self.answer_key = answer_key
+        self.option_questions = option_questions
+        self.rendered = {}
+        self._compact = compact
+
+    @classmethod
+    def build(cls, quiz_id, version):
+        """
+        Read the quiz content from the database, two queries regardless of
+        the number of questions.
+        """
+        options = {}
+        for option_id, question_id, option_text, is_correct in (
+            Option.objects.filter(question__quiz_id=quiz_id)
+            .order_by('id')
+            .values_list('id', 'question_id', 'option_text', 'is_correct')
+        ):
+            options.setdefault(question_id, []).append((option_id, option_text, is_correct))
+
+        rows = tuple(
+            (question_id, question_type, question_text, explanation, tuple(options.get(question_id, ())))
+            for question_id, question_type, question_text, explanation in (
+                Question.objects.filter(quiz_id=quiz_id)
+                .order_by('id')
+                .values_list('id', 'question_type', 'question_text', 'explanation')
+            )
+        )
+        return cls(quiz_id, (version, rows))
+
+    def compact(self):
+        return self._compact
+
+    @classmethod
+    def from_compact(cls, quiz_id, data):
+        return cls(quiz_id, data)
+
+    def has_option(self, question_id, option_id):
+        return self.option_questions.get(option_id) == question_id
+
+
+class SnapshotCache:
+    """
+    Two-level cache of QuizSnapshot objects keyed by (quiz id, version).
+
+    The first level is an in-process LRU holding ready-to-use snapshots;
+    the second is a Django cache backend shared between processes holding
+    the compact form. Because the version is part of the key, a content
+    change never serves a stale entry; old versions simply age out.
+    """
+    def __init__(self, maxsize, alias):
+        self.maxsize = maxsize
+        self.alias = alias
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def shared_key(self, quiz_id, version):
+        return f'quiz-snapshot:{quiz_id}:{version}'
+
+    def get(self, quiz_id, version):
+        key = (quiz_id, version)
+        with self._lock:
+            snapshot = self._entries.get(key)
+            if snapshot is not None:
+                self._entries.move_to_end(key)
+                return snapshot
+
+        shared = caches[self.alias]
+        compact = shared.get(self.shared_key(quiz_id, version))
+        if compact is not None:
+            snapshot = QuizSnapshot.from_compact(quiz_id, compact)
+        else:
+            snapshot = QuizSnapshot.build(quiz_id, version)
+            shared.set(self.shared_key(quiz_id, version), snapshot.compact(), None)
+
+        self.put(snapshot)
+        return snapshot
+
+    async def aget(self, quiz_id, version):
+        """
+        Async get(): an in-process hit is returned directly; a miss falls
+        back to get() in a thread.
+        """
+        with self._lock:
+            snapshot = self._entries.get((quiz_id, version))
+            if snapshot is not None:
+                self._entries.move_to_end((quiz_id, version))
+                return snapshot
+        return await sync_to_async(self.get)(quiz_id, version)
+
+    def put(self, snapshot):
+        with self._lock:
+            self._entries[(snapshot.quiz_id, snapshot.version)] = snapshot
+            self._entries.move_to_end((snapshot.quiz_id, snapshot.version))
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+snapshot_cache = SnapshotCache(
+    maxsize=getattr(settings, 'QUIZ_SNAPSHOT_CACHE_SIZE', 256),
+    alias=getattr(settings, 'QUIZ_SNAPSHOT_CACHE_ALIAS', 'default'),
+)
+
+
+def get_snapshot(quiz_id, version=None):
+    """
+    Return the QuizSnapshot for the quiz's current content.
+
+    Pass ``version`` when the caller already loaded Quiz.content_version
+    (for instance through a join) to skip the version lookup.
+    """
+    if version is None:
+        version = Quiz.objects.values_list('content_version', flat=True).get(pk=quiz_id)
+    return snapshot_cache.get(quiz_id, version)
+
+
+async def aget_snapshot(quiz_id, version=None):
+    """
+    Async get_snapshot().
+    """
+    if version is None:
+        version = await Quiz.objects.values_list('content_version', flat=True).aget(pk=quiz_id)
+    return await snapshot_cache.aget(quiz_id, version)
@@ -1,3 +1,458 @@
+import io
+import json
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from .duplicates import minhash, similarity
+from .importer import import_questions
+from .models import DuplicateCandidate, Quiz, Question, Option, QuestionImport
+from .serializers import QuizDetailSerializer
+from .snapshots import get_snapshot, snapshot_cache
 
-# Create your tests here.
+
+class QuizSnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        snapshot_cache.clear()
+        self.client = APIClient()
+        self.quiz = Quiz.objects.create(quiz_name='Parasitology')
+        self.question = Question.objects.create(
+            quiz=self.quiz, question_type='OBJ', question_text='Vector of malaria?'
+        )
+        self.right = Option.objects.create(question=self.question, option_text='Anopheles', is_correct=True)
+        Option.objects.create(question=self.question, option_text='Aedes')
+
+    def test_snapshot_is_served_from_cache(self):
+        snapshot = get_snapshot(self.quiz.id)
+
+        self.assertEqual(snapshot.answer_key, {self.question.id: frozenset([self.right.id])})
+        with self.assertNumQueries(0):
+            self.assertIs(get_snapshot(self.quiz.id, snapshot.version), snapshot)
+
+    def test_shared_cache_rebuilds_without_queries(self):
+        snapshot = get_snapshot(self.quiz.id)
+        snapshot_cache.clear()
+
+        with self.assertNumQueries(0):
+            rebuilt = get_snapshot(self.quiz.id, snapshot.version)
+        self.assertEqual(rebuilt.questions, snapshot.questions)
+
+    def test_question_writes_bump_the_version(self):
+        before = get_snapshot(self.quiz.id)
+        url = reverse('quiz-questions-list', args=[self.quiz.id])
+        self.client.post(url, {
+            'question_type': 'OBJ',
+            'question_text': 'Vector of dengue?',
+            'options': [{'option_text': 'Aedes', 'is_correct': True}],
+        }, format='json')
+
+        after = get_snapshot(self.quiz.id)
+        self.assertEqual(after.version, before.version + 1)
+        self.assertEqual(len(after.question_ids), 2)
+
+
+class BulkQuestionImportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        snapshot_cache.clear()
+        self.client = APIClient()
+        self.quiz = Quiz.objects.create(quiz_name='Immunology')
+        self.url = reverse('quiz-questions-list', args=[self.quiz.id])
+
+    def payload(self, count, start=0):
+        return [
+            {
+                'question_type': 'OBJ',
+                'question_text': f'Question {number}',
+                'options': [
+                    {'option_text': 'Right', 'is_correct': True},
+                    {'option_text': 'Wrong', 'is_correct': False},
+                ],
+            }
+            for number in range(start, start + count)
+        ]
+
+    def import_queries(self, count, start):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, self.payload(count, start), format='json')
+        self.assertEqual(response.status_code, 201)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        self.assertEqual(self.import_queries(5, start=0), self.import_queries(100, start=5))
+        self.assertEqual(Question.objects.filter(quiz=self.quiz).count(), 105)
+        self.assertEqual(Option.objects.filter(question__quiz=self.quiz).count(), 210)
+
+    def test_existing_question_rejects_the_whole_batch(self):
+        Question.objects.create(quiz=self.quiz, question_type='OBJ', question_text='QUESTION 3')
+
+        response = self.client.post(self.url, self.payload(5), format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Question.objects.filter(quiz=self.quiz).count(), 1)
+
+    def test_repeated_question_in_batch_is_rejected(self):
+        payload = self.payload(2) + self.payload(1)
+
+        response = self.client.post(self.url, payload, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Question.objects.filter(quiz=self.quiz).exists())
+
+    def test_nested_quiz_create_bulk_creates_options(self):
+        url = reverse('quiz-list')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, {'quiz_name': 'Virology', 'questions': self.payload(30)}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data['questions']), 30)
+        self.assertLess(len(queries), 15)
+
+
+class QuestionImporterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        snapshot_cache.clear()
+        self.client = APIClient()
+        self.quiz = Quiz.objects.create(quiz_name='Histopathology')
+
+    def jsonl(self, count):
+        return ''.join(
+            json.dumps({
+                'question_type': 'OBJ',
+                'question_text': f'Question {number}',
+                'options': [{'option_text': 'Right', 'is_correct': True}],
+            }) + '\n'
+            for number in range(count)
+        )
+
+    def test_bad_rows_are_reported_without_stopping(self):
+        source = self.jsonl(3) + '{not json\n' + json.dumps({'question_type': 'XYZ', 'question_text': 'Q'}) + '\n'
+        question_import = QuestionImport.objects.create(quiz=self.quiz, source='bank.jsonl', file_format='jsonl')
+
+        list(import_questions(question_import, io.StringIO(source), chunk_size=2))
+
+        question_import.refresh_from_db()
+        self.assertEqual(question_import.status, 'completed')
+        self.assertEqual(question_import.rows_imported, 3)
+        self.assertEqual([error['row'] for error in question_import.errors], [4, 5])
+
+    def test_interrupted_import_resumes_from_checkpoint(self):
+        source = self.jsonl(10)
+        question_import = QuestionImport.objects.create(quiz=self.quiz, source='bank.jsonl', file_format='jsonl')
+
+        progress = import_questions(question_import, io.StringIO(source), chunk_size=4)
+        next(progress)
+        progress.close()
+
+        question_import = QuestionImport.objects.get(pk=question_import.pk)
+        self.assertEqual(question_import.rows_processed, 4)
+
+        list(import_questions(question_import, io.StringIO(source), chunk_size=4))
+
+        self.assertEqual(question_import.rows_imported, 10)
+        self.assertEqual(question_import.rows_failed, 0)
+        self.assertEqual(Question.objects.filter(quiz=self.quiz).count(), 10)
+
+    def test_csv_upload(self):
+        source = (
+            'question_type,question_text,explanation,option_1,option_2,correct\n'
+            'OBJ,Stain for fungi?,,PAS,Gram,1\n'
+            'OBJ,Stain for iron?,,Perls,Giemsa,1\n'
+        )
+        upload = SimpleUploadedFile('bank.csv', source.encode(), content_type='text/csv')
+        url = reverse('quiz-questions-import', args=[self.quiz.id])
+
+        response = self.client.post(url, {'file': upload}, format='multipart')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['rows_imported'], 2)
+        self.assertEqual(
+            list(Option.objects.filter(is_correct=True).values_list('option_text', flat=True)),
+            ['PAS', 'Perls']
+        )
+
+
+class QuizExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        for number in range(3):
+            quiz = Quiz.objects.create(quiz_name=f'Quiz {number}')
+            question = Question.objects.create(quiz=quiz, question_type='OBJ', question_text='Q')
+            Option.objects.create(question=question, option_text='A', is_correct=True)
+            Option.objects.create(question=question, option_text='B')
+        self.url = reverse('quiz-export')
+
+    def test_jsonl_export_streams_nested_quizzes(self):
+        response = self.client.get(self.url)
+
+        self.assertTrue(response.streaming)
+        records = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([record['quiz_name'] for record in records], ['Quiz 0', 'Quiz 1', 'Quiz 2'])
+        self.assertEqual(len(records[0]['questions'][0]['options']), 2)
+
+    def test_csv_export_filters_by_quiz(self):
+        quiz = Quiz.objects.get(quiz_name='Quiz 1')
+        response = self.client.get(self.url, {'file_format': 'csv', 'quiz': quiz.id})
+
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[:2], ['quiz_id', 'quiz_name'])
+        self.assertEqual(len(lines), 3)
+
+
+class ListingPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        for number in range(25):
+            Quiz.objects.create(quiz_name=f'{"Haematology" if number % 2 else "Microbiology"} {number}')
+        self.quiz = Quiz.objects.first()
+        for number in range(7):
+            Question.objects.create(
+                quiz=self.quiz,
+                question_type='MCQ' if number % 2 else 'OBJ',
+                question_text=f'Question {number}'
+            )
+
+    def collect(self, url, params):
+        items = []
+        while url:
+            response = self.client.get(url, params)
+            items.extend(response.data['results'])
+            url, params = response.data['next'], None
+        return items
+
+    def test_quiz_list_pages_through_every_quiz_once(self):
+        quizzes = self.collect(reverse('quiz-list'), {'page_size': 10})
+
+        self.assertEqual(len(quizzes), 25)
+        self.assertEqual(len({quiz['id'] for quiz in quizzes}), 25)
+        self.assertEqual(quizzes[0]['id'], Quiz.objects.latest('created_at', 'id').id)
+
+    def test_quiz_list_filters_by_name_prefix(self):
+        quizzes = self.collect(reverse('quiz-list'), {'name': 'haem'})
+
+        self.assertEqual(len(quizzes), 12)
+        self.assertTrue(all(quiz['quiz_name'].startswith('Haematology') for quiz in quizzes))
+
+    def test_name_prefix_filter_uses_the_lowercase_name_index(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('quiz-list'), {'name': 'haem'})
+        # The page query, not the ETag's count.
+        sql = next(query['sql'] for query in queries.captured_queries if 'LIMIT' in query['sql'])
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            plan = ' '.join(row[-1] for row in cursor.fetchall())
+
+        self.assertIn('quiz_name_lower_idx', plan)
+
+    def test_question_list_filters_by_type(self):
+        url = reverse('quiz-questions-list', args=[self.quiz.id])
+        questions = self.collect(url, {'question_type': 'MCQ', 'page_size': 2})
+
+        self.assertEqual([question['question_type'] for question in questions], ['MCQ'] * 3)
+
+
+class QuizDetailSummaryTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.quiz = Quiz.objects.create(quiz_name='Cytology')
+
+    def add_questions(self, question_type, count, start=0):
+        url = reverse('quiz-questions-list', args=[self.quiz.id])
+        self.client.post(url, [
+            {
+                'question_type': question_type,
+                'question_text': f'{question_type} question {number}',
+                'options': [{'option_text': 'A', 'is_correct': True}],
+            }
+            for number in range(start, start + count)
+        ], format='json')
+
+    def test_summary_follows_question_writes(self):
+        self.add_questions('OBJ', 1)
+        self.add_questions('MCQ', 2)
+
+        response = self.client.get(reverse('quiz-detail', args=[self.quiz.id]))
+
+        self.assertEqual(response.data['total_question'], 3)
+        self.assertEqual(response.data['question_type'], 'MCQ')
+
+    def test_deleting_a_question_updates_the_count(self):
+        self.add_questions('OBJ', 2)
+        question = Question.objects.filter(quiz=self.quiz).first()
+
+        self.client.delete(reverse('quiz-questions-detail', args=[self.quiz.id, question.id]))
+
+        self.quiz.refresh_from_db()
+        self.assertEqual(self.quiz.question_count, 1)
+
+    def test_serializing_many_quizzes_costs_one_query(self):
+        for number in range(20):
+            Quiz.objects.create(quiz_name=f'Quiz {number}')
+
+        with self.assertNumQueries(1):
+            QuizDetailSerializer(Quiz.objects.all(), many=True).data
+
+
+class QuestionSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.quizzes = [Quiz.objects.create(quiz_name=name) for name in ('Haematology', 'Chemistry')]
+        self.create(self.quizzes[0], 'Which cells carry haemoglobin?', 'Erythrocytes are red cells.', ['Erythrocytes', 'Platelets'])
+        self.create(self.quizzes[0], 'What does ferritin measure?', 'Iron stores; low in anaemia.', ['Iron stores', 'Clotting'])
+        self.create(self.quizzes[1], 'Which ion rises in renal failure?', 'Potassium retention.', ['Potassium', 'Iron'])
+
+    def create(self, quiz, text, explanation, options):
+        response = self.client.post(
+            reverse('quiz-questions-list', args=[quiz.id]),
+            {
+                'question_type': 'OBJ',
+                'question_text': text,
+                'explanation': explanation,
+                'options': [{'option_text': option, 'is_correct': index == 0} for index, option in enumerate(options)],
+            },
+            format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.data['id']
+
+    def search(self, **params):
+        response = self.client.get(reverse('quiz-search'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def texts(self, **params):
+        return [result['question_text'] for result in self.search(**params)['results']]
+
+    def test_matches_question_text_explanation_and_options_best_first(self):
+        self.assertEqual(self.texts(q='iron'), ['What does ferritin measure?', 'Which ion rises in renal failure?'])
+        self.assertEqual(self.texts(q='platelets'), ['Which cells carry haemoglobin?'])
+        self.assertEqual(self.texts(q='haemoglobin cells'), ['Which cells carry haemoglobin?'])
+        self.assertEqual(self.texts(q='ferr'), ['What does ferritin measure?'])
+        self.assertEqual(self.texts(q='iron', quiz=self.quizzes[1].id), ['Which ion rises in renal failure?'])
+        self.assertEqual(self.texts(q='"); DROP'), [])
+
+    def test_search_costs_two_queries(self):
+        with self.assertNumQueries(2):
+            self.client.get(reverse('quiz-search'), {'q': 'iron'})
+
+    def test_pages_link_to_each_other(self):
+        first = self.search(q='iron', page_size=1)
+        second = self.client.get(first['next']).data
+
+        self.assertEqual(len(first['results']), 1)
+        self.assertEqual(second['results'][0]['question_text'], 'Which ion rises in renal failure?')
+        self.assertIsNone(second['next'])
+        self.assertIsNotNone(second['previous'])
+
+    def test_index_follows_updates_and_deletes(self):
+        question_id = self.create(self.quizzes[1], 'Name a cardiac marker.', '', ['Troponin', 'Amylase'])
+        url = reverse('quiz-questions-detail', args=[self.quizzes[1].id, question_id])
+        self.assertEqual(self.texts(q='troponin'), ['Name a cardiac marker.'])
+
+        self.client.patch(url, {'question_text': 'Name a pancreatic enzyme.', 'options': [
+            {'option_text': 'Lipase', 'is_correct': True}, {'option_text': 'Troponin', 'is_correct': False},
+        ]}, format='json')
+        self.assertEqual(self.texts(q='cardiac'), [])
+        self.assertEqual(self.texts(q='lipase'), ['Name a pancreatic enzyme.'])
+
+        self.client.delete(url)
+        self.assertEqual(self.texts(q='lipase'), [])
+
+        self.client.delete(reverse('quiz-detail', args=[self.quizzes[0].id]))
+        self.assertEqual(self.texts(q='iron'), ['Which ion rises in renal failure?'])
+
+
+class DuplicateDetectionTests(TestCase):
+    ORIGINAL = 'Which of the following cells carry haemoglobin in the peripheral blood of adults?'
+    REWORDED = 'Which of the following cell types carry haemoglobin in the peripheral blood of adults?'
+    UNRELATED = 'What does a low serum ferritin tell you about iron stores?'
+
+    def setUp(self):
+        self.quizzes = [Quiz.objects.create(quiz_name=name) for name in ('Haematology', 'Revision')]
+
+    def test_signatures_estimate_text_similarity(self):
+        self.assertEqual(minhash(self.ORIGINAL), minhash(f'  {self.ORIGINAL.upper()}!! '))
+        self.assertGreaterEqual(similarity(minhash(self.ORIGINAL), minhash(self.REWORDED)), 0.7)
+        self.assertLess(similarity(minhash(self.ORIGINAL), minhash(self.UNRELATED)), 0.3)
+
+    def test_import_flags_rewordings_from_other_quizzes(self):
+        response = APIClient().post(reverse('quiz-questions-list', args=[self.quizzes[0].id]), {
+            'question_type': 'OBJ',
+            'question_text': self.ORIGINAL,
+            'options': [{'option_text': 'Erythrocytes', 'is_correct': True}],
+        }, format='json')
+        source = ''.join(
+            json.dumps({'question_type': 'OBJ', 'question_text': text, 'options': [{'option_text': 'A', 'is_correct': True}]}) + '\n'
+            for text in (self.REWORDED, self.UNRELATED)
+        )
+        question_import = QuestionImport.objects.create(quiz=self.quizzes[1], source='bank.jsonl', file_format='jsonl')
+
+        list(import_questions(question_import, io.StringIO(source)))
+
+        self.assertEqual(question_import.rows_flagged, 1)
+        candidate = DuplicateCandidate.objects.get()
+        self.assertEqual(candidate.question.question_text, self.REWORDED)
+        self.assertEqual(candidate.duplicate_of_id, response.data['id'])
+
+    def test_audit_signs_old_questions_and_flags_each_pair_once(self):
+        original = Question.objects.create(quiz=self.quizzes[0], question_type='OBJ', question_text=self.ORIGINAL)
+        reworded = Question.objects.create(quiz=self.quizzes[1], question_type='OBJ', question_text=self.REWORDED)
+        Question.objects.create(quiz=self.quizzes[1], question_type='OBJ', question_text=self.UNRELATED)
+
+        call_command('audit_duplicates', stdout=io.StringIO())
+        call_command('audit_duplicates', stdout=io.StringIO())
+
+        self.assertFalse(Question.objects.filter(minhash=b'').exists())
+        self.assertEqual(
+            list(DuplicateCandidate.objects.values_list('question_id', 'duplicate_of_id')),
+            [(reworded.id, original.id)]
+        )
+
+
+class ConditionalReadTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.quiz = Quiz.objects.create(quiz_name='Microbiology')
+        self.question = Question.objects.create(quiz=self.quiz, question_type='OBJ', question_text='Gram stain of E. coli?')
+        Option.objects.create(question=self.question, option_text='Negative', is_correct=True)
+        self.questions_url = reverse('quiz-questions-list', args=[self.quiz.id])
+
+    def test_unchanged_content_is_answered_with_304_in_one_query(self):
+        for url in (reverse('quiz-list'), reverse('quiz-detail', args=[self.quiz.id]), self.questions_url):
+            first = self.client.get(url)
+            self.assertEqual(first.status_code, 200)
+            self.assertEqual(first['Cache-Control'], 'private, no-cache')
+
+            with self.assertNumQueries(1):
+                again = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+            self.assertEqual(again.status_code, 304)
+            self.assertEqual(again.content, b'')
+
+            since = self.client.get(url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+            self.assertEqual(since.status_code, 304)
+
+    def test_question_and_option_changes_refresh_the_validators(self):
+        etag = self.client.get(self.questions_url)['ETag']
+        detail_etag = self.client.get(reverse('quiz-detail', args=[self.quiz.id]))['ETag']
+
+        self.client.patch(
+            reverse('quiz-questions-detail', args=[self.quiz.id, self.question.id]),
+            {'options': [{'option_text': 'Positive', 'is_correct': True}]},
+            format='json'
+        )
+
+        response = self.client.get(self.questions_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['options'][0]['option_text'], 'Positive')
+        self.assertNotEqual(
+            self.client.get(reverse('quiz-detail', args=[self.quiz.id]), HTTP_IF_NONE_MATCH=detail_etag).status_code,
+            304
+        )
+        self.assertGreater(Quiz.objects.get(pk=self.quiz.pk).updated_at, self.quiz.updated_at)
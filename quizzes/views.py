@@ -1,11 +1,90 @@
+import io
+import sys
 from django.shortcuts import get_object_or_404
-from . serializers import QuizSerializer, QuizListSerializer, QuizDetailSerializer, QuizQuestionSerializer
-from .models import Quiz, Question, Option
+from . serializers import (
+    QuizSerializer, QuizListSerializer, QuizDetailSerializer, QuizQuestionSerializer,
+    QuestionImportSerializer, QuestionImportUploadSerializer, ExportSerializer,
+    QuestionSearchParamsSerializer, QuestionSearchResultSerializer
+)
+from .exports import export_quizzes, filter_by_date
+from .importer import import_questions
+from .models import Quiz, Question, Option, QuestionImport
+from .pagination import QuizCursorPagination, QuestionCursorPagination
+from .search import search_questions, unindex_questions
+from django.db import connection, transaction
+from django.db.models import Count, Max
+from django.db.models.functions import Collate, Lower
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
 from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from rest_framework import status
 
-class QuizViewSet(viewsets.ModelViewSet):
+class ConditionalReadMixin:
+    """
+    Answer list and retrieve with 304 Not Modified when the client already
+    has the current representation.
+
+    content_validators() returns ``(version, updated_at)`` for the
+    requested content from a cheap query, or None to skip the check. The
+    ETag is built from both and Last-Modified from updated_at; a matching
+    If-None-Match (or, without one, If-Modified-Since) is answered before
+    any question or option is loaded. Full responses carry the validators
+    and ask clients to revalidate before reusing them.
+    """
+    def content_validators(self):
+        return None
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_read(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_read(super().retrieve, request, *args, **kwargs)
+
+    def conditional_read(self, read, request, *args, **kwargs):
+        validators = self.content_validators()
+        if validators is None or validators[1] is None:
+            return read(request, *args, **kwargs)
+
+        version, updated_at = validators
+        etag = f'"{version}-{int(updated_at.timestamp() * 1_000_000)}"'
+        last_modified = int(updated_at.timestamp())
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = read(request, *args, **kwargs)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+def lower_name():
+    """
+    The lowercase quiz name, compared bytewise: in the "C" collation on
+    PostgreSQL (indexed by quiz_name_lower_c_idx, migration 0011), in
+    SQLite's default BINARY one elsewhere (quiz_name_lower_idx).
+    """
+    if connection.vendor == 'postgresql':
+        return Collate(Lower('quiz_name'), 'C')
+    return Lower('quiz_name')
+
+
+def name_prefix_range(prefix):
+    """
+    Lookups on ``lower_name`` matching names that start with ``prefix``: a
+    range the expression index can be scanned for, since a LIKE prefix (as
+    startswith builds) is not served by it, rechecked with startswith.
+    """
+    lookups = {'lower_name__gte': prefix, 'lower_name__startswith': prefix}
+    if prefix[-1] != chr(sys.maxunicode):
+        lookups['lower_name__lt'] = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return lookups
+
+
+class QuizViewSet(ConditionalReadMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing quizzes.
     Provides CRUD operations for Quiz model.
@@ -15,9 +94,42 @@ class QuizViewSet(viewsets.ModelViewSet):
         - list: Uses QuizListSerializer to list all quizzes.
         - retrieve: Uses QuizDetailSerializer to provide detailed information about a specific quiz.
         - default: Uses QuizSerializer for other actions (create, update, delete).
+
+    get_queryset:
+        Filters the list by the name query parameter, a case-insensitive prefix
+        of quiz_name.
+
+    export:
+        Streams quizzes with their questions and options as CSV or JSON Lines,
+        optionally filtered by quiz and creation date.
+
+    search:
+        Full-text search of questions across every quiz (or one, with
+        ``quiz``) by question text, explanation and options, best match
+        first, ``page_size`` results per ``page``.
+
+    content_validators:
+        The list is validated by the number of matching quizzes and their
+        latest updated_at, a quiz by its content_version and updated_at.
+
+    The list is cursor paginated on (created_at, id), newest first.
     """
     queryset = Quiz.objects.all()
     serializer_class = QuizSerializer
+    pagination_class = QuizCursorPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        name = self.request.query_params.get('name')
+        if self.action == 'list' and name:
+            queryset = queryset.annotate(lower_name=lower_name()).filter(**name_prefix_range(name.lower()))
+        return queryset
+
+    def content_validators(self):
+        if self.action == 'list':
+            latest = self.get_queryset().order_by().aggregate(count=Count('id'), updated_at=Max('updated_at'))
+            return latest['count'], latest['updated_at']
+        return Quiz.objects.filter(pk=self.kwargs['pk']).values_list('content_version', 'updated_at').first()
 
     def get_serializer_class(self):
         if self.action == 'list':
@@ -26,21 +138,102 @@ class QuizViewSet(viewsets.ModelViewSet):
             return QuizDetailSerializer
         return super().get_serializer_class()
 
-class QuestionViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        params = ExportSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+
+        quizzes = Quiz.objects.all()
+        if 'quiz' in params.validated_data:
+            quizzes = quizzes.filter(pk=params.validated_data['quiz'])
+        quizzes = filter_by_date(
+            quizzes,
+            'created_at',
+            params.validated_data.get('since'),
+            params.validated_data.get('until')
+        )
+
+        return export_quizzes(quizzes, params.validated_data['file_format'])
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        params = QuestionSearchParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        page = params.validated_data['page']
+        page_size = params.validated_data['page_size']
+
+        # One extra result tells whether there is a next page without counting.
+        matches = search_questions(
+            params.validated_data['q'],
+            quiz_id=params.validated_data.get('quiz'),
+            limit=page_size + 1,
+            offset=(page - 1) * page_size
+        )
+        for question, rank in matches:
+            question.rank = rank
+
+        url = request.build_absolute_uri()
+        return Response({
+            'next': replace_query_param(url, 'page', page + 1) if len(matches) > page_size else None,
+            'previous': replace_query_param(url, 'page', page - 1) if page > 1 else None,
+            'results': QuestionSearchResultSerializer(
+                [question for question, _ in matches[:page_size]], many=True
+            ).data,
+        })
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            unindex_questions(instance.questions.values_list('id', flat=True))
+            instance.delete()
+
+class QuestionViewSet(ConditionalReadMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing questions within a specific quiz.
     Provides CRUD operations for Question model filtered by quiz.
 
     get_queryset:
-        Filters questions based on the quiz_pk provided in the URL.
+        Filters questions based on the quiz_pk provided in the URL, and on the
+        question_type query parameter when listing.
 
     perform_create:
         Associates a new question with the specified quiz during creation.
+
+    perform_destroy:
+        Deletes the question and bumps the quiz content version.
+
+    import_file:
+        Streams a CSV or JSON Lines upload into the quiz in chunks and returns
+        the import progress. Passing import_id resumes an earlier import.
+
+    content_validators:
+        Every change to a quiz's questions or options bumps its
+        content_version and updated_at, which validate both the list and
+        single questions.
+
+    The list is cursor paginated on id.
     """
     serializer_class = QuizQuestionSerializer
 
+    pagination_class = QuestionCursorPagination
+
     def get_queryset(self):
-        return Question.objects.filter(quiz_id=self.kwargs['quiz_pk'])
+        queryset = Question.objects.filter(quiz_id=self.kwargs['quiz_pk'])
+        if self.action == 'list':
+            question_type = self.request.query_params.get('question_type')
+            if question_type:
+                queryset = queryset.filter(question_type=question_type)
+            queryset = queryset.prefetch_related('options')
+        return queryset
+
+    def content_validators(self):
+        return Quiz.objects.filter(pk=self.kwargs['quiz_pk']).values_list('content_version', 'updated_at').first()
+
+    def perform_destroy(self, instance):
+        quiz = instance.quiz
+        with transaction.atomic():
+            unindex_questions([instance.id])
+            instance.delete()
+        quiz.bump_content_version()
 
     def create(self, request, *args, **kwargs):
         quiz = get_object_or_404(Quiz, pk=self.kwargs['quiz_pk'])
@@ -55,4 +248,30 @@ class QuestionViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         serializer.save()
 
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
\ No newline at end of file
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'], url_path='import', url_name='import',
+            parser_classes=[MultiPartParser])
+    def import_file(self, request, quiz_pk=None):
+        quiz = get_object_or_404(Quiz, pk=quiz_pk)
+
+        serializer = QuestionImportUploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = serializer.validated_data['file']
+
+        if 'import_id' in serializer.validated_data:
+            question_import = get_object_or_404(
+                QuestionImport, pk=serializer.validated_data['import_id'], quiz=quiz
+            )
+        else:
+            question_import = QuestionImport.objects.create(
+                quiz=quiz,
+                source=upload.name,
+                file_format=serializer.validated_data['file_format']
+            )
+
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        for _ in import_questions(question_import, stream):
+            pass
+
+        return Response(QuestionImportSerializer(question_import).data, status=status.HTTP_201_CREATED)